@@ -4,11 +4,23 @@ from fastapi import FastAPI, APIRouter
 from starlette.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 from contextlib import asynccontextmanager
+import asyncio
+from loguru import logger
 
 from .controller.v1 import v1_router
 from .middleware.resp import RespMiddleware
+from .middleware.deadline import DeadlineMiddleware
+from .exceptions import (
+    CircuitOpenException,
+    DeadlineExceededException,
+    RateLimitedException,
+)
 from .config.mcim import MCIMConfig
 from .database.mongodb import start_async_mongodb, close_async_mongodb
+from .utils.response import FastJSONResponse
+from .service import curseforge, modrinth
+from .service.curseforge import load_fingerprint_index, load_search_index
+from .sync.changefeed import CurseForgeChangeFeed
 
 mcim_config = MCIMConfig.load()
 
@@ -16,16 +28,41 @@ mcim_config = MCIMConfig.load()
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     await start_async_mongodb()
+    if mcim_config.fingerprint_index:
+        await load_fingerprint_index()
+        logger.success("loaded fingerprint index")
+    if mcim_config.search_index:
+        await load_search_index()
+        logger.success("loaded search index")
+    changefeed = None
+    if mcim_config.curseforge_changefeed_interval > 0:
+        changefeed = asyncio.create_task(
+            CurseForgeChangeFeed().run_forever(mcim_config.curseforge_changefeed_interval)
+        )
+    schedulers = []
+    if mcim_config.refresh_scheduler:
+        schedulers = [curseforge.scheduler, modrinth.scheduler]
+        for scheduler in schedulers:
+            scheduler.start()
     yield
+    if changefeed is not None:
+        changefeed.cancel()
+    for scheduler in schedulers:
+        scheduler.stop()
     await close_async_mongodb()
 
 
 APP = FastAPI(
-    title="MCIM", description="这是一个为 Mod 信息加速的 API", lifespan=lifespan
+    title="MCIM",
+    description="这是一个为 Mod 信息加速的 API",
+    lifespan=lifespan,
+    default_response_class=FastJSONResponse,
 )
 
 APP.include_router(v1_router, prefix="/v1")
 
+APP.add_middleware(DeadlineMiddleware, budget=mcim_config.request_deadline)
+
 APP.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],
@@ -35,6 +72,29 @@ APP.add_middleware(
 )
 
 
+@APP.exception_handler(DeadlineExceededException)
+async def deadline_exceeded_handler(request, exc: DeadlineExceededException):
+    return JSONResponse(status_code=504, content={"detail": exc.msg})
+
+
+@APP.exception_handler(RateLimitedException)
+async def rate_limited_handler(request, exc: RateLimitedException):
+    return JSONResponse(
+        status_code=429,
+        content={"detail": exc.msg},
+        headers={"Retry-After": str(max(1, round(exc.retry_after or 1)))},
+    )
+
+
+@APP.exception_handler(CircuitOpenException)
+async def circuit_open_handler(request, exc: CircuitOpenException):
+    return JSONResponse(
+        status_code=503,
+        content={"detail": exc.msg},
+        headers={"Retry-After": str(max(1, round(exc.retry_after or 1)))},
+    )
+
+
 @APP.get("favicon.ico")
 async def favicon():
     return RedirectResponse(status_code=301, url=mcim_config.favicon_url)
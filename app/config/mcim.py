@@ -1,5 +1,6 @@
 import json
 import os
+from typing import Dict
 from pydantic import BaseModel, ValidationError, validator
 
 from .constants import CONFIG_PATH
@@ -8,6 +9,31 @@ from .constants import CONFIG_PATH
 MICM_CONFIG_PATH = os.path.join(CONFIG_PATH, "mcim.json")
 
 
+class UpstreamConfigModel(BaseModel):
+    """
+    单个上游的 httpx 连接池配置
+    """
+
+    max_connections: int = 100
+    max_keepalive_connections: int = 20
+    keepalive_expiry: float = 30  # seconds
+    http2: bool = True  # 需要安装 h2，未安装时退回 HTTP/1.1
+    connect_timeout: float = 5  # seconds
+    read_timeout: float = 10  # seconds
+    write_timeout: float = 5  # seconds
+    pool_timeout: float = 5  # seconds, 等待连接池空闲连接的时间
+
+    # 令牌桶限流，按上游和 API key 分桶
+    rate_limit: float = 0  # 每秒请求数，0 为不限制
+    rate_limit_burst: int = 10  # 允许的突发请求数
+    rate_limit_wait: float = 5  # seconds, 排队等待令牌的最长时间，超过则直接失败
+
+    # 熔断，熔断期间只返回缓存数据
+    breaker_failure_threshold: int = 5  # 连续失败多少次后熔断
+    breaker_slow_call: float = 10  # seconds, 超过的调用算作失败
+    breaker_reset_timeout: float = 30  # seconds, 熔断多久后放行探测请求
+
+
 class MCIMConfigModel(BaseModel):
     host: str = "127.0.0.1"
     port: int = 8000
@@ -17,8 +43,51 @@ class MCIMConfigModel(BaseModel):
     modrinth_api: str = "https://api.modrinth.com/"
     mcmod_api: str = "https://www.mcmod.cn/"
     proxies: str = None
-    sync_interval: int = 3600  # seconds
+
+    # 各上游的连接池配置，未列出的上游使用默认值
+    upstreams: Dict[str, UpstreamConfigModel] = {
+        "curseforge": UpstreamConfigModel(),
+        "modrinth": UpstreamConfigModel(),
+    }
+    dns_cache_ttl: int = 300  # seconds, 0 为不缓存
+    rate_limit_backend: str = "local"  # local: 每个进程单独限流; mongo: 多个 worker 共享配额
+
+    # 上游请求重试，退避时间为 [0, min(retry_max_delay, retry_base_delay * 2^n)] 内的随机值
+    retry_max_attempts: int = 3  # 负数则一直重试直到成功或超出时间预算
+    retry_base_delay: float = 0.2  # seconds
+    retry_max_delay: float = 5  # seconds
+    request_deadline: float = 30  # seconds, 单个请求 (含全部上游重试) 的时间预算，0 为不限制
+    sync_interval: int = 3600  # seconds, 超过后数据视为过期，返回旧数据并在后台刷新
+    expire_interval: int = 60 * 60 * 24 * 7  # seconds, 超过后数据直接删除
     async_timeout: int = 60  # seconds
+    curseforge_files_concurrency: int = 8  # 同步 Mod 全部文件时并发请求的页数
+    curseforge_fingerprints_chunk_size: int = 200  # 每次向上游查询的指纹数量
+    curseforge_batch_chunk_size: int = 200  # 批量接口每次向上游查询的 Mod / 文件数量
+    modrinth_batch_chunk_size: int = 100  # 批量接口每次向上游查询的 Project / Version 数量
+    hash_negative_ttl: int = 60 * 60 * 24  # seconds, 未匹配的 Modrinth 文件 hash 的缓存时间
+    fingerprint_negative_ttl: int = 60 * 60 * 24  # seconds, 未匹配指纹的缓存时间
+    fingerprint_index: bool = False  # 启动时把全部指纹加载到内存索引
+    curseforge_changefeed_interval: int = 0  # seconds, 增量同步的间隔，0 为不在服务进程内运行
+    curseforge_changefeed_lookback: int = 60 * 60 * 24  # seconds, 没有水位线时向前同步的时间
+    search_index: bool = False  # 启动时把全部 Mod 加载到内存搜索索引
+    search_coverage: float = 0.9  # 本地命中数达到上游结果数的这个比例时直接用本地结果
+
+    # 按访问热度主动刷新 Mod / File / Project，热门的提前刷新，冷门的延长间隔
+    refresh_scheduler: bool = False
+    refresh_workers: int = 4  # 并发刷新的批数
+    refresh_batch_size: int = 50  # 每批刷新的条目数
+    refresh_half_life: int = 60 * 60 * 6  # seconds, 访问热度的半衰期
+    refresh_min_interval: int = 300  # seconds, 刷新间隔下限
+    refresh_max_interval: int = 60 * 60 * 24  # seconds, 刷新间隔上限，需要小于 expire_interval
+
+    # 启动时服务层查询出现全表扫描则拒绝启动，否则只记录日志
+    refuse_collscan: bool = False
+
+    # 进程内热点缓存
+    cache_max_bytes: int = 64 * 1024 * 1024
+    cache_ttl: int = 300  # seconds
+    search_cache_max_entries: int = 10000  # 搜索结果缓存的查询数上限
+    search_cache_ttl: int = 120  # seconds, 搜索结果缓存时间，0 为不缓存
 
     favicon_url: str = (
         "https://thirdqq.qlogo.cn/g?b=sdk&k=ABmaVOlfKKPceB5qfiajxqg&s=640"
@@ -1,8 +1,12 @@
 from fastapi import APIRouter
 
 from .curseforge import curseforge_router as curseforge_router
+from .modrinth import modrinth_router as modrinth_router
+from .status import status_router as status_router
 
 v1_router = APIRouter()
 
 v1_router.include_router(curseforge_router)
+v1_router.include_router(modrinth_router)
+v1_router.include_router(status_router)
 
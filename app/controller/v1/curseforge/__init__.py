@@ -2,12 +2,16 @@ from fastapi import APIRouter
 
 # from .games import games_router
 from .mod import mod_router
+from .mods import mods_router
 from .fingerprint import fingerprint_router
+from .search import search_router
 
 curseforge_router = APIRouter(prefix="/curseforge", tags=["curseforge"])
 
 curseforge_router.include_router(mod_router)
+curseforge_router.include_router(mods_router)
 curseforge_router.include_router(fingerprint_router)
+curseforge_router.include_router(search_router)
 
 
 @curseforge_router.get("/")
@@ -2,7 +2,8 @@ from app.service.curseforge import *
 from app.models.request.curseforge import Fingerprints
 
 from fastapi import APIRouter
-from fastapi.responses import JSONResponse
+
+from app.utils.response import TrustableResponse
 
 fingerprint_router = APIRouter(prefix="/fingerprints", tags=["curseforge"])
 
@@ -22,5 +23,5 @@ fingerprint_router = APIRouter(prefix="/fingerprints", tags=["curseforge"])
     description="Curseforge Fingerprint 文件信息",
 )
 async def curseforge_fingerprints(items: Fingerprints):
-    info = await get_fingerprints(items.fingerprints)
-    return JSONResponse(content=info)
+    info, trustable = await get_fingerprints(items.fingerprints)
+    return TrustableResponse(content=info, trustable=trustable)
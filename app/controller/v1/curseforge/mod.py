@@ -1,7 +1,14 @@
 from app.service.curseforge import *
 
-from fastapi import APIRouter
-from fastapi.responses import JSONResponse
+from typing import Optional
+
+from fastapi import APIRouter, HTTPException, Query, Request
+
+from app.utils.response import (
+    TrustableResponse,
+    PreparedJSONResponse,
+    StreamingJSONArrayResponse,
+)
 
 mod_router = APIRouter(prefix="/mod", tags=["curseforge"])
 
@@ -20,29 +27,9 @@ mod_router = APIRouter(prefix="/mod", tags=["curseforge"])
     },
     description="Curseforge Mod 信息",
 )
-async def curseforge_mod(modid: int):
-    info = await get_mod_info(modid)
-    return JSONResponse(content=info)
-
-
-# get mods
-@mod_router.get(
-    "/",
-    responses={
-        200: {
-            "description": "Curseforge Mods info",
-            "content": {
-                "application/json": {
-                    # "example": {"status": "success", "data": curseforge_mods_example}
-                }
-            },
-        }
-    },
-    description="Curseforge Mods 信息",
-)
-async def curseforge_mods(modids: list):
-    info = await get_mods_info(modids)
-    return JSONResponse(content=info)
+async def curseforge_mod(modid: int, request: Request):
+    info, trustable = await get_mod_info(modid)
+    return PreparedJSONResponse(content=info, trustable=trustable, request=request)
 
 
 @mod_router.get(
@@ -57,31 +44,27 @@ async def curseforge_mods(modids: list):
             },
         }
     },
-    description="Curseforge Mod 文件信息",
-)
-async def curseforge_mod_files(modid: int):
-    info = await get_mod_files_info(modid)
-    return JSONResponse(content=info)
-
-
-# get files
-@mod_router.get(
-    "/files",
-    responses={
-        200: {
-            "description": "Curseforge Mod files info",
-            "content": {
-                "application/json": {
-                    # "example": {"status": "success", "data": curseforge_mod_files_example}
-                }
-            },
-        }
-    },
-    description="Curseforge Mod 文件信息",
+    description="Curseforge Mod 文件信息，不传 pageSize 时以流的形式返回全部文件，传入时按 cursor 分页",
 )
-async def curseforge_mod_files(fileids: list):
-    info = await get_files_info(fileids)
-    return JSONResponse(content=info)
+async def curseforge_mod_files(
+    modid: int,
+    gameVersion: Optional[str] = None,
+    modLoaderType: Optional[int] = None,
+    pageSize: Optional[int] = Query(None, ge=1, le=50),
+    cursor: Optional[str] = None,
+):
+    try:
+        if pageSize is None and cursor is None:
+            files, trustable = await get_mod_files_info(
+                modid, gameVersion, modLoaderType
+            )
+            return StreamingJSONArrayResponse(content=files, trustable=trustable)
+        info, trustable = await get_mod_files_page(
+            modid, gameVersion, modLoaderType, pageSize or 50, cursor
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return TrustableResponse(content=info, trustable=trustable)
 
 
 # get file
@@ -99,6 +82,6 @@ async def curseforge_mod_files(fileids: list):
     },
     description="Curseforge Mod 文件信息",
 )
-async def curseforge_mod_file(modid: int, fileid: int):
-    info = await get_file_info(modid, fileid)
-    return JSONResponse(content=info)
+async def curseforge_mod_file(modid: int, fileid: int, request: Request):
+    info, trustable = await get_file_info(modid, fileid)
+    return PreparedJSONResponse(content=info, trustable=trustable, request=request)
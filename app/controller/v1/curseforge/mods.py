@@ -0,0 +1,46 @@
+from app.service.curseforge import *
+from app.models.request.curseforge import ModIds, FileIds
+
+from fastapi import APIRouter
+
+from app.utils.response import TrustableResponse
+
+mods_router = APIRouter(prefix="/mods", tags=["curseforge"])
+
+
+@mods_router.post(
+    "",
+    responses={
+        200: {
+            "description": "Curseforge Mods info",
+            "content": {
+                "application/json": {
+                    # "example": {"status": "success", "data": curseforge_mods_example}
+                }
+            },
+        }
+    },
+    description="批量获取 Curseforge Mod 信息，请求体与 Curseforge 的 POST /v1/mods 相同",
+)
+async def curseforge_mods(items: ModIds):
+    info, trustable = await get_mods_info(items.modIds)
+    return TrustableResponse(content={"data": info}, trustable=trustable)
+
+
+@mods_router.post(
+    "/files",
+    responses={
+        200: {
+            "description": "Curseforge Mod files info",
+            "content": {
+                "application/json": {
+                    # "example": {"status": "success", "data": curseforge_mod_files_example}
+                }
+            },
+        }
+    },
+    description="批量获取 Curseforge 文件信息，请求体与 Curseforge 的 POST /v1/mods/files 相同",
+)
+async def curseforge_files(items: FileIds):
+    info, trustable = await get_files_info(items.fileIds)
+    return TrustableResponse(content={"data": info}, trustable=trustable)
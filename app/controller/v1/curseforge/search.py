@@ -0,0 +1,52 @@
+from app.service.curseforge import *
+
+from typing import Literal, Optional
+
+from fastapi import APIRouter, Query, Request
+
+from app.utils.response import PreparedJSONResponse
+
+search_router = APIRouter(prefix="/search", tags=["curseforge"])
+
+
+@search_router.get(
+    "",
+    responses={
+        200: {
+            "description": "Curseforge search",
+            "content": {
+                "application/json": {
+                    # "example": {"status": "success", "data": curseforge_search_example}
+                }
+            },
+        }
+    },
+    description="Curseforge 搜索，参数与 Curseforge 的 GET /v1/mods/search 相同，本地索引覆盖时不请求上游",
+)
+async def curseforge_search(
+    request: Request,
+    gameId: int = 432,
+    classId: Optional[int] = None,
+    categoryId: Optional[int] = None,
+    gameVersion: Optional[str] = None,
+    searchFilter: Optional[str] = None,
+    sortField: int = Query(SearchFilter.SortField.POPULARITY.value, ge=1, le=12),
+    sortOrder: Literal["asc", "desc"] = "desc",
+    modLoaderType: Optional[int] = None,
+    gameVersionTypeId: Optional[int] = None,
+    slug: Optional[str] = None,
+    index: int = Query(0, ge=0, le=9999),
+    pageSize: int = Query(50, ge=1, le=50),
+):
+    query = SearchQuery(
+        gameId=gameId,
+        classId=classId,
+        categoryId=categoryId,
+        gameVersion=gameVersion,
+        gameVersionTypeId=gameVersionTypeId,
+        modLoaderType=modLoaderType,
+        slug=slug,
+        searchFilter=searchFilter,
+    )
+    info, trustable = await search_mods(query, sortField, sortOrder, index, pageSize)
+    return PreparedJSONResponse(content=info, trustable=trustable, request=request)
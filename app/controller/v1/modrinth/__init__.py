@@ -0,0 +1,20 @@
+from fastapi import APIRouter
+
+from .project import project_router
+from .version import version_router
+from .version_file import version_file_router
+from .search import search_router
+from .tag import tag_router
+
+modrinth_router = APIRouter(prefix="/modrinth", tags=["modrinth"])
+
+modrinth_router.include_router(project_router)
+modrinth_router.include_router(version_router)
+modrinth_router.include_router(version_file_router)
+modrinth_router.include_router(search_router)
+modrinth_router.include_router(tag_router)
+
+
+@modrinth_router.get("/")
+async def get_modrinth():
+    return {"message": "Modrinth"}
@@ -0,0 +1,65 @@
+from app.service.modrinth import *
+
+from fastapi import APIRouter, Query, Request
+
+from app.utils.response import TrustableResponse, PreparedJSONResponse
+from .utils import parse_ids
+
+project_router = APIRouter(tags=["modrinth"])
+
+
+@project_router.get(
+    "/project/{idslug}",
+    responses={
+        200: {
+            "description": "Modrinth Project info",
+            "content": {
+                "application/json": {
+                    # "example": {"status": "success", "data": modrinth_project_example}
+                }
+            },
+        }
+    },
+    description="Modrinth Project 信息，支持 id 和 slug",
+)
+async def modrinth_project(idslug: str, request: Request):
+    info, trustable = await get_project_info(idslug)
+    return PreparedJSONResponse(content=info, trustable=trustable, request=request)
+
+
+@project_router.get(
+    "/projects",
+    responses={
+        200: {
+            "description": "Modrinth Projects info",
+            "content": {
+                "application/json": {
+                    # "example": {"status": "success", "data": [modrinth_project_example]}
+                }
+            },
+        }
+    },
+    description="批量获取 Modrinth Project 信息，ids 与 Modrinth 的 GET /v2/projects 相同",
+)
+async def modrinth_projects(ids: str = Query(..., description='如 ["AANobbMI","sodium"]')):
+    info, trustable = await get_projects_info(parse_ids(ids))
+    return TrustableResponse(content=info, trustable=trustable)
+
+
+@project_router.get(
+    "/project/{idslug}/version",
+    responses={
+        200: {
+            "description": "Modrinth Project versions info",
+            "content": {
+                "application/json": {
+                    # "example": {"status": "success", "data": [modrinth_version_example]}
+                }
+            },
+        }
+    },
+    description="Modrinth Project 的全部版本，按发布时间倒序",
+)
+async def modrinth_project_versions(idslug: str):
+    info, trustable = await get_project_versions(idslug)
+    return TrustableResponse(content=info, trustable=trustable)
@@ -0,0 +1,42 @@
+from app.service.modrinth import *
+
+from typing import Literal, Optional
+
+from fastapi import APIRouter, HTTPException, Query, Request
+
+from app.sync.modrinth import Facets
+from app.utils.response import PreparedJSONResponse
+
+search_router = APIRouter(prefix="/search", tags=["modrinth"])
+
+
+@search_router.get(
+    "",
+    responses={
+        200: {
+            "description": "Modrinth search",
+            "content": {
+                "application/json": {
+                    # "example": {"status": "success", "data": modrinth_search_example}
+                }
+            },
+        }
+    },
+    description="Modrinth 搜索，参数与 Modrinth 的 GET /v2/search 相同，相同的搜索会短时间缓存",
+)
+async def modrinth_search(
+    request: Request,
+    query: Optional[str] = None,
+    facets: Optional[str] = None,
+    index: Literal["relevance", "downloads", "follows", "newest", "updated"] = "relevance",
+    offset: int = Query(0, ge=0),
+    limit: int = Query(10, ge=0, le=100),
+):
+    try:
+        parsed = Facets.parse(facets) if facets else None
+        if parsed:
+            await validate_facets(parsed)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    info, trustable = await search_projects(query, parsed, index, offset, limit)
+    return PreparedJSONResponse(content=info, trustable=trustable, request=request)
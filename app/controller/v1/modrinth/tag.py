@@ -0,0 +1,25 @@
+from app.service.modrinth import *
+
+from fastapi import APIRouter
+
+from app.utils.response import TrustableResponse
+
+tag_router = APIRouter(prefix="/tag", tags=["modrinth"])
+
+
+@tag_router.get("/category", description="Modrinth 分类标签")
+async def modrinth_categories():
+    info, trustable = await get_tags("category")
+    return TrustableResponse(content=info, trustable=trustable)
+
+
+@tag_router.get("/loader", description="Modrinth 加载器标签")
+async def modrinth_loaders():
+    info, trustable = await get_tags("loader")
+    return TrustableResponse(content=info, trustable=trustable)
+
+
+@tag_router.get("/game_version", description="Modrinth 游戏版本标签")
+async def modrinth_game_versions():
+    info, trustable = await get_tags("game_version")
+    return TrustableResponse(content=info, trustable=trustable)
@@ -0,0 +1,18 @@
+from typing import List
+
+from fastapi import HTTPException
+
+from app.utils.serializer import loads
+
+
+def parse_ids(ids: str) -> List[str]:
+    """
+    解析 Modrinth 风格的 ids 参数，如 `["AANobbMI","P7dR8mSH"]`
+    """
+    try:
+        value = loads(ids)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="ids 必须是 JSON 字符串数组")
+    if not isinstance(value, list) or not all(isinstance(i, str) for i in value):
+        raise HTTPException(status_code=400, detail="ids 必须是 JSON 字符串数组")
+    return value
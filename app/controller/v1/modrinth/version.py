@@ -0,0 +1,46 @@
+from app.service.modrinth import *
+
+from fastapi import APIRouter, Query, Request
+
+from app.utils.response import TrustableResponse, PreparedJSONResponse
+from .utils import parse_ids
+
+version_router = APIRouter(tags=["modrinth"])
+
+
+@version_router.get(
+    "/version/{version_id}",
+    responses={
+        200: {
+            "description": "Modrinth Version info",
+            "content": {
+                "application/json": {
+                    # "example": {"status": "success", "data": modrinth_version_example}
+                }
+            },
+        }
+    },
+    description="Modrinth 版本信息",
+)
+async def modrinth_version(version_id: str, request: Request):
+    info, trustable = await get_version_info(version_id)
+    return PreparedJSONResponse(content=info, trustable=trustable, request=request)
+
+
+@version_router.get(
+    "/versions",
+    responses={
+        200: {
+            "description": "Modrinth Versions info",
+            "content": {
+                "application/json": {
+                    # "example": {"status": "success", "data": [modrinth_version_example]}
+                }
+            },
+        }
+    },
+    description="批量获取 Modrinth 版本信息，ids 与 Modrinth 的 GET /v2/versions 相同",
+)
+async def modrinth_versions(ids: str = Query(..., description='如 ["IIJJKKLL","QQRRSSTT"]')):
+    info, trustable = await get_versions_info(parse_ids(ids))
+    return TrustableResponse(content=info, trustable=trustable)
@@ -0,0 +1,48 @@
+from app.service.modrinth import *
+from app.models.request.modrinth import HashesQuery, UpdateItems
+
+from fastapi import APIRouter
+
+from app.utils.response import TrustableResponse
+
+version_file_router = APIRouter(prefix="/version_files", tags=["modrinth"])
+
+
+@version_file_router.post(
+    "",
+    responses={
+        200: {
+            "description": "Modrinth versions from hashes",
+            "content": {
+                "application/json": {
+                    # "example": {"status": "success", "data": {"<hash>": modrinth_version_example}}
+                }
+            },
+        }
+    },
+    description="按文件 hash 批量获取版本，请求体与 Modrinth 的 POST /v2/version_files 相同",
+)
+async def modrinth_version_files(items: HashesQuery):
+    info, trustable = await get_versions_from_hashes(items.hashes, items.algorithm)
+    return TrustableResponse(content=info, trustable=trustable)
+
+
+@version_file_router.post(
+    "/update",
+    responses={
+        200: {
+            "description": "Modrinth latest versions from hashes",
+            "content": {
+                "application/json": {
+                    # "example": {"status": "success", "data": {"<hash>": modrinth_version_example}}
+                }
+            },
+        }
+    },
+    description="按文件 hash 批量获取符合条件的最新版本，请求体与 Modrinth 的 POST /v2/version_files/update 相同",
+)
+async def modrinth_version_files_update(items: UpdateItems):
+    info, trustable = await get_latest_versions_from_hashes(
+        items.hashes, items.algorithm, items.loaders, items.game_versions
+    )
+    return TrustableResponse(content=info, trustable=trustable)
@@ -0,0 +1,25 @@
+from fastapi import APIRouter
+from fastapi.responses import JSONResponse
+
+from app.utils.breaker import breakers
+from app.utils.metrics import collect
+
+status_router = APIRouter(prefix="/status", tags=["status"])
+
+
+@status_router.get(
+    "/metrics",
+    description="MCIM 进程内统计指标",
+)
+async def metrics():
+    return JSONResponse(content=collect())
+
+
+@status_router.get(
+    "/upstream",
+    description="各上游的熔断器状态，open 时只返回缓存数据",
+)
+async def upstream():
+    return JSONResponse(
+        content={name: breaker.snapshot() for name, breaker in breakers().items()}
+    )
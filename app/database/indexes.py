@@ -0,0 +1,153 @@
+"""
+服务层查询的索引检查
+
+`SERVICE_QUERIES` 列出服务层会执行的每一种查询，索引本身在各个 Document 的 `Settings.indexes` 中声明。
+
+启动时对每个查询执行 `explain()`，发现全表扫描 (COLLSCAN) 时记录日志，
+`MCIMConfig.refuse_collscan` 为 True 时拒绝启动。
+"""
+
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import List, Optional, Tuple, Type
+
+from beanie import Document
+from loguru import logger
+from pymongo import DESCENDING
+
+from app.config import MCIMConfig
+from app.models.database.curseforge import (
+    ModInfo,
+    FileInfo,
+    ModFilesSyncInfo,
+    FingerprintInfo,
+)
+from app.models.database.modrinth import (
+    ProjectInfo,
+    VersionInfo,
+    ProjectVersionsSyncInfo,
+    UnmatchedHashInfo,
+)
+from app.models.database.sync import SyncState
+
+mcim_config = MCIMConfig.load()
+
+
+@dataclass
+class ServiceQuery:
+    name: str
+    document: Type[Document]
+    filter: dict
+    sort: Optional[List[Tuple[str, int]]] = field(default=None)
+
+
+SERVICE_QUERIES: List[ServiceQuery] = [
+    ServiceQuery("mod by modId", ModInfo, {"modId": 238222}),
+    ServiceQuery("mods by modIds", ModInfo, {"modId": {"$in": [238222, 348521]}}),
+    ServiceQuery("mod by slug", ModInfo, {"slug": "jei"}),
+    ServiceQuery("file by modId and fileId", FileInfo, {"modId": 238222, "fileId": 4973456}),
+    ServiceQuery("files by fileIds", FileInfo, {"fileId": {"$in": [4973456, 4973457]}}),
+    ServiceQuery(
+        "files of mod",
+        FileInfo,
+        {"modId": 238222},
+        [("fileDate", DESCENDING), ("fileId", DESCENDING)],
+    ),
+    ServiceQuery(
+        "files of mod by game version and loader",
+        FileInfo,
+        {"modId": 238222, "gameVersions": {"$all": ["1.20.1", "Fabric"]}},
+        [("fileDate", DESCENDING), ("fileId", DESCENDING)],
+    ),
+    ServiceQuery("expired files", FileInfo, {"sync_at": {"$lt": datetime(2024, 1, 1)}}),
+    ServiceQuery("expired mods", ModInfo, {"sync_at": {"$lt": datetime(2024, 1, 1)}}),
+    ServiceQuery("mod files sync by modId", ModFilesSyncInfo, {"modId": 238222}),
+    ServiceQuery(
+        "fingerprints", FingerprintInfo, {"fingerprint": {"$in": [1667027305, 320753275]}}
+    ),
+    ServiceQuery(
+        "modrinth projects by id or slug",
+        ProjectInfo,
+        {"$or": [{"_id": {"$in": ["AANobbMI"]}}, {"slug": {"$in": ["sodium"]}}]},
+    ),
+    ServiceQuery(
+        "modrinth versions of project",
+        VersionInfo,
+        {"project_id": "AANobbMI"},
+        [("date_published", DESCENDING)],
+    ),
+    ServiceQuery("modrinth versions by ids", VersionInfo, {"_id": {"$in": ["pmgeU5yX"]}}),
+    ServiceQuery(
+        "modrinth project versions sync", ProjectVersionsSyncInfo, {"project_id": "AANobbMI"}
+    ),
+    ServiceQuery(
+        "modrinth versions by sha1",
+        VersionInfo,
+        {"files.hashes.sha1": {"$in": ["7647a59c2b37c673948b0a35961eabac3a5eda96"]}},
+    ),
+    ServiceQuery(
+        "modrinth versions by sha512",
+        VersionInfo,
+        {"files.hashes.sha512": {"$in": ["0" * 128]}},
+    ),
+    ServiceQuery(
+        "modrinth latest versions of projects",
+        VersionInfo,
+        {"project_id": {"$in": ["AANobbMI"]}, "loaders": {"$in": ["fabric"]}},
+        [("date_published", DESCENDING)],
+    ),
+    ServiceQuery(
+        "modrinth unmatched hashes",
+        UnmatchedHashInfo,
+        {"hash": {"$in": ["7647a59c2b37c673948b0a35961eabac3a5eda96"]}},
+    ),
+    ServiceQuery("sync state by name", SyncState, {"name": "curseforge_mods"}),
+]
+
+
+def _find_stages(plan, stages: set) -> set:
+    """
+    递归收集执行计划中的全部 stage
+    """
+    if isinstance(plan, dict):
+        if "stage" in plan:
+            stages.add(plan["stage"])
+        for value in plan.values():
+            _find_stages(value, stages)
+    elif isinstance(plan, list):
+        for value in plan:
+            _find_stages(value, stages)
+    return stages
+
+
+async def explain(query: ServiceQuery) -> set:
+    """
+    返回查询的 winningPlan 中出现的 stage
+    """
+    cursor = query.document.get_motor_collection().find(query.filter)
+    if query.sort:
+        cursor = cursor.sort(query.sort)
+    result = await cursor.explain()
+    return _find_stages(result["queryPlanner"]["winningPlan"], set())
+
+
+async def check_query_plans() -> List[ServiceQuery]:
+    """
+    检查 `SERVICE_QUERIES` 的执行计划，返回会全表扫描的查询
+    """
+    collscans = []
+    for query in SERVICE_QUERIES:
+        stages = await explain(query)
+        if "COLLSCAN" in stages:
+            collscans.append(query)
+            logger.error(
+                f"Query '{query.name}' on {query.document.get_collection_name()} "
+                f"uses COLLSCAN: {query.filter} sort={query.sort}"
+            )
+    if collscans and mcim_config.refuse_collscan:
+        raise RuntimeError(
+            f"{len(collscans)} service queries use COLLSCAN, refuse to start"
+        )
+    if not collscans:
+        logger.success("all service queries use indexes")
+    return collscans
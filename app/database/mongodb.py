@@ -12,6 +12,17 @@ import sys
 
 from app.config import MongodbConfig
 from app.models.database.curseforge import ModInfo, FileInfo, ModFilesSyncInfo, FingerprintInfo
+from app.models.database.modrinth import (
+    ProjectInfo,
+    VersionInfo,
+    ProjectVersionsSyncInfo,
+    UnmatchedHashInfo,
+    CategoryInfo,
+    LoaderInfo,
+    GameVersionInfo,
+)
+from app.models.database.sync import SyncState
+from app.database.indexes import check_query_plans
 
 
 mongodb_config = MongodbConfig.load()
@@ -68,10 +79,21 @@ async def start_async_mongodb() -> None:
             ModInfo,
             FileInfo,
             ModFilesSyncInfo,
-            FingerprintInfo
+            FingerprintInfo,
+            ProjectInfo,
+            VersionInfo,
+            ProjectVersionsSyncInfo,
+            UnmatchedHashInfo,
+            CategoryInfo,
+            LoaderInfo,
+            GameVersionInfo,
+            SyncState,
         ],
+        # 允许更新 TTL 等索引参数
+        allow_index_dropping=True,
     )
     logger.success("started mongodb connection")
+    await check_query_plans()
     # except Exception as e:
     #     logger.error(f"Failed to start mongodb. {e}")
     #     sys.exit(1)
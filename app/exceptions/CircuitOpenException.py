@@ -0,0 +1,27 @@
+"""
+上游熔断。
+"""
+
+from .ApiException import ApiException
+
+
+class CircuitOpenException(ApiException):
+    """
+    上游处于熔断状态，请求未发出。
+    """
+
+    def __init__(self, upstream: str, retry_after: float = None):
+        """
+
+        Args:
+            upstream (str):     上游名称。
+
+            retry_after (float, optional):  距离熔断器允许探测的秒数。
+        """
+        super().__init__(upstream)
+        self.upstream = upstream
+        self.retry_after = retry_after
+        self.msg = f"{upstream} 暂时不可用，仅返回缓存数据。"
+
+    def __str__(self):
+        return self.msg
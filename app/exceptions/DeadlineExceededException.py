@@ -0,0 +1,20 @@
+"""
+请求超出时间预算。
+"""
+
+from .ApiException import ApiException
+
+
+class DeadlineExceededException(ApiException):
+    """
+    请求超出时间预算。
+    """
+
+    def __init__(self, msg: str = "请求超出时间预算"):
+        """
+
+        Args:
+            msg (str): 错误消息。
+        """
+        super().__init__(msg)
+        self.msg = msg
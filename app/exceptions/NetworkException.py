@@ -10,16 +10,19 @@ class NetworkException(ApiException):
     网络错误。
     """
 
-    def __init__(self, status: int, msg: str):
+    def __init__(self, status: int, msg: str, retry_after: float = None):
         """
 
         Args:
             status (int):   状态码。
             
             msg (str):      状态消息。
+
+            retry_after (float, optional):  响应头 Retry-After 给出的等待秒数。
         """
         super().__init__(msg)
         self.status = status
+        self.retry_after = retry_after
         self.msg = f"网络错误，状态码：{status} - {msg}。"
 
     def __str__(self):
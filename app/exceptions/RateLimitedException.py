@@ -0,0 +1,27 @@
+"""
+上游限流。
+"""
+
+from .ApiException import ApiException
+
+
+class RateLimitedException(ApiException):
+    """
+    上游配额不足，在允许的等待时间内没有取到令牌。
+    """
+
+    def __init__(self, upstream: str, retry_after: float = None):
+        """
+
+        Args:
+            upstream (str):     上游名称。
+
+            retry_after (float, optional):  建议的重试等待秒数。
+        """
+        super().__init__(upstream)
+        self.upstream = upstream
+        self.retry_after = retry_after
+        self.msg = f"{upstream} 请求过于频繁，请稍后重试。"
+
+    def __str__(self):
+        return self.msg
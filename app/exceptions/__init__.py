@@ -5,3 +5,6 @@ Exceptions
 from .ApiException import *
 from .NetworkException import *
 from .ResponseException import *
+from .DeadlineExceededException import *
+from .RateLimitedException import *
+from .CircuitOpenException import *
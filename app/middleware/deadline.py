@@ -0,0 +1,30 @@
+"""
+请求时间预算中间件
+"""
+
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from app.utils.deadline import request_deadline, set_deadline
+
+
+class DeadlineMiddleware:
+    """
+    为每个 HTTP 请求设置 `budget` 秒的时间预算，上游请求的重试不会超过它
+
+    Args:
+        budget (float): 时间预算，小于等于 0 时不限制
+    """
+
+    def __init__(self, app: ASGIApp, budget: float):
+        self.app = app
+        self.budget = budget
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or self.budget <= 0:
+            await self.app(scope, receive, send)
+            return
+        token = set_deadline(self.budget)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            request_deadline.reset(token)
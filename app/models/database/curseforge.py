@@ -4,8 +4,12 @@ from datetime import datetime
 from pymongo import ASCENDING, IndexModel
 from beanie import Link, Indexed, Document
 
+from app.config import MCIMConfig
 
-expireAfterSeconds = 60
+mcim_config = MCIMConfig.load()
+
+# 硬过期时间，数据过期 (sync_interval) 后仍会保留到这个时间才被删除
+expireAfterSeconds = mcim_config.expire_interval
 
 class FileDependencies(BaseModel):
     modId: int
@@ -181,7 +185,10 @@ class FileInfo(Document):
         indexes = [
             IndexModel([("fileId", 1)], unique=True),
             # IndexModel([("gameId", 1)], unique=False),
-            # IndexModel([("modId", 1)], unique=False),
+            # 列出 Mod 的全部文件并按发布时间分页，也覆盖只按 modId 的查询
+            IndexModel([("modId", 1), ("fileDate", -1), ("fileId", -1)]),
+            # 按游戏版本、加载器筛选 Mod 文件并按发布时间分页
+            IndexModel([("modId", 1), ("gameVersions", 1), ("fileDate", -1)]),
             IndexModel([("sync_at", ASCENDING)], expireAfterSeconds=expireAfterSeconds),  # auto expire
         ]
 
@@ -214,7 +221,9 @@ class ModInfo(Document):
     summary: str
     status: int = None
     downloadCount: int = None
+    isFeatured: Optional[bool] = None
     primaryCategoryId: int = None
+    categories: Optional[List[CategoryInfo]] = None
     classId: int = None
     authors: List[AuthorInfo] = None
     logo: LogoInfo = None
@@ -270,9 +279,17 @@ class FingerprintInfo(Document):
     fingerprint: int
     exist: bool = True
 
+    # 旧数据没有 sync_at，未匹配的会被视为已过期
+    sync_at: Optional[datetime] = None
+
     class Settings:
         name = "fingerprints"
         indexes = [
             IndexModel([("fingerprint", 1)], unique=True),
-            # 永不过期
+            # 匹配到的永不过期，未匹配的 (exist=False) 过期后重新向上游查询
+            IndexModel(
+                [("sync_at", ASCENDING)],
+                expireAfterSeconds=mcim_config.fingerprint_negative_ttl,
+                partialFilterExpression={"exist": False},
+            ),
         ]
\ No newline at end of file
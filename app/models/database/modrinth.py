@@ -0,0 +1,215 @@
+from pydantic import BaseModel, Field, field_serializer
+from typing import List, Optional
+from datetime import datetime
+from pymongo import ASCENDING, DESCENDING, IndexModel
+from beanie import Document
+
+from app.config import MCIMConfig
+
+mcim_config = MCIMConfig.load()
+
+# 硬过期时间，数据过期 (sync_interval) 后仍会保留到这个时间才被删除
+expireAfterSeconds = mcim_config.expire_interval
+
+# Modrinth 的 id 本身就是唯一的字符串，直接作为 _id 使用
+
+
+class DonationUrl(BaseModel):
+    id: Optional[str] = None
+    platform: Optional[str] = None
+    url: Optional[str] = None
+
+
+class License(BaseModel):
+    id: Optional[str] = None
+    name: Optional[str] = None
+    url: Optional[str] = None
+
+
+class GalleryItem(BaseModel):
+    url: str
+    featured: Optional[bool] = None
+    title: Optional[str] = None
+    description: Optional[str] = None
+    created: Optional[str] = None
+    ordering: Optional[int] = None
+
+
+class ProjectInfo(Document):
+    id: str
+    slug: str
+    title: Optional[str] = None
+    description: Optional[str] = None
+    categories: List[str] = []
+    additional_categories: List[str] = []
+    client_side: Optional[str] = None
+    server_side: Optional[str] = None
+    body: Optional[str] = None
+    status: Optional[str] = None
+    requested_status: Optional[str] = None
+    issues_url: Optional[str] = None
+    source_url: Optional[str] = None
+    wiki_url: Optional[str] = None
+    discord_url: Optional[str] = None
+    donation_urls: List[DonationUrl] = []
+    project_type: Optional[str] = None
+    downloads: Optional[int] = None
+    icon_url: Optional[str] = None
+    color: Optional[int] = None
+    thread_id: Optional[str] = None
+    monetization_status: Optional[str] = None
+    team: Optional[str] = None
+    published: Optional[str] = None
+    updated: Optional[str] = None
+    approved: Optional[str] = None
+    queued: Optional[str] = None
+    followers: Optional[int] = None
+    license: Optional[License] = None
+    versions: List[str] = []
+    game_versions: List[str] = []
+    loaders: List[str] = []
+    gallery: List[GalleryItem] = []
+
+    sync_at: datetime = Field(default_factory=datetime.utcnow)
+
+    @field_serializer("sync_at", when_used='json')
+    def serialize_sync_Date(self, value: datetime, _info):
+        return value.strftime("%Y-%m-%dT%H:%M:%SZ")
+
+    class Settings:
+        name = "modrinth_projects"
+        indexes = [
+            IndexModel([("slug", 1)], unique=True),
+            IndexModel([("sync_at", ASCENDING)], expireAfterSeconds=expireAfterSeconds),  # auto expire
+        ]
+
+
+class Dependency(BaseModel):
+    version_id: Optional[str] = None
+    project_id: Optional[str] = None
+    file_name: Optional[str] = None
+    dependency_type: str
+
+
+class FileHashes(BaseModel):
+    sha512: str
+    sha1: str
+
+
+class VersionFile(BaseModel):
+    hashes: FileHashes
+    url: str
+    filename: str
+    primary: bool = False
+    size: Optional[int] = None
+    file_type: Optional[str] = None
+
+
+class VersionInfo(Document):
+    id: str
+    project_id: str
+    name: Optional[str] = None
+    version_number: Optional[str] = None
+    changelog: Optional[str] = None
+    dependencies: List[Dependency] = []
+    game_versions: List[str] = []
+    version_type: Optional[str] = None
+    loaders: List[str] = []
+    featured: Optional[bool] = None
+    status: Optional[str] = None
+    requested_status: Optional[str] = None
+    author_id: Optional[str] = None
+    date_published: str
+    downloads: Optional[int] = None
+    files: List[VersionFile] = []
+
+    sync_at: datetime = Field(default_factory=datetime.utcnow)
+
+    @field_serializer("sync_at", when_used='json')
+    def serialize_sync_Date(self, value: datetime, _info):
+        return value.strftime("%Y-%m-%dT%H:%M:%SZ")
+
+    class Settings:
+        name = "modrinth_versions"
+        indexes = [
+            # 列出项目的全部版本，按发布时间倒序
+            IndexModel([("project_id", 1), ("date_published", DESCENDING)]),
+            # 按文件 hash 查找版本
+            IndexModel([("files.hashes.sha1", 1)]),
+            IndexModel([("files.hashes.sha512", 1)]),
+            IndexModel([("sync_at", ASCENDING)], expireAfterSeconds=expireAfterSeconds),  # auto expire
+        ]
+
+
+class ProjectVersionsSyncInfo(Document):
+    project_id: str
+
+    sync_at: datetime = Field(default_factory=datetime.utcnow)
+
+    class Settings:
+        name = "modrinth_project_versions_sync"
+        indexes = [
+            IndexModel([("project_id", 1)], unique=True),
+            IndexModel([("sync_at", ASCENDING)], expireAfterSeconds=expireAfterSeconds),  # auto expire
+        ]
+
+
+class UnmatchedHashInfo(Document):
+    hash: str
+    algorithm: str
+
+    sync_at: datetime = Field(default_factory=datetime.utcnow)
+
+    class Settings:
+        name = "modrinth_unmatched_hashes"
+        indexes = [
+            IndexModel([("hash", 1)], unique=True),
+            # 未匹配的 hash 过期后重新向上游查询
+            IndexModel(
+                [("sync_at", ASCENDING)], expireAfterSeconds=mcim_config.hash_negative_ttl
+            ),
+        ]
+
+
+class CategoryInfo(Document):
+    name: str
+    project_type: str
+    icon: Optional[str] = None
+    header: Optional[str] = None
+
+    sync_at: datetime = Field(default_factory=datetime.utcnow)
+
+    class Settings:
+        name = "modrinth_categories"
+        indexes = [
+            IndexModel([("name", 1), ("project_type", 1)], unique=True),
+        ]
+
+
+class LoaderInfo(Document):
+    name: str
+    icon: Optional[str] = None
+    supported_project_types: List[str] = []
+
+    sync_at: datetime = Field(default_factory=datetime.utcnow)
+
+    class Settings:
+        name = "modrinth_loaders"
+        indexes = [
+            IndexModel([("name", 1)], unique=True),
+        ]
+
+
+class GameVersionInfo(Document):
+    version: str
+    version_type: Optional[str] = None
+    date: Optional[str] = None
+    major: Optional[bool] = None
+
+    sync_at: datetime = Field(default_factory=datetime.utcnow)
+
+    class Settings:
+        name = "modrinth_game_versions"
+        indexes = [
+            IndexModel([("version", 1)], unique=True),
+        ]
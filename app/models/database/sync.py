@@ -0,0 +1,25 @@
+from pydantic import Field
+from typing import List, Optional
+from datetime import datetime
+from pymongo import IndexModel
+from beanie import Document
+
+
+class SyncState(Document):
+    """
+    增量同步的水位线，进程重启后从这里继续
+    """
+
+    name: str
+    # 已同步到的最新修改时间
+    watermark: Optional[datetime] = None
+    # 修改时间恰好等于水位线、已经同步过的 id，避免下次重复同步
+    watermark_ids: List[int] = []
+
+    sync_at: datetime = Field(default_factory=datetime.utcnow)
+
+    class Settings:
+        name = "sync_state"
+        indexes = [
+            IndexModel([("name", 1)], unique=True),
+        ]
@@ -2,4 +2,12 @@ from pydantic import Field, BaseModel
 from typing import List
 
 class Fingerprints(BaseModel):
-    fingerprints: List[int]
\ No newline at end of file
+    fingerprints: List[int]
+
+
+class ModIds(BaseModel):
+    modIds: List[int]
+
+
+class FileIds(BaseModel):
+    fileIds: List[int]
@@ -0,0 +1,12 @@
+from pydantic import Field, BaseModel
+from typing import List, Literal, Optional
+
+
+class HashesQuery(BaseModel):
+    hashes: List[str]
+    algorithm: Literal["sha1", "sha512"] = "sha1"
+
+
+class UpdateItems(HashesQuery):
+    loaders: Optional[List[str]] = None
+    game_versions: Optional[List[str]] = None
@@ -1,7 +1,22 @@
-from typing import List, Optional, Union
-from beanie import BulkWriter
+import asyncio
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from typing import (
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    List,
+    Optional,
+    Tuple,
+    Type,
+    Union,
+)
+from datetime import datetime, timedelta
+from beanie import Document
+from beanie.odm.operators.update.general import Set
+from beanie.odm.utils.dump import get_dict
+from pymongo import DESCENDING, ReplaceOne
 
-from app.sync.curseforge import CurseForgeApi
+from app.sync.curseforge import CurseForgeApi, SearchFilter
 from app.models.database.curseforge import (
     ModInfo,
     FileInfo,
@@ -9,37 +24,222 @@ from app.models.database.curseforge import (
     PaginationInfo,
     FingerprintInfo,
 )
-from app.models.response.curseforge import FingerprintResp, FingerprintMatch
-
+from app.models.response.curseforge import FingerprintResp
+from app.utils.singleflight import SingleFlight
+from app.utils.network.network import get_breaker
+from app.exceptions import ApiException, CircuitOpenException
+from app.utils.cache import LRUCache, SearchCache
+from app.utils.fingerprint import FingerprintIndex
+from app.utils.scheduler import RefreshScheduler
+from app.utils.search import SEARCH_FIELDS, SORTABLE_FIELDS, SearchIndex, SearchQuery
+from app.utils.log import logger
+from app.utils.metrics import counter, gauge
+from app.utils.response import PreparedJSON
+from app.utils.serializer import dumps
+from app.config import MCIMConfig
+
+mcim_config = MCIMConfig.load()
 
 api = CurseForgeApi
 
+# 合并同一资源的并发缓存未命中，只向上游请求并写库一次
+mod_flight = SingleFlight("curseforge_mod")
+file_flight = SingleFlight("curseforge_file")
+mod_files_flight = SingleFlight("curseforge_mod_files")
+fingerprints_flight = SingleFlight("curseforge_fingerprints")
+mods_flight = SingleFlight("curseforge_mods")
+files_flight = SingleFlight("curseforge_files")
+search_flight = SingleFlight("curseforge_search")
+
+# 上游熔断时只返回缓存数据，不再发起后台刷新
+breaker = get_breaker("curseforge")
+
+# 指纹查询结果: hit 已匹配, miss 未匹配 (负缓存), unknown 需要请求上游
+fingerprint_lookups = counter("curseforge_fingerprint_lookups")
+
+# 批量接口的缓存命中: 累计命中/未命中数、最近一批的命中率，以及按命中率分段的批次数
+batch_hits = counter("curseforge_batch_hits")
+batch_misses = counter("curseforge_batch_misses")
+batch_hit_ratio = gauge("curseforge_batch_hit_ratio")
+batch_hit_ratio_buckets = counter("curseforge_batch_hit_ratio_buckets")
+
+# 全部指纹的内存索引，开启 fingerprint_index 后在启动时加载
+fingerprint_index = FingerprintIndex("curseforge")
+
+# 全部 Mod 的内存搜索索引，开启 search_index 后在启动时加载
+search_index = SearchIndex(
+    "curseforge",
+    coverage=mcim_config.search_coverage,
+    total_ttl=mcim_config.sync_interval,
+)
 
-async def _save_FileInfo(file: dict):
-    find_result = await FileInfo.find_one(FileInfo.fileId == file["fileId"])
-    if find_result:
-        find_result = await find_result.delete()
-    return await FileInfo(**file).insert()
+# 搜索结果的 modId，命中时从热点缓存或数据库组装
+search_cache = SearchCache(
+    "curseforge",
+    max_entries=mcim_config.search_cache_max_entries,
+    ttl=mcim_config.search_cache_ttl,
+)
 
+# 搜索请求: local 由本地索引返回, upstream 请求上游
+search_lookups = counter("curseforge_search_lookups")
 
-async def _save_many_FileInfo(files: List[dict]):
-    await FileInfo.find(
-        {"fileId": {"$in": [file["fileId"] for file in files]}}
-    ).delete()
-    res = [FileInfo(**file) for file in files]
-    await FileInfo.insert_many(res)
+# 热点 Mod / File 序列化后的响应体缓存，只缓存未过期的数据，条目最迟在数据过期时失效
+hot_cache = LRUCache(
+    "curseforge", max_bytes=mcim_config.cache_max_bytes, ttl=mcim_config.cache_ttl
+)
 
+# 按访问热度主动刷新 Mod / File，开启 refresh_scheduler 后在启动时运行
+scheduler = RefreshScheduler(
+    "curseforge",
+    {
+        "mod": lambda modids: _refresh_scheduled_mods(modids),
+        "file": lambda fileids: _refresh_scheduled_files(fileids),
+    },
+    base_interval=mcim_config.sync_interval,
+    min_interval=mcim_config.refresh_min_interval,
+    max_interval=mcim_config.refresh_max_interval,
+    half_life=mcim_config.refresh_half_life,
+    workers=mcim_config.refresh_workers,
+    batch_size=min(mcim_config.refresh_batch_size, mcim_config.curseforge_batch_chunk_size),
+)
 
-async def _save_ModInfo(mod: dict):
-    find_result = await ModInfo.find_one(ModInfo.modId == mod["modId"])
-    latestFiles = []
-    for file in mod["latestFiles"]:
-        latestFiles.append(await _save_FileInfo(file))
-    mod_model = ModInfo(**mod)
-    mod_model.latestFiles = latestFiles
-    if find_result:
-        find_result = find_result.delete()
-    return await mod_model.insert()
+
+def _refresh(flight: SingleFlight, key, func) -> None:
+    """
+    后台刷新过期数据，上游熔断时跳过，由熔断恢复后的请求重新触发
+    """
+    if breaker.available():
+        flight.spawn(key, func)
+
+
+def _schedule_key(document: Document) -> Optional[tuple]:
+    """
+    文档在刷新调度中的 (kind, key)
+    """
+    if isinstance(document, ModInfo):
+        return ("mod", document.modId)
+    if isinstance(document, FileInfo):
+        return ("file", document.fileId)
+    return None
+
+
+def _fresh_seconds(sync_at: datetime, key: Optional[tuple] = None) -> float:
+    """
+    距离数据过期还剩的秒数，给出调度 key 时按该条目的刷新间隔计算
+    """
+    interval = scheduler.interval(*key) if key else mcim_config.sync_interval
+    return interval - (datetime.utcnow() - sync_at).total_seconds()
+
+
+def _is_fresh(sync_at: datetime, key: Optional[tuple] = None) -> bool:
+    """
+    数据是否在刷新间隔内同步过，过期的数据仍会返回，但需要后台刷新
+    """
+    return _fresh_seconds(sync_at, key) > 0
+
+
+def _prepare(key: tuple, document: Document) -> PreparedJSON:
+    """
+    序列化文档，未过期的放入热点缓存
+    """
+    body = PreparedJSON.dump(_dump(document))
+    hot_cache.set(key, body, ttl=_fresh_seconds(document.sync_at, _schedule_key(document)))
+    return body
+
+
+def _is_negative_fresh(sync_at: Optional[datetime]) -> bool:
+    """
+    未匹配的指纹是否仍在 fingerprint_negative_ttl 内
+    """
+    return sync_at is not None and datetime.utcnow() - sync_at < timedelta(
+        seconds=mcim_config.fingerprint_negative_ttl
+    )
+
+
+def _dump(document: Document) -> dict:
+    """
+    转换为可以直接 JSON 序列化的 dict，去掉 MongoDB 内部字段
+    """
+    data = document.model_dump(mode="json", exclude={"id", "revision_id"})
+    for file in data.get("latestFiles") or []:
+        file.pop("id", None)
+        file.pop("revision_id", None)
+    return data
+
+
+async def _save_many_FileInfo(files: List[dict]) -> List[FileInfo]:
+    """
+    批量 upsert 文件，返回与 `files` 顺序一致、带有 `_id` 的 FileInfo
+
+    一次 bulk_write，已存在的文件再用一次查询取回 `_id`，供 ModInfo.latestFiles 引用。
+    """
+    models = {}
+    for file in files:
+        models[file["fileId"]] = FileInfo(**file)
+    if not models:
+        return []
+
+    collection = FileInfo.get_motor_collection()
+    result = await collection.bulk_write(
+        [
+            ReplaceOne(
+                {"fileId": fileid}, get_dict(model, to_db=True), upsert=True
+            )
+            for fileid, model in models.items()
+        ],
+        ordered=True,
+    )
+    fileids = list(models.keys())
+    for index, _id in result.upserted_ids.items():
+        models[fileids[index]].id = _id
+    replaced = [fileid for fileid, model in models.items() if model.id is None]
+    if replaced:
+        async for doc in collection.find(
+            {"fileId": {"$in": replaced}}, {"_id": 1, "fileId": 1}
+        ):
+            models[doc["fileId"]].id = doc["_id"]
+
+    for model in models.values():
+        hot_cache.delete(("file", model.modId, model.fileId))
+    return [models[file["fileId"]] for file in files]
+
+
+async def _save_FileInfo(file: dict) -> FileInfo:
+    return (await _save_many_FileInfo([file]))[0]
+
+
+async def _save_many_ModInfo(mods: List[dict]) -> List[ModInfo]:
+    """
+    批量 upsert Mod 及其 latestFiles，每批固定两到三次数据库往返
+    """
+    files = await _save_many_FileInfo(
+        [file for mod in mods for file in mod["latestFiles"]]
+    )
+    models = []
+    for mod in mods:
+        model = ModInfo(**mod)
+        model.latestFiles = files[: len(mod["latestFiles"])]
+        files = files[len(mod["latestFiles"]) :]
+        models.append(model)
+    if not models:
+        return []
+
+    await ModInfo.get_motor_collection().bulk_write(
+        [
+            ReplaceOne({"modId": model.modId}, get_dict(model, to_db=True), upsert=True)
+            for model in models
+        ],
+        ordered=True,
+    )
+    for model in models:
+        hot_cache.delete(("mod", model.modId))
+        if search_index.enabled:
+            search_index.add(model.model_dump(include=SEARCH_FIELDS))
+    return models
+
+
+async def _save_ModInfo(mod: dict) -> ModInfo:
+    return (await _save_many_ModInfo([mod]))[0]
 
 
 def _alias_fileid(file: dict) -> dict:
@@ -59,86 +259,317 @@ def _alias_modid(mod: dict) -> dict:
     return mod
 
 
-async def get_mod_info(modid: int) -> dict:
+async def _sync_mod(modid: int) -> PreparedJSON:
+    mod = await api.get_mod(modid)
+    model = await _save_ModInfo(_alias_modid(mod["data"]))
+    return _prepare(("mod", modid), model)
+
+
+async def get_mod_info(modid: int) -> Tuple[PreparedJSON, bool]:
+    """
+    返回 (Mod 信息, 是否可信)，过期数据会直接返回并在后台刷新
+    """
+    body = hot_cache.get(("mod", modid))
+    if body is not None:
+        scheduler.touch("mod", modid)
+        return body, True
     res = await ModInfo.find_one({"modId": modid}, fetch_links=True)
     if res:
-        return res.model_dump()
+        scheduler.touch("mod", modid, res.sync_at)
+        body = _prepare(("mod", modid), res)
+        trustable = _is_fresh(res.sync_at, ("mod", modid))
+        if not trustable:
+            _refresh(mod_flight, modid, lambda: _sync_mod(modid))
+        return body, trustable
     else:
-        mod = await api.get_mod(modid)
-        await _save_ModInfo(_alias_modid(mod["data"]))
-        return ModInfo(**mod["data"]).model_dump()
+        body = await mod_flight.do(modid, lambda: _sync_mod(modid))
+        scheduler.touch("mod", modid, datetime.utcnow())
+        return body, True
+
+
+async def _sync_mods(modids: List[int]) -> List[ModInfo]:
+    mods = await api.get_mods(modids)
+    return await _save_many_ModInfo([_alias_modid(mod) for mod in mods["data"]])
+
+
+async def _fetch_in_chunks(
+    flight: SingleFlight, sync: Callable[[List[int]], Awaitable[list]], ids: List[int]
+) -> Tuple[list, bool]:
+    """
+    把 ids 分块并发请求上游，每块单独合并并发请求
+
+    返回 (取到的数据, 是否全部成功)，某一块失败 (包括熔断) 时保留其他块的结果。
+    """
+    size = mcim_config.curseforge_batch_chunk_size
+    chunks = [sorted(ids[i : i + size]) for i in range(0, len(ids), size)]
+    results = await asyncio.gather(
+        *[flight.do(tuple(chunk), lambda chunk=chunk: sync(chunk)) for chunk in chunks],
+        return_exceptions=True,
+    )
+    items = []
+    complete = True
+    for chunk, result in zip(chunks, results):
+        if isinstance(result, ApiException):
+            logger.warning(f"{flight.name} {chunk[0]}..{chunk[-1]} 拉取失败: {result}")
+            complete = False
+        elif isinstance(result, BaseException):
+            raise result
+        else:
+            items.extend(result)
+    return items, complete
+
+
+async def _get_batch(
+    kind: str,
+    document: Type[Document],
+    field: str,
+    ids: List[int],
+    flight: SingleFlight,
+    sync: Callable[[List[int]], Awaitable[list]],
+    fetch_links: bool = False,
+) -> Tuple[list, bool]:
+    """
+    批量获取，一次 $in 查询，只向上游请求数据库中没有的 id
+
+    过期的数据在后台刷新，结果按请求顺序排列并去重，上游也没有的 id 不出现在结果中。
+    """
+    ids = list(dict.fromkeys(ids))
+    docs = {
+        getattr(doc, field): doc
+        for doc in await document.find(
+            {field: {"$in": ids}}, fetch_links=fetch_links
+        ).to_list()
+    }
+    missing = [i for i in ids if i not in docs]
+    _record_batch(kind, len(ids), len(ids) - len(missing))
+
+    expired = sorted(
+        i for i, doc in docs.items() if not _is_fresh(doc.sync_at, _schedule_key(doc))
+    )
+    if expired:
+        _refresh(flight, tuple(expired), lambda: sync(expired))
+    trustable = not expired
+    if missing:
+        fetched, complete = await _fetch_in_chunks(flight, sync, missing)
+        trustable = trustable and complete
+        for doc in fetched:
+            docs[getattr(doc, field)] = doc
+    for doc in docs.values():
+        scheduler.touch(*_schedule_key(doc), doc.sync_at)
+    return [_dump(docs[i]) for i in ids if i in docs], trustable
+
+
+def _record_batch(kind: str, total: int, hits: int) -> None:
+    batch_hits.inc(kind, hits)
+    batch_misses.inc(kind, total - hits)
+    if total:
+        ratio = hits / total
+        batch_hit_ratio.set(round(ratio, 4), kind)
+        bucket = "1" if ratio == 1 else f"{int(ratio * 4) / 4:.2f}"
+        batch_hit_ratio_buckets.inc(f"{kind}:{bucket}")
+
+
+async def refresh_mods(modids: List[int]) -> Tuple[List[ModInfo], bool]:
+    """
+    从上游分块重新拉取并保存 Mod，返回 (保存的 Mod, 是否全部成功)
+    """
+    return await _fetch_in_chunks(mods_flight, _sync_mods, modids)
+
+
+async def get_mods_info(modids: List[int]) -> Tuple[list, bool]:
+    """
+    批量获取 Mod 信息
+    """
+    return await _get_batch(
+        "mods", ModInfo, "modId", modids, mods_flight, _sync_mods, fetch_links=True
+    )
+
+
+async def _sync_file(modid: int, fileid: int) -> PreparedJSON:
+    file = await api.get_file(modid, fileid)
+    model = await _save_FileInfo(_alias_fileid(file["data"]))
+    return _prepare(("file", modid, fileid), model)
+
+
+async def get_file_info(modid: int, fileid: int) -> Tuple[PreparedJSON, bool]:
+    body = hot_cache.get(("file", modid, fileid))
+    if body is not None:
+        scheduler.touch("file", fileid)
+        return body, True
+    res = await FileInfo.find_one({"modId": modid, "fileId": fileid})
+    if res:
+        scheduler.touch("file", fileid, res.sync_at)
+        body = _prepare(("file", modid, fileid), res)
+        trustable = _is_fresh(res.sync_at, ("file", fileid))
+        if not trustable:
+            _refresh(file_flight, (modid, fileid), lambda: _sync_file(modid, fileid))
+        return body, trustable
+    else:
+        body = await file_flight.do((modid, fileid), lambda: _sync_file(modid, fileid))
+        scheduler.touch("file", fileid, datetime.utcnow())
+        return body, True
 
 
-async def get_mods_info(modids: List[int]) -> dict:
-    db_results = await ModInfo.find(
-        {"modId": {"$in": modids}}, fetch_links=True
-    ).to_list()
+async def _sync_files(fileids: List[int]) -> List[FileInfo]:
+    files = await api.post_files(fileids)
+    return await _save_many_FileInfo([_alias_fileid(file) for file in files["data"]])
 
-    if len(db_results) == len(modids):
-        return [mod.model_dump() for mod in db_results]
-    else:
-        mods = await api.get_mods(modids)
-        for mod in mods["data"]:
-            await _save_ModInfo(_alias_modid(mod))
-        return mods["data"]
 
+async def get_files_info(fileids: List[int]) -> Tuple[list, bool]:
+    """
+    批量获取文件信息
+    """
+    return await _get_batch("files", FileInfo, "fileId", fileids, files_flight, _sync_files)
 
-async def get_file_info(modid: int, fileid: int) -> dict:
-    res = await FileInfo.find_one({"modId": modid, "fileId": fileid})
-    if res:
-        return res.model_dump()
-    else:
-        file = await api.get_file(modid, fileid)
-        await _save_FileInfo(_alias_fileid(file["data"]))
-        return file["data"]
 
+async def _refresh_scheduled_mods(modids: List[int]) -> dict:
+    """
+    刷新调度到期的 Mod，返回 {modId: dateModified}
+    """
+    key = tuple(sorted(modids))
+    models = await mods_flight.do(key, lambda: _sync_mods(list(key)))
+    return {model.modId: model.dateModified for model in models}
 
-async def get_files_info(fileids: List[int]) -> dict:
-    db_results = await FileInfo.find({"fileId": {"$in": fileids}}).to_list()
 
-    if len(db_results) == len(fileids):
-        return [file.model_dump() for file in db_results]
-    else:
-        files = await api.post_files(fileids)
-        for file in files["data"]:
-            await _save_FileInfo(_alias_fileid(file))
-        return files["data"]
+async def _refresh_scheduled_files(fileids: List[int]) -> dict:
+    """
+    刷新调度到期的 File，返回 {fileId: 状态和发布时间}，文件内容发布后基本不变
+    """
+    key = tuple(sorted(fileids))
+    models = await files_flight.do(key, lambda: _sync_files(list(key)))
+    return {model.fileId: f"{model.fileStatus}:{model.fileDate}" for model in models}
 
 
 async def _sync_mod_files(modid: int):
-    async with BulkWriter() as bulk_writer:
-        files = await api.get_files(modid, ps=50)
-        page = PaginationInfo(**files["pagination"])
-        # index 递增
-        while page.index < page.totalCount - 1:
-            info = await api.get_files(
-                modid, ps=page.pageSize, index=page.index + page.pageSize
-            )
-            page = PaginationInfo(**info["pagination"])
-            files["data"].extend(info["data"])
-        files["data"].extend(
-            (
-                await api.get_files(
-                    modid, ps=page.pageSize, index=page.index + page.pageSize
-                )
-            )["data"]
-        )
-        await _save_many_FileInfo([_alias_fileid(file) for file in files["data"]])
-        await ModFilesSyncInfo(modId=modid).insert()
-    return files["data"]
-
-
-async def get_mod_files_info(modid: int) -> dict:
-    # 这里需要一个 mod_files sync_at 记录上次所有文件的同步时间，初学 mongodb，我也不清楚应该咋做这个过期逻辑比较好...
-    res = await ModFilesSyncInfo.find_one({"modId": modid})
-    if res:
-        res = await FileInfo.find({"modId": modid}).to_list()
-        if res:
-            return [file.model_dump() for file in res]
-        else:
-            return await _sync_mod_files(modid)
-    else:
-        return await _sync_mod_files(modid)
+    page_size = 50
+    first = await api.get_files(modid, ps=page_size)
+    page = PaginationInfo(**first["pagination"])
+    files = first["data"]
+
+    # 按第一页的 totalCount 并发拉取剩余页
+    semaphore = asyncio.Semaphore(mcim_config.curseforge_files_concurrency)
+
+    async def fetch_page(index: int) -> list:
+        async with semaphore:
+            return (await api.get_files(modid, ps=page_size, index=index))["data"]
+
+    pages = await asyncio.gather(
+        *[
+            fetch_page(index)
+            for index in range(len(files), page.totalCount, page_size)
+        ]
+    )
+    for data in pages:
+        files.extend(data)
+
+    # 分页期间有新文件发布时可能重复，按 fileId 去重
+    files = list({file["id"]: file for file in files}.values())
+    await _save_many_FileInfo([_alias_fileid(file) for file in files])
+    await ModFilesSyncInfo.find_one({"modId": modid}).upsert(
+        Set({ModFilesSyncInfo.sync_at: datetime.utcnow()}),
+        on_insert=ModFilesSyncInfo(modId=modid),
+    )
+    return files
+
+
+async def _ensure_mod_files(modid: int) -> bool:
+    """
+    确保 Mod 的全部文件已经同步过，返回数据是否可信
+
+    ModFilesSyncInfo 记录上次同步该 Mod 全部文件的时间，过期时在后台重新同步。
+    """
+    sync_info = await ModFilesSyncInfo.find_one({"modId": modid})
+    if sync_info:
+        trustable = _is_fresh(sync_info.sync_at)
+        if not trustable:
+            _refresh(mod_files_flight, modid, lambda: _sync_mod_files(modid))
+        return trustable
+    await mod_files_flight.do(modid, lambda: _sync_mod_files(modid))
+    return True
+
+
+def _mod_files_query(
+    modid: int, game_version: Optional[str], modloader_type: Optional[int]
+) -> dict:
+    query = {"modId": modid}
+    # CurseForge 把加载器名称也放在 gameVersions 中
+    tags = []
+    if game_version:
+        tags.append(game_version)
+    if modloader_type:
+        tags.append(SearchFilter.ModLoaderType(modloader_type).name)
+    if len(tags) == 1:
+        query["gameVersions"] = tags[0]
+    elif tags:
+        query["gameVersions"] = {"$all": tags}
+    return query
+
+
+_mod_files_sort = [("fileDate", DESCENDING), ("fileId", DESCENDING)]
+
+
+async def get_mod_files_info(
+    modid: int, game_version: str = None, modloader_type: int = None
+) -> Tuple[AsyncIterator[dict], bool]:
+    """
+    返回 (按发布时间倒序逐个产出文件信息的异步迭代器, 是否可信)，不会一次性加载全部文件
+    """
+    query = _mod_files_query(modid, game_version, modloader_type)
+    trustable = await _ensure_mod_files(modid)
+
+    async def iterate():
+        async for file in FileInfo.find(query).sort(_mod_files_sort):
+            yield _dump(file)
+
+    return iterate(), trustable
+
+
+def _encode_cursor(file: FileInfo) -> str:
+    return urlsafe_b64encode(f"{file.fileDate}|{file.fileId}".encode()).decode()
+
+
+def _decode_cursor(cursor: str) -> Tuple[str, int]:
+    try:
+        file_date, fileid = urlsafe_b64decode(cursor.encode()).decode().rsplit("|", 1)
+        return file_date, int(fileid)
+    except (ValueError, UnicodeDecodeError):
+        raise ValueError(f"Invalid cursor: {cursor}")
+
+
+async def get_mod_files_page(
+    modid: int,
+    game_version: str = None,
+    modloader_type: int = None,
+    page_size: int = 50,
+    cursor: str = None,
+) -> Tuple[dict, bool]:
+    """
+    游标分页获取 Mod 文件，按发布时间倒序
+
+    `cursor` 为上一页返回的 `nextCursor`，无效时抛出 ValueError。
+    """
+    query = _mod_files_query(modid, game_version, modloader_type)
+    if cursor:
+        file_date, fileid = _decode_cursor(cursor)
+        query["$or"] = [
+            {"fileDate": {"$lt": file_date}},
+            {"fileDate": file_date, "fileId": {"$lt": fileid}},
+        ]
+    trustable = await _ensure_mod_files(modid)
+    # 多取一条判断是否还有下一页，最后一页满页时不再返回指向空页的游标
+    files = (
+        await FileInfo.find(query).sort(_mod_files_sort).limit(page_size + 1).to_list()
+    )
+    more = len(files) > page_size
+    files = files[:page_size]
+    return {
+        "data": [_dump(file) for file in files],
+        "pagination": {
+            "pageSize": page_size,
+            "resultCount": len(files),
+            "nextCursor": _encode_cursor(files[-1]) if more else None,
+        },
+    }, trustable
 
 
 async def _sync_fingerprints(fingerprints: List[int]) -> dict:
@@ -151,57 +582,364 @@ async def _sync_fingerprints(fingerprints: List[int]) -> dict:
                 exist=False,
             )
         )
-    if info["data"]["exactFingerprints"]:
-        for exactMatch in info["data"]["exactMatches"]:
-            update_model.append(
-                FingerprintInfo(
-                    fingerprint=exactMatch["file"]["fileFingerprint"],
-                    modId=exactMatch["id"],
-                    fileId=exactMatch["file"]["id"],
-                    exist=True,
+    files = []
+    for exactMatch in info["data"]["exactMatches"]:
+        update_model.append(
+            FingerprintInfo(
+                fingerprint=exactMatch["file"]["fileFingerprint"],
+                modId=exactMatch["id"],
+                fileId=exactMatch["file"]["id"],
+                exist=True,
+            )
+        )
+        files.append(_alias_fileid(exactMatch["file"]))
+        files.extend(_alias_fileid(file) for file in exactMatch["latestFiles"])
+
+    sync_at = datetime.utcnow()
+    if update_model:
+        await FingerprintInfo.get_motor_collection().bulk_write(
+            [
+                ReplaceOne(
+                    {"fingerprint": model.fingerprint},
+                    get_dict(model.model_copy(update={"sync_at": sync_at}), to_db=True),
+                    upsert=True,
                 )
+                for model in update_model
+            ],
+            ordered=False,
+        )
+        for model in update_model:
+            fingerprint_index.add(model.fingerprint, model.modId, model.fileId, sync_at)
+    await _save_many_FileInfo(files)
+
+    # 匹配结果中没有 Mod 本身的信息，后台补全，之后的请求才能直接命中
+    modids = {exactMatch["id"] for exactMatch in info["data"]["exactMatches"]}
+    if modids:
+        async for mod in ModInfo.get_motor_collection().find(
+            {"modId": {"$in": list(modids)}}, {"modId": 1}
+        ):
+            modids.discard(mod["modId"])
+    if modids:
+        missing = sorted(modids)
+        _refresh(mods_flight, tuple(missing), lambda: _sync_mods(missing))
+
+    return info["data"]
+
+
+async def load_fingerprint_index() -> None:
+    """
+    从数据库加载全部指纹到内存索引
+    """
+
+    async def entries():
+        async for info in FingerprintInfo.get_motor_collection().find(
+            {}, {"_id": 0, "fingerprint": 1, "modId": 1, "fileId": 1, "exist": 1, "sync_at": 1}
+        ):
+            exist = info.get("exist", True)
+            yield (
+                info["fingerprint"],
+                info.get("modId") if exist else None,
+                info.get("fileId") if exist else None,
+                info.get("sync_at"),
             )
 
-    await FingerprintInfo.find(
-        {"fingerprint": {"$in": fingerprints}}
-    ).delete()
+    await fingerprint_index.load(entries())
 
-    await FingerprintInfo.insert_many(update_model)
 
-    return info["data"]
+async def get_fingerprints(fingerprints: List[int]) -> Tuple[dict, bool]:
+    """
+    匹配文件指纹
 
+    请求的指纹分为三类:
 
-async def get_fingerprints(fingerprints: List[int]) -> dict:
-    find_result = await FingerprintInfo.find_many(
-        {"fingerprint": {"$in": fingerprints}}
-    ).to_list()
+    - 已匹配: 用一次文件查询和一次 Mod 查询在内存中组装
+    - 未匹配: 在 fingerprint_negative_ttl 内直接返回未匹配
+    - 未知: 未缓存、未匹配已过期、或对应文件、Mod 已被删除，分块请求上游
+
+    开启 fingerprint_index 时匹配过程只查内存索引，不在索引中的才查数据库。
+    """
+    if fingerprint_index.loaded:
+        known = fingerprint_index.lookup(fingerprints)
+        missing = [fingerprint for fingerprint in fingerprints if fingerprint not in known]
+    else:
+        known = {}
+        missing = fingerprints
+    # 索引中没有的指纹可能由其他进程写入，回落到数据库查询
+    if missing:
+        for info in await FingerprintInfo.find(
+            {"fingerprint": {"$in": missing}}
+        ).to_list():
+            known[info.fingerprint] = info
+            fingerprint_index.add(info.fingerprint, info.modId, info.fileId, info.sync_at)
+    matched = [info for info in known.values() if info.exist]
+    files = {}
+    mods = {}
+    if matched:
+        files = {
+            file.fileId: file
+            for file in await FileInfo.find(
+                {"fileId": {"$in": [info.fileId for info in matched]}}
+            ).to_list()
+        }
+        mods = {
+            mod.modId: mod
+            for mod in await ModInfo.find(
+                {"modId": {"$in": list({info.modId for info in matched})}},
+                fetch_links=True,
+            ).to_list()
+        }
 
     exactMatches = []
-    unmatchedFingerprints = []
     exactFingerprints = []
+    unmatchedFingerprints = []
+    unknown = []
+    latest_files = {}
+    expired_mods = set()
+    expired_files = set()
+    for fingerprint in dict.fromkeys(fingerprints):
+        info = known.get(fingerprint)
+        if info is None:
+            unknown.append(fingerprint)
+            continue
+        if not info.exist:
+            if _is_negative_fresh(info.sync_at):
+                fingerprint_lookups.inc("miss")
+                unmatchedFingerprints.append(fingerprint)
+            else:
+                unknown.append(fingerprint)
+            continue
+        file = files.get(info.fileId)
+        mod = mods.get(info.modId)
+        if file is None or mod is None:
+            unknown.append(fingerprint)
+            continue
+        scheduler.touch("file", file.fileId, file.sync_at)
+        scheduler.touch("mod", mod.modId, mod.sync_at)
+        if not _is_fresh(file.sync_at, ("file", file.fileId)):
+            expired_files.add(file.fileId)
+        if not _is_fresh(mod.sync_at, ("mod", mod.modId)):
+            expired_mods.add(mod.modId)
+        if mod.modId not in latest_files:
+            latest_files[mod.modId] = _dump(mod)["latestFiles"]
+        exactMatches.append(
+            {"id": mod.modId, "file": _dump(file), "latestFiles": latest_files[mod.modId]}
+        )
+        exactFingerprints.append(fingerprint)
+        fingerprint_lookups.inc("hit")
+
+    if expired_mods:
+        key = tuple(sorted(expired_mods))
+        _refresh(mods_flight, key, lambda: _sync_mods(list(key)))
+    if expired_files:
+        key = tuple(sorted(expired_files))
+        _refresh(files_flight, key, lambda: _sync_files(list(key)))
+
+    degraded = False
+    if unknown:
+        fingerprint_lookups.inc("unknown", len(unknown))
+        # 分块并发查询上游，每块单独合并并发请求
+        size = mcim_config.curseforge_fingerprints_chunk_size
+        chunks = [sorted(unknown[i : i + size]) for i in range(0, len(unknown), size)]
+        results = await asyncio.gather(
+            *[
+                fingerprints_flight.do(
+                    tuple(chunk), lambda chunk=chunk: _sync_fingerprints(chunk)
+                )
+                for chunk in chunks
+            ],
+            return_exceptions=True,
+        )
+        exact = set()
+        for info in results:
+            if isinstance(info, CircuitOpenException):
+                # 熔断时这些指纹按未匹配返回，但不写入缓存，结果标记为不可信
+                degraded = True
+                continue
+            if isinstance(info, BaseException):
+                raise info
+            exactMatches.extend(info["exactMatches"])
+            exactFingerprints.extend(info["exactFingerprints"])
+            exact.update(info["exactFingerprints"])
+        unmatchedFingerprints.extend(
+            fingerprint for fingerprint in unknown if fingerprint not in exact
+        )
 
-    # 是否有结果
-    if find_result:
-        if len(find_result) == len(fingerprints):  # 全匹配
-            for fingerprint in find_result:
-                if fingerprint.exist:
-                    mod = await get_mod_info(modid=fingerprint.modId)
-                    file = await get_file_info(fingerprint.modId, fingerprint.fileId)
-                    exactMatches.append(
-                        FingerprintMatch(
-                            id=fingerprint.fingerprint,
-                            file=file,
-                            latestFiles=mod["latestFiles"],
-                        )
-                    )
-                    exactFingerprints.append(fingerprint.fingerprint)
-                else:
-                    unmatchedFingerprints.append(fingerprint.fingerprint)
-            return FingerprintResp(
-                exactMatches=exactMatches,
-                exactFingerprints=exactFingerprints,
-                installedFingerprints=fingerprints,
-                unmatchedFingerprints=unmatchedFingerprints,
-            ).model_dump()
-
-    return await _sync_fingerprints(fingerprints)
+    return (
+        FingerprintResp(
+            exactMatches=exactMatches,
+            exactFingerprints=exactFingerprints,
+            installedFingerprints=fingerprints,
+            unmatchedFingerprints=unmatchedFingerprints,
+        ).model_dump(),
+        not expired_mods and not expired_files and not degraded,
+    )
+
+
+async def load_search_index() -> None:
+    """
+    从数据库加载全部 Mod 到内存搜索索引
+    """
+
+    async def mods():
+        async for mod in ModInfo.get_motor_collection().find(
+            {}, {"_id": 0, **{field: 1 for field in SEARCH_FIELDS}}
+        ):
+            yield mod
+
+    await search_index.load(mods())
+
+
+async def _sync_search(
+    query: SearchQuery, sort_field: int, sort_order: str, index: int, page_size: int
+) -> Tuple[List[int], dict]:
+    """
+    向上游搜索，结果批量写库并更新索引，记录这组条件的结果数
+
+    返回 (这一页的 modId, pagination)，Mod 本身放进热点缓存。
+    """
+    res = await api.search(
+        searchfilter=query.searchFilter,
+        slug=query.slug,
+        gameid=query.gameId,
+        classid=query.classId,
+        categoryid=query.categoryId,
+        modloader_type=query.modLoaderType,
+        sort_field=sort_field,
+        sort_order=sort_order,
+        game_version=query.gameVersion,
+        game_version_typeid=query.gameVersionTypeId,
+        index=index,
+        pagesize=page_size,
+    )
+    models = await _save_many_ModInfo([_alias_modid(mod) for mod in res["data"]])
+    for model in models:
+        _prepare(("mod", model.modId), model)
+    search_index.record_total(query, res["pagination"]["totalCount"])
+    return [model.modId for model in models], res["pagination"]
+
+
+def _search_local(
+    query: SearchQuery,
+    sort_field: int,
+    sort_order: str,
+    index: int,
+    page_size: int,
+    degraded: bool = False,
+) -> Optional[Tuple[List[int], dict]]:
+    """
+    本地索引覆盖这组条件时返回 (这一页的 modId, pagination)，否则返回 None
+
+    degraded 为 True 时 (上游熔断) 不检查覆盖率。
+    """
+    if not search_index.loaded or sort_field not in SORTABLE_FIELDS:
+        return None
+    # 没有可信的上游结果数时一定不覆盖，不必在索引中查找
+    if not degraded and not query.slug and search_index.total(query) is None:
+        return None
+    page, total = search_index.page(query, sort_field, sort_order, index, page_size)
+    if not degraded and not search_index.covers(query, total):
+        return None
+    return page, PaginationInfo(
+        index=index,
+        pageSize=page_size,
+        resultCount=len(page),
+        totalCount=total,
+    ).model_dump()
+
+
+async def _hydrate_mods(modids: List[int]) -> Optional[Tuple[List[PreparedJSON], bool]]:
+    """
+    按顺序取出 Mod 序列化后的响应体，先查热点缓存，其余一次 $in 查询
+
+    有 Mod 已被删除时返回 None，过期的 Mod 在后台刷新。
+    """
+    bodies = {}
+    for modid in modids:
+        body = hot_cache.get(("mod", modid))
+        if body is not None:
+            bodies[modid] = body
+    missing = [modid for modid in modids if modid not in bodies]
+    expired = []
+    if missing:
+        docs = await ModInfo.find({"modId": {"$in": missing}}, fetch_links=True).to_list()
+        if len(docs) < len(missing):
+            return None
+        for doc in docs:
+            bodies[doc.modId] = _prepare(("mod", doc.modId), doc)
+            if not _is_fresh(doc.sync_at, ("mod", doc.modId)):
+                expired.append(doc.modId)
+    if expired:
+        expired.sort()
+        _refresh(mods_flight, tuple(expired), lambda: _sync_mods(expired))
+    return [bodies[modid] for modid in modids], not expired
+
+
+def _search_body(bodies: List[PreparedJSON], pagination: dict) -> PreparedJSON:
+    """
+    用已序列化的 Mod 拼出与上游相同的 {"data", "pagination"}
+    """
+    return PreparedJSON(
+        b'{"data":['
+        + b",".join(body.body for body in bodies)
+        + b'],"pagination":'
+        + dumps(pagination)
+        + b"}"
+    )
+
+
+async def search_mods(
+    query: SearchQuery,
+    sort_field: int = SearchFilter.SortField.POPULARITY.value,
+    sort_order: str = SearchFilter.SortOrder.DESC.value,
+    index: int = 0,
+    page_size: int = 50,
+) -> Tuple[PreparedJSON, bool]:
+    """
+    搜索 Mod，返回与上游相同的 {"data", "pagination"}
+
+    - 同样的规范化参数在 search_cache_ttl 内只缓存结果的 modId，命中时从 Mod 缓存组装
+    - 本地索引的命中数达到上游对同一组条件的结果数的 search_coverage 时直接从本地返回
+    - 否则合并并发的相同请求后请求上游，结果写库并更新索引
+    """
+    key = (query.canonical(), sort_field, sort_order, index, page_size)
+    cached = search_cache.get(key, SearchFilter.SortField(sort_field).name)
+    if cached is not None:
+        modids, pagination = cached
+        page = await _hydrate_mods(modids)
+        if page is not None:
+            return _search_body(page[0], pagination), page[1]
+        search_cache.delete(key)
+
+    degraded = False
+    result = _search_local(query, sort_field, sort_order, index, page_size)
+    if result is not None:
+        search_lookups.inc("local")
+    else:
+        search_lookups.inc("upstream")
+        try:
+            result = await search_flight.do(
+                key, lambda: _sync_search(query, sort_field, sort_order, index, page_size)
+            )
+        except CircuitOpenException:
+            # 熔断时用本地索引中能找到的部分代替
+            result = _search_local(
+                query, sort_field, sort_order, index, page_size, degraded=True
+            )
+            if result is None:
+                raise
+            search_lookups.inc("degraded")
+            degraded = True
+
+    modids, pagination = result
+    page = await _hydrate_mods(modids)
+    if page is None:
+        # 本地索引中的 Mod 已被 TTL 删除，重新向上游搜索
+        modids, pagination = await search_flight.do(
+            key, lambda: _sync_search(query, sort_field, sort_order, index, page_size)
+        )
+        page = await _hydrate_mods(modids)
+        if page is None:
+            raise ApiException(f"search {key} 结果中的 Mod 已被删除")
+    if not degraded:
+        search_cache.set(key, (modids, pagination))
+    return _search_body(page[0], pagination), page[1] and not degraded
@@ -0,0 +1,680 @@
+import asyncio
+import time
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple, Type
+from datetime import datetime
+from beanie import Document
+from beanie.odm.operators.update.general import Set
+from beanie.odm.utils.dump import get_dict
+from pymongo import DESCENDING, ReplaceOne
+
+from app.sync.modrinth import Facets, ModrinthApi
+from app.models.database.modrinth import (
+    ProjectInfo,
+    VersionInfo,
+    ProjectVersionsSyncInfo,
+    UnmatchedHashInfo,
+    CategoryInfo,
+    LoaderInfo,
+    GameVersionInfo,
+)
+from app.utils.singleflight import SingleFlight
+from app.utils.network.network import get_breaker
+from app.exceptions import ApiException
+from app.utils.cache import LRUCache, SearchCache
+from app.utils.log import logger
+from app.utils.scheduler import RefreshScheduler
+from app.utils.response import PreparedJSON
+from app.config import MCIMConfig
+
+mcim_config = MCIMConfig.load()
+
+api = ModrinthApi()
+
+# 合并同一资源的并发缓存未命中，只向上游请求并写库一次
+project_flight = SingleFlight("modrinth_project")
+projects_flight = SingleFlight("modrinth_projects")
+project_versions_flight = SingleFlight("modrinth_project_versions")
+version_flight = SingleFlight("modrinth_version")
+versions_flight = SingleFlight("modrinth_versions")
+tags_flight = SingleFlight("modrinth_tags")
+hashes_flight = SingleFlight("modrinth_hashes")
+hashes_update_flight = SingleFlight("modrinth_hashes_update")
+search_flight = SingleFlight("modrinth_search")
+
+# 上游熔断时只返回缓存数据，不再发起后台刷新
+breaker = get_breaker("modrinth")
+
+# 搜索结果缓存，Modrinth 的搜索结果是 Project 的摘要，与 ProjectInfo 字段不同，直接缓存响应体
+search_cache = SearchCache(
+    "modrinth",
+    max_entries=mcim_config.search_cache_max_entries,
+    ttl=mcim_config.search_cache_ttl,
+)
+
+# 热点 Project / Version 序列化后的响应体缓存，只缓存未过期的数据，条目最迟在数据过期时失效
+hot_cache = LRUCache(
+    "modrinth", max_bytes=mcim_config.cache_max_bytes, ttl=mcim_config.cache_ttl
+)
+
+# 按访问热度主动刷新 Project，开启 refresh_scheduler 后在启动时运行
+scheduler = RefreshScheduler(
+    "modrinth",
+    {"project": lambda project_ids: _refresh_scheduled_projects(project_ids)},
+    base_interval=mcim_config.sync_interval,
+    min_interval=mcim_config.refresh_min_interval,
+    max_interval=mcim_config.refresh_max_interval,
+    half_life=mcim_config.refresh_half_life,
+    workers=mcim_config.refresh_workers,
+    batch_size=mcim_config.refresh_batch_size,
+)
+
+# 热点缓存中按 slug 请求的 Project 对应的 id，命中热点缓存时据此记录访问
+slug_ids: Dict[str, str] = {}
+
+
+def _refresh(flight: SingleFlight, key, func) -> None:
+    """
+    后台刷新过期数据，上游熔断时跳过，由熔断恢复后的请求重新触发
+    """
+    if breaker.available():
+        flight.spawn(key, func)
+
+
+def _schedule_key(document: Document) -> Optional[tuple]:
+    """
+    文档在刷新调度中的 (kind, key)
+    """
+    if isinstance(document, ProjectInfo):
+        return ("project", document.id)
+    return None
+
+
+def _fresh_seconds(sync_at: datetime, key: Optional[tuple] = None) -> float:
+    """
+    距离数据过期还剩的秒数，给出调度 key 时按该条目的刷新间隔计算
+    """
+    interval = scheduler.interval(*key) if key else mcim_config.sync_interval
+    return interval - (datetime.utcnow() - sync_at).total_seconds()
+
+
+def _is_fresh(sync_at: datetime, key: Optional[tuple] = None) -> bool:
+    """
+    数据是否在刷新间隔内同步过，过期的数据仍会返回，但需要后台刷新
+    """
+    return _fresh_seconds(sync_at, key) > 0
+
+
+def _dump(document: Document) -> dict:
+    """
+    转换为可以直接 JSON 序列化的 dict，Project 和 Version 的 id 即 Modrinth 的 id
+    """
+    exclude = {"revision_id"}
+    if not isinstance(document.id, str):
+        exclude.add("id")
+    return document.model_dump(mode="json", exclude=exclude)
+
+
+def _prepare(key: tuple, document: Document) -> PreparedJSON:
+    """
+    序列化文档，未过期的放入热点缓存
+    """
+    body = PreparedJSON.dump(_dump(document))
+    hot_cache.set(key, body, ttl=_fresh_seconds(document.sync_at, _schedule_key(document)))
+    return body
+
+
+async def _save_many(document: Type[Document], items: List[dict]) -> list:
+    """
+    按 _id 批量 upsert，返回与 `items` 顺序一致的文档
+    """
+    models = [document(**item) for item in items]
+    if not models:
+        return []
+    await document.get_motor_collection().bulk_write(
+        [
+            ReplaceOne({"_id": model.id}, get_dict(model, to_db=True), upsert=True)
+            for model in models
+        ],
+        ordered=False,
+    )
+    return models
+
+
+async def _save_many_ProjectInfo(projects: List[dict]) -> List[ProjectInfo]:
+    models = await _save_many(ProjectInfo, projects)
+    for model in models:
+        hot_cache.delete(("project", model.id))
+        hot_cache.delete(("project", model.slug))
+    return models
+
+
+async def _save_many_VersionInfo(versions: List[dict]) -> List[VersionInfo]:
+    models = await _save_many(VersionInfo, versions)
+    for model in models:
+        hot_cache.delete(("version", model.id))
+    return models
+
+
+async def _fetch_in_chunks(
+    flight: SingleFlight, sync: Callable[[List[str]], Awaitable[list]], ids: List[str]
+) -> Tuple[list, bool]:
+    """
+    把 ids 分块并发请求上游，每块单独合并并发请求
+
+    返回 (取到的数据, 是否全部成功)，某一块失败 (包括熔断) 时保留其他块的结果。
+    """
+    size = mcim_config.modrinth_batch_chunk_size
+    chunks = [sorted(ids[i : i + size]) for i in range(0, len(ids), size)]
+    results = await asyncio.gather(
+        *[flight.do(tuple(chunk), lambda chunk=chunk: sync(chunk)) for chunk in chunks],
+        return_exceptions=True,
+    )
+    items = []
+    complete = True
+    for chunk, result in zip(chunks, results):
+        if isinstance(result, ApiException):
+            logger.warning(f"{flight.name} {chunk[0]}..{chunk[-1]} 拉取失败: {result}")
+            complete = False
+        elif isinstance(result, BaseException):
+            raise result
+        else:
+            items.extend(result)
+    return items, complete
+
+
+def _project_filter(idslugs: List[str]) -> dict:
+    """
+    Modrinth 的接口同时接受 id 和 slug
+    """
+    return {"$or": [{"_id": {"$in": idslugs}}, {"slug": {"$in": idslugs}}]}
+
+
+async def _sync_project(idslug: str) -> PreparedJSON:
+    project = await api.get_project(project_id=idslug)
+    model = (await _save_many_ProjectInfo([project]))[0]
+    return _prepare(("project", idslug), model)
+
+
+async def get_project_info(idslug: str) -> Tuple[PreparedJSON, bool]:
+    """
+    返回 (Project 信息, 是否可信)，过期数据会直接返回并在后台刷新
+    """
+    body = hot_cache.get(("project", idslug))
+    if body is not None:
+        scheduler.touch("project", slug_ids.get(idslug, idslug))
+        return body, True
+    res = await ProjectInfo.find_one(_project_filter([idslug]))
+    if res:
+        _touch_project(idslug, res)
+        body = _prepare(("project", idslug), res)
+        trustable = _is_fresh(res.sync_at, ("project", res.id))
+        if not trustable:
+            _refresh(project_flight, idslug, lambda: _sync_project(idslug))
+        return body, trustable
+    else:
+        # 首次访问不记录，id 要等写库后才知道，下次访问时再开始统计
+        return await project_flight.do(idslug, lambda: _sync_project(idslug)), True
+
+
+def _touch_project(idslug: str, project: ProjectInfo) -> None:
+    """
+    记录一次对 Project 的访问，按 slug 请求时记下对应的 id
+    """
+    if not scheduler.enabled:
+        return
+    if idslug != project.id:
+        if len(slug_ids) >= scheduler.max_items:
+            slug_ids.clear()
+        slug_ids[idslug] = project.id
+    scheduler.touch("project", project.id, project.sync_at)
+
+
+async def _sync_projects(idslugs: List[str]) -> List[ProjectInfo]:
+    projects = await api.get_projects(idslugs)
+    return await _save_many_ProjectInfo(projects)
+
+
+async def get_projects_info(idslugs: List[str]) -> Tuple[list, bool]:
+    """
+    批量获取 Project 信息，一次查询，只向上游请求数据库中没有的 Project
+
+    结果按请求顺序排列并去重，上游也没有的不出现在结果中。
+    """
+    idslugs = list(dict.fromkeys(idslugs))
+    docs: Dict[str, ProjectInfo] = {}
+    for doc in await ProjectInfo.find(_project_filter(idslugs)).to_list():
+        docs[doc.id] = docs[doc.slug] = doc
+    missing = [i for i in idslugs if i not in docs]
+
+    expired = sorted(
+        {doc.id for doc in docs.values() if not _is_fresh(doc.sync_at, ("project", doc.id))}
+    )
+    if expired:
+        _refresh(projects_flight, tuple(expired), lambda: _sync_projects(expired))
+    trustable = not expired
+    if missing:
+        fetched, complete = await _fetch_in_chunks(projects_flight, _sync_projects, missing)
+        trustable = trustable and complete
+        for doc in fetched:
+            docs[doc.id] = docs[doc.slug] = doc
+    for doc in {doc.id: doc for doc in docs.values()}.values():
+        scheduler.touch("project", doc.id, doc.sync_at)
+
+    result = {}
+    for i in idslugs:
+        if i in docs:
+            result.setdefault(docs[i].id, docs[i])
+    return [_dump(doc) for doc in result.values()], trustable
+
+
+async def _refresh_scheduled_projects(project_ids: List[str]) -> dict:
+    """
+    刷新调度到期的 Project，返回 {id: updated}
+    """
+    key = tuple(sorted(project_ids))
+    models = await projects_flight.do(key, lambda: _sync_projects(list(key)))
+    return {model.id: model.updated for model in models}
+
+
+async def _sync_project_versions(project_id: str) -> List[VersionInfo]:
+    versions = await api.get_project_versions(project_id=project_id)
+    models = await _save_many_VersionInfo(versions)
+    await ProjectVersionsSyncInfo.find_one({"project_id": project_id}).upsert(
+        Set({ProjectVersionsSyncInfo.sync_at: datetime.utcnow()}),
+        on_insert=ProjectVersionsSyncInfo(project_id=project_id),
+    )
+    return models
+
+
+async def get_project_versions(idslug: str) -> Tuple[list, bool]:
+    """
+    返回 Project 的全部版本，按发布时间倒序
+
+    ProjectVersionsSyncInfo 记录上次同步全部版本的时间，过期时在后台重新同步。
+    """
+    project = await ProjectInfo.find_one(_project_filter([idslug]))
+    if project is None:
+        await project_flight.do(idslug, lambda: _sync_project(idslug))
+        project = await ProjectInfo.find_one(_project_filter([idslug]))
+    project_id = project.id
+
+    sync_info = await ProjectVersionsSyncInfo.find_one({"project_id": project_id})
+    if sync_info:
+        trustable = _is_fresh(sync_info.sync_at)
+        if not trustable:
+            _refresh(
+                project_versions_flight,
+                project_id,
+                lambda: _sync_project_versions(project_id),
+            )
+    else:
+        await project_versions_flight.do(
+            project_id, lambda: _sync_project_versions(project_id)
+        )
+        trustable = True
+    versions = (
+        await VersionInfo.find({"project_id": project_id})
+        .sort([("date_published", DESCENDING)])
+        .to_list()
+    )
+    return [_dump(version) for version in versions], trustable
+
+
+async def _sync_version(version_id: str) -> PreparedJSON:
+    version = await api.get_project_version(version_id)
+    model = (await _save_many_VersionInfo([version]))[0]
+    return _prepare(("version", version_id), model)
+
+
+async def get_version_info(version_id: str) -> Tuple[PreparedJSON, bool]:
+    body = hot_cache.get(("version", version_id))
+    if body is not None:
+        return body, True
+    res = await VersionInfo.find_one({"_id": version_id})
+    if res:
+        body = _prepare(("version", version_id), res)
+        trustable = _is_fresh(res.sync_at)
+        if not trustable:
+            _refresh(version_flight, version_id, lambda: _sync_version(version_id))
+        return body, trustable
+    else:
+        return await version_flight.do(version_id, lambda: _sync_version(version_id)), True
+
+
+async def _sync_versions(version_ids: List[str]) -> List[VersionInfo]:
+    versions = await api.get_project_version_list(version_ids)
+    return await _save_many_VersionInfo(versions)
+
+
+async def get_versions_info(version_ids: List[str]) -> Tuple[list, bool]:
+    """
+    批量获取版本信息，一次 $in 查询，只向上游请求数据库中没有的版本
+    """
+    version_ids = list(dict.fromkeys(version_ids))
+    docs = {
+        doc.id: doc
+        for doc in await VersionInfo.find({"_id": {"$in": version_ids}}).to_list()
+    }
+    missing = [i for i in version_ids if i not in docs]
+
+    expired = sorted(i for i, doc in docs.items() if not _is_fresh(doc.sync_at))
+    if expired:
+        _refresh(versions_flight, tuple(expired), lambda: _sync_versions(expired))
+    trustable = not expired
+    if missing:
+        fetched, complete = await _fetch_in_chunks(versions_flight, _sync_versions, missing)
+        trustable = trustable and complete
+        for doc in fetched:
+            docs[doc.id] = doc
+    return [_dump(docs[i]) for i in version_ids if i in docs], trustable
+
+
+def _versions_by_hash(
+    versions: List[VersionInfo], hashes: List[str], algorithm: str
+) -> Dict[str, VersionInfo]:
+    wanted = set(hashes)
+    result = {}
+    for version in versions:
+        for file in version.files:
+            value = getattr(file.hashes, algorithm)
+            if value in wanted:
+                result.setdefault(value, version)
+    return result
+
+
+async def _sync_hashes(hashes: List[str], algorithm: str) -> Dict[str, VersionInfo]:
+    """
+    向上游查询 hash 对应的版本，保存版本并记录未匹配的 hash
+    """
+    data = await api.get_version_from_hashes(hashes, algorithm)
+    models = await _save_many_VersionInfo(list({v["id"]: v for v in data.values()}.values()))
+    by_id = {model.id: model for model in models}
+    result = {value: by_id[version["id"]] for value, version in data.items()}
+
+    unmatched = [value for value in hashes if value not in result]
+    if unmatched:
+        sync_at = datetime.utcnow()
+        await UnmatchedHashInfo.get_motor_collection().bulk_write(
+            [
+                ReplaceOne(
+                    {"hash": value},
+                    get_dict(
+                        UnmatchedHashInfo(hash=value, algorithm=algorithm, sync_at=sync_at),
+                        to_db=True,
+                    ),
+                    upsert=True,
+                )
+                for value in unmatched
+            ],
+            ordered=False,
+        )
+    return result
+
+
+async def _find_hashes(
+    hashes: List[str], algorithm: str
+) -> Tuple[Dict[str, VersionInfo], List[str]]:
+    """
+    在本地查找 hash 对应的版本，返回 (找到的版本, 本地没有且不在负缓存中的 hash)
+    """
+    field = f"files.hashes.{algorithm}"
+    found = _versions_by_hash(
+        await VersionInfo.find({field: {"$in": hashes}}).to_list(), hashes, algorithm
+    )
+    missing = [value for value in hashes if value not in found]
+    if missing:
+        async for info in UnmatchedHashInfo.get_motor_collection().find(
+            {"hash": {"$in": missing}}, {"hash": 1}
+        ):
+            missing.remove(info["hash"])
+    return found, missing
+
+
+async def _get_versions_from_hashes(
+    hashes: List[str], algorithm: str
+) -> Tuple[Dict[str, VersionInfo], bool]:
+    """
+    按文件 hash 查找版本，未知的 hash 合并为一次上游请求，未匹配的 hash 在 hash_negative_ttl 内不再查询
+    """
+    hashes = list(dict.fromkeys(hashes))
+    found, missing = await _find_hashes(hashes, algorithm)
+
+    expired = sorted({v.id for v in found.values() if not _is_fresh(v.sync_at)})
+    if expired:
+        _refresh(versions_flight, tuple(expired), lambda: _sync_versions(expired))
+    trustable = not expired
+    if missing:
+        key = (algorithm, *sorted(missing))
+        try:
+            found.update(
+                await hashes_flight.do(key, lambda: _sync_hashes(missing, algorithm))
+            )
+        except ApiException as e:
+            # 上游失败 (包括熔断) 时只返回已缓存的部分，未知的 hash 不写入负缓存
+            logger.warning(f"{hashes_flight.name} 拉取失败: {e}")
+            trustable = False
+    return found, trustable
+
+
+async def get_versions_from_hashes(hashes: List[str], algorithm: str) -> Tuple[dict, bool]:
+    """
+    与 Modrinth 的 POST /v2/version_files 相同，返回 {hash: 版本}
+    """
+    found, trustable = await _get_versions_from_hashes(hashes, algorithm)
+    return {value: _dump(version) for value, version in found.items()}, trustable
+
+
+async def _sync_hashes_update(
+    hashes: List[str],
+    algorithm: str,
+    loaders: Optional[List[str]],
+    game_versions: Optional[List[str]],
+) -> Dict[str, VersionInfo]:
+    data = await api.get_latest_version_from_hashes(
+        hashes, algorithm, loaders=loaders, game_versions=game_versions
+    )
+    models = await _save_many_VersionInfo(list({v["id"]: v for v in data.values()}.values()))
+    by_id = {model.id: model for model in models}
+    return {value: by_id[version["id"]] for value, version in data.items()}
+
+
+async def get_latest_versions_from_hashes(
+    hashes: List[str],
+    algorithm: str,
+    loaders: Optional[List[str]] = None,
+    game_versions: Optional[List[str]] = None,
+) -> Tuple[dict, bool]:
+    """
+    与 Modrinth 的 POST /v2/version_files/update 相同，返回 {hash: 符合条件的最新版本}
+
+    已同步过全部版本的 Project 直接在本地筛选；其余 hash，包括本地没有的，直接合并为一次
+    /version_files/update 请求，本地已知但未同步全部版本的 Project 在后台同步。
+    """
+    hashes = list(dict.fromkeys(hashes))
+    # 只用来确定 hash 所属的 Project，版本的 project_id 不会变化，不需要检查是否过期
+    current, unknown = await _find_hashes(hashes, algorithm)
+    trustable = True
+    project_ids = list({version.project_id for version in current.values()})
+    synced = {
+        info.project_id: info
+        for info in await ProjectVersionsSyncInfo.find(
+            {"project_id": {"$in": project_ids}}
+        ).to_list()
+    }
+
+    latest: Dict[str, VersionInfo] = {}
+    if synced:
+        query = {"project_id": {"$in": list(synced)}}
+        if loaders:
+            query["loaders"] = {"$in": loaders}
+        if game_versions:
+            query["game_versions"] = {"$in": game_versions}
+        async for version in VersionInfo.find(query).sort([("date_published", DESCENDING)]):
+            latest.setdefault(version.project_id, version)
+        expired = [i for i, info in synced.items() if not _is_fresh(info.sync_at)]
+        for project_id in expired:
+            _refresh(
+                project_versions_flight,
+                project_id,
+                lambda project_id=project_id: _sync_project_versions(project_id),
+            )
+        trustable = trustable and not expired
+
+    result = {}
+    remote = list(unknown)
+    for value, version in current.items():
+        if version.project_id in synced:
+            if version.project_id in latest:
+                result[value] = latest[version.project_id]
+        else:
+            remote.append(value)
+    for project_id in {version.project_id for version in current.values()} - set(synced):
+        _refresh(
+            project_versions_flight,
+            project_id,
+            lambda project_id=project_id: _sync_project_versions(project_id),
+        )
+    if remote:
+        key = (
+            algorithm,
+            tuple(sorted(remote)),
+            tuple(sorted(loaders or [])),
+            tuple(sorted(game_versions or [])),
+        )
+        try:
+            result.update(
+                await hashes_update_flight.do(
+                    key,
+                    lambda: _sync_hashes_update(remote, algorithm, loaders, game_versions),
+                )
+            )
+        except ApiException as e:
+            logger.warning(f"{hashes_update_flight.name} 拉取失败: {e}")
+            trustable = False
+    return {value: _dump(result[value]) for value in hashes if value in result}, trustable
+
+
+# 标签: (文档, 上游接口, 唯一键)
+TAGS: Dict[str, Tuple[Type[Document], Callable[[], Awaitable[list]], Tuple[str, ...]]] = {
+    "category": (CategoryInfo, api.get_categories, ("name", "project_type")),
+    "loader": (LoaderInfo, api.get_loaders, ("name",)),
+    "game_version": (GameVersionInfo, api.get_game_versions, ("version",)),
+}
+
+
+async def _sync_tags(tag: str) -> list:
+    """
+    用上游的完整列表替换本地标签，上游已删除的标签一并删除
+    """
+    document, fetch, keys = TAGS[tag]
+    items = await fetch()
+    sync_at = datetime.utcnow()
+    models = [document(**item, sync_at=sync_at) for item in items]
+    collection = document.get_motor_collection()
+    if models:
+        await collection.bulk_write(
+            [
+                ReplaceOne(
+                    {key: getattr(model, key) for key in keys},
+                    get_dict(model, to_db=True),
+                    upsert=True,
+                )
+                for model in models
+            ],
+            ordered=False,
+        )
+    await collection.delete_many({"sync_at": {"$lt": sync_at}})
+    return [_dump(model) for model in models]
+
+
+async def get_tags(tag: str) -> Tuple[list, bool]:
+    """
+    返回 category / loader / game_version 标签列表
+    """
+    document = TAGS[tag][0]
+    docs = await document.find().to_list()
+    if not docs:
+        return await tags_flight.do(tag, lambda: _sync_tags(tag)), True
+    trustable = all(_is_fresh(doc.sync_at) for doc in docs)
+    if not trustable:
+        _refresh(tags_flight, tag, lambda: _sync_tags(tag))
+    return [_dump(doc) for doc in docs], trustable
+
+
+# facets 校验用的标签取值: facet 字段 -> (过期时间, 取值)
+_facet_values: Dict[str, Tuple[float, set[str]]] = {}
+
+
+async def _tag_values(key: str) -> Optional[set[str]]:
+    """
+    facet 字段允许的取值，来自缓存的标签列表，标签不可用时返回 None (不校验)
+    """
+    item = _facet_values.get(key)
+    if item is not None and item[0] > time.monotonic():
+        return item[1]
+    try:
+        if key == "versions":
+            values = {tag["version"] for tag in (await get_tags("game_version"))[0]}
+        else:
+            categories = (await get_tags("category"))[0]
+            loaders = (await get_tags("loader"))[0]
+            if key == "categories":
+                values = {tag["name"] for tag in categories + loaders}
+            else:
+                values = {tag["project_type"] for tag in categories} | {
+                    project_type
+                    for tag in loaders
+                    for project_type in tag["supported_project_types"]
+                }
+    except ApiException as e:
+        logger.warning(f"无法获取 {key} 的标签，跳过 facets 校验: {e}")
+        return None
+    values = {value.lower() for value in values} if key != "versions" else values
+    if values:
+        _facet_values[key] = (time.monotonic() + mcim_config.sync_interval, values)
+    return values or None
+
+
+async def validate_facets(facets: Facets) -> None:
+    """
+    检查 categories / versions / project_type 的取值是否在缓存的标签列表中，不在时抛出 ValueError
+    """
+    for facet in facets.facets():
+        if facet.key in ("categories", "versions", "project_type"):
+            values = await _tag_values(facet.key)
+            if values is not None and facet.value not in values:
+                raise ValueError(f"未知的 {facet.key}: {facet.value!r}")
+
+
+async def _sync_search(
+    query: Optional[str], facets: Optional[Facets], index: str, offset: int, limit: int
+) -> PreparedJSON:
+    res = await api.search(
+        query=query, limit=limit, offset=offset, index=index, facets=facets
+    )
+    return PreparedJSON.dump(res)
+
+
+async def search_projects(
+    query: Optional[str] = None,
+    facets: Optional[Facets] = None,
+    index: str = "relevance",
+    offset: int = 0,
+    limit: int = 10,
+) -> Tuple[PreparedJSON, bool]:
+    """
+    搜索 Project，返回与上游相同的 {"hits", "offset", "limit", "total_hits"}
+
+    同样的参数在 search_cache_ttl 内直接返回缓存，并发的相同请求只请求上游一次。
+    facets 使用规范形式作为缓存键，逻辑相同的 facets 共享缓存和上游请求。
+    """
+    query = (query or "").strip() or None
+    facets = facets or None
+    key = (query, facets.key() if facets else None, index, offset, limit)
+    body = search_cache.get(key, index)
+    if body is None:
+        body = await search_flight.do(
+            key, lambda: _sync_search(query, facets, index, offset, limit)
+        )
+        search_cache.set(key, body)
+    return body, True
@@ -0,0 +1,202 @@
+"""
+CurseForge 的增量同步
+
+按 dateModified 倒序翻页搜索，直到遇到上次的水位线，只批量刷新这之间修改过的 Mod。
+水位线保存在 MongoDB 的 sync_state 中，重启后从上次的位置继续。
+
+单独运行: `python -m app.sync.changefeed`
+"""
+
+import asyncio
+import re
+from datetime import datetime, timedelta
+from typing import List, Optional, Tuple
+
+from beanie.odm.operators.update.general import Set
+
+from app.config import MCIMConfig
+from app.exceptions import ApiException
+from app.models.database.sync import SyncState
+from app.service.curseforge import refresh_mods
+from app.sync.curseforge import CurseForgeApi, SearchFilter
+from app.utils.log import logger
+from app.utils.metrics import counter, gauge
+
+__all__ = ["CurseForgeChangeFeed"]
+
+mcim_config = MCIMConfig.load()
+
+changefeed_mods = counter("changefeed_mods")
+changefeed_runs = counter("changefeed_runs")
+changefeed_lag = gauge("changefeed_lag_seconds")
+
+# CurseForge 搜索最多能翻到 index + pageSize = 10000
+SEARCH_WINDOW = 10000
+
+_ISO = re.compile(r"^(\d{4}-\d{2}-\d{2}T\d{2}:\d{2}:\d{2})(?:\.(\d+))?")
+
+
+def parse_date(value: Optional[str]) -> Optional[datetime]:
+    """
+    解析 CurseForge 的时间，小数位数不固定，如 2024-01-01T00:00:00.13Z
+
+    只保留到毫秒，与 MongoDB 中保存的水位线精度一致。
+    """
+    match = _ISO.match(value or "")
+    if match is None:
+        return None
+    date = datetime.strptime(match.group(1), "%Y-%m-%dT%H:%M:%S")
+    if match.group(2):
+        date += timedelta(milliseconds=int(match.group(2)[:3].ljust(3, "0")))
+    return date
+
+
+class CurseForgeChangeFeed:
+    """
+    增量同步修改过的 Mod
+
+    Args:
+        name (str): 水位线的名称
+
+        game_id (int): 游戏 ID
+
+        page_size (int): 每页搜索的数量，最大 50
+
+        lookback (float): 没有水位线时向前同步的秒数
+    """
+
+    def __init__(
+        self,
+        name: str = "curseforge_mods",
+        game_id: int = 432,
+        page_size: int = 50,
+        lookback: float = mcim_config.curseforge_changefeed_lookback,
+    ):
+        self.name = name
+        self.game_id = game_id
+        self.page_size = page_size
+        self.lookback = lookback
+
+    async def _state(self) -> SyncState:
+        state = await SyncState.find_one({"name": self.name})
+        if state is None:
+            state = SyncState(
+                name=self.name,
+                watermark=datetime.utcnow() - timedelta(seconds=self.lookback),
+            )
+        return state
+
+    async def discover(
+        self, state: SyncState
+    ) -> Tuple[List[int], Optional[datetime], List[int]]:
+        """
+        翻页找出水位线之后修改过的 Mod
+
+        返回 (修改过的 modId, 新的水位线, 修改时间等于新水位线的 modId)。
+        修改时间等于旧水位线、但不在 watermark_ids 中的 Mod 也视为修改过。
+        """
+        seen = set(state.watermark_ids)
+        changed = {}
+        index = 0
+        while index + self.page_size <= SEARCH_WINDOW:
+            page = await CurseForgeApi.search(
+                gameid=self.game_id,
+                classid=None,
+                sort_field=SearchFilter.SortField.LASTUPDATED,
+                sort_order=SearchFilter.SortOrder.DESC,
+                index=index,
+                pagesize=self.page_size,
+            )
+            reached = False
+            for mod in page["data"]:
+                modified = parse_date(mod.get("dateModified"))
+                if modified is None:
+                    continue
+                if modified < state.watermark:
+                    reached = True
+                    break
+                # 与水位线同一时刻的 Mod 排序不固定，跳过已同步的，继续往后看
+                if modified == state.watermark and mod["id"] in seen:
+                    continue
+                changed.setdefault(mod["id"], modified)
+            if reached or len(page["data"]) < self.page_size:
+                break
+            index += self.page_size
+        else:
+            logger.warning(
+                f"{self.name} 水位线之后修改的 Mod 超过搜索上限 {SEARCH_WINDOW}，更早的修改将被跳过"
+            )
+
+        if not changed:
+            return [], state.watermark, state.watermark_ids
+        watermark = max(changed.values())
+        watermark_ids = [modid for modid, modified in changed.items() if modified == watermark]
+        if watermark == state.watermark:
+            watermark_ids = sorted(seen | set(watermark_ids))
+        return list(changed), watermark, watermark_ids
+
+    async def run_once(self) -> int:
+        """
+        同步一轮，返回刷新的 Mod 数
+
+        全部刷新成功后才推进水位线，失败的部分下一轮重新同步。
+        """
+        changefeed_runs.inc(self.name)
+        state = await self._state()
+        modids, watermark, watermark_ids = await self.discover(state)
+        changefeed_mods.inc(f"{self.name}:discovered", len(modids))
+        if modids:
+            models, complete = await refresh_mods(modids)
+            changefeed_mods.inc(f"{self.name}:refreshed", len(models))
+            if not complete:
+                changefeed_mods.inc(f"{self.name}:failed", len(modids) - len(models))
+                logger.warning(f"{self.name} 部分 Mod 刷新失败，水位线保持在 {state.watermark}")
+                return len(models)
+        state.watermark = watermark
+        state.watermark_ids = watermark_ids
+        state.sync_at = datetime.utcnow()
+        await SyncState.find_one({"name": self.name}).upsert(
+            Set(
+                {
+                    SyncState.watermark: state.watermark,
+                    SyncState.watermark_ids: state.watermark_ids,
+                    SyncState.sync_at: state.sync_at,
+                }
+            ),
+            on_insert=state,
+        )
+        changefeed_lag.set(
+            round((datetime.utcnow() - state.watermark).total_seconds()), self.name
+        )
+        logger.info(f"{self.name} 同步了 {len(modids)} 个 Mod，水位线 {state.watermark}")
+        return len(modids)
+
+    async def run_forever(self, interval: float) -> None:
+        """
+        每隔 interval 秒同步一轮，出错时记录日志并等到下一轮，只有取消才会退出
+        """
+        while True:
+            try:
+                await self.run_once()
+            except ApiException as e:
+                logger.warning(f"{self.name} 同步失败: {e}")
+            except Exception:
+                # 数据库或上游数据异常也不能让后台任务静默退出；CancelledError 不是 Exception，照常传播
+                logger.exception(f"{self.name} 同步出错")
+            await asyncio.sleep(interval)
+
+
+async def main() -> None:
+    from app.database.mongodb import close_async_mongodb, start_async_mongodb
+
+    await start_async_mongodb()
+    try:
+        await CurseForgeChangeFeed().run_forever(
+            mcim_config.curseforge_changefeed_interval or 600
+        )
+    finally:
+        await close_async_mongodb()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -1,4 +1,5 @@
-from typing import List, Union
+import json
+from typing import Dict, FrozenSet, Iterable, List, NamedTuple, Tuple, Union
 from enum import Enum
 
 from app.utils.network.modrinth_cli import ModrinthCli as cli
@@ -17,6 +18,205 @@ class SortType(Enum):
     updated = "updated"
 
 
+# facets 支持的字段，数值字段可以用比较运算符
+FACET_KEYS = {
+    "project_type",
+    "categories",
+    "versions",
+    "client_side",
+    "server_side",
+    "open_source",
+    "license",
+    "author",
+    "title",
+    "project_id",
+}
+FACET_NUMERIC_KEYS = {
+    "downloads",
+    "follows",
+    "date_created",
+    "date_modified",
+    "created_timestamp",
+    "modified_timestamp",
+}
+# 取值不区分大小写的字段
+FACET_CASELESS_KEYS = {
+    "project_type",
+    "categories",
+    "client_side",
+    "server_side",
+    "open_source",
+    "license",
+}
+# 按长度从长到短匹配，避免 ">=" 被识别为 ">"
+FACET_OPERATIONS = ("!=", ">=", "<=", ":", "=", ">", "<")
+
+
+class Facet(NamedTuple):
+    """
+    一个筛选条件，如 `categories:fabric` 或 `downloads>=1000`
+    """
+
+    key: str
+    value: str
+    operation: str = ":"
+
+    @classmethod
+    def parse(cls, text: str) -> "Facet":
+        """
+        解析 `key<op>value`，不支持的字段、运算符抛出 ValueError
+        """
+        for i, char in enumerate(text):
+            if char in ":=!<>":
+                key = text[:i].strip()
+                for operation in FACET_OPERATIONS:
+                    if text.startswith(operation, i):
+                        return cls.of(key, text[i + len(operation) :], operation)
+                break
+        raise ValueError(f"facet {text!r} 缺少运算符")
+
+    @classmethod
+    def of(cls, key: str, value, operation: str = ":") -> "Facet":
+        """
+        规范化: "=" 视为 ":"，不区分大小写的字段取值转为小写
+        """
+        key = key.strip()
+        value = str(value).strip()
+        if operation == "=":
+            operation = ":"
+        if key not in FACET_KEYS and key not in FACET_NUMERIC_KEYS:
+            raise ValueError(f"不支持的 facet 字段 {key!r}")
+        if operation not in FACET_OPERATIONS:
+            raise ValueError(f"不支持的 facet 运算符 {operation!r}")
+        if key in FACET_NUMERIC_KEYS:
+            try:
+                float(value)
+            except ValueError:
+                raise ValueError(f"facet {key} 的值需要是数字: {value!r}") from None
+        elif operation not in (":", "!="):
+            raise ValueError(f"facet {key} 不支持运算符 {operation!r}")
+        if not value:
+            raise ValueError(f"facet {key} 缺少值")
+        if key in FACET_CASELESS_KEYS:
+            value = value.lower()
+        return cls(key, value, operation)
+
+    def __str__(self) -> str:
+        return f"{self.key}{self.operation}{self.value}"
+
+
+class Facets:
+    """
+    Modrinth 搜索的 facets 构建器
+
+    facets 是条件组的列表，组内各条件为 OR，组之间为 AND。
+    构建时即规范化: 组内去重排序，组之间去重排序，包含另一组全部条件的组被省略
+    (A AND (A OR B) 等价于 A)，同一逻辑查询总是得到相同的字符串和 `key()`。
+
+    用法: `Facets().any_of(("categories", "fabric")).any_of(("versions", "1.20.1"), ("versions", "1.20.2"))`
+    """
+
+    def __init__(self, groups: Iterable[Iterable[Facet]] = ()):
+        self._groups: FrozenSet[FrozenSet[Facet]] = frozenset()
+        for group in groups:
+            self._add(group)
+
+    def _add(self, group: Iterable[Facet]) -> None:
+        group = frozenset(group)
+        if not group:
+            return
+        groups = set(self._groups)
+        if any(other <= group for other in groups):
+            return
+        groups = {other for other in groups if not group <= other}
+        groups.add(group)
+        self._groups = frozenset(groups)
+
+    def any_of(self, *facets: Union[Facet, str, Tuple]) -> "Facets":
+        """
+        添加一组 OR 条件，条件可以是 Facet、"key:value" 或 (key, value[, operation])
+        """
+        group = []
+        for facet in facets:
+            if isinstance(facet, Facet):
+                group.append(Facet.of(*facet))
+            elif isinstance(facet, str):
+                group.append(Facet.parse(facet))
+            else:
+                group.append(Facet.of(*facet))
+        self._add(group)
+        return self
+
+    def where(self, key: str, value, operation: str = ":") -> "Facets":
+        """
+        添加单个条件，与其他组为 AND
+        """
+        return self.any_of((key, value, operation))
+
+    @classmethod
+    def parse(cls, text: str) -> "Facets":
+        """
+        解析 Modrinth 的 facets JSON，如 `[["categories:fabric"],["versions:1.20.1"]]`
+
+        格式错误抛出 ValueError。
+        """
+        try:
+            groups = json.loads(text)
+        except json.JSONDecodeError as e:
+            raise ValueError(f"facets 不是合法的 JSON: {e}") from None
+        if not isinstance(groups, list) or not all(
+            isinstance(group, list) and all(isinstance(f, str) for f in group)
+            for group in groups
+        ):
+            raise ValueError("facets 需要是字符串数组的数组")
+        facets = cls()
+        for group in groups:
+            facets.any_of(*group)
+        return facets
+
+    @classmethod
+    def from_dict(cls, facets: Dict[str, Union[str, List[str]]]) -> "Facets":
+        """
+        {key: value} 每项为一组，value 为列表时组内为 OR
+        """
+        result = cls()
+        for key, value in facets.items():
+            values = value if isinstance(value, (list, tuple, set)) else [value]
+            result.any_of(*[(key, v) for v in values])
+        return result
+
+    @property
+    def groups(self) -> List[List[Facet]]:
+        return sorted(sorted(group) for group in self._groups)
+
+    def facets(self) -> Iterable[Facet]:
+        for group in self._groups:
+            yield from group
+
+    def key(self) -> Tuple[Tuple[str, ...], ...]:
+        """
+        可以作为缓存键的规范形式
+        """
+        return tuple(tuple(str(facet) for facet in group) for group in self.groups)
+
+    def __str__(self) -> str:
+        return json.dumps(
+            [list(group) for group in self.key()], ensure_ascii=False, separators=(",", ":")
+        )
+
+    def __bool__(self) -> bool:
+        return bool(self._groups)
+
+    def __eq__(self, other) -> bool:
+        return isinstance(other, Facets) and self._groups == other._groups
+
+    def __hash__(self) -> int:
+        return hash(self._groups)
+
+    def __repr__(self) -> str:
+        return f"Facets({self})"
+
+
 class ModrinthApi:
     """
     Modrinth Api 的包装，基于 HTTPX
@@ -230,14 +430,13 @@ class ModrinthApi:
         }
         return await cli(prefix=url, method="POST", data=data).result
 
-    # TODO 这里需要一个 facets 构建器
     async def search(
         self,
         query: str = None,
         limit: int = 20,
         offset: int = None,
         index: Union[SortType, str] = SortType.relevance,
-        facets: str = None,
+        facets: Union[Facets, dict, str] = None,
     ):
         """
         搜索 Mod 。[🔗](https://docs.modrinth.com/api-spec/#tag/projects/operation/searchProjects)
@@ -252,16 +451,15 @@ class ModrinthApi:
 
         :param index: 排序方法
 
-        :param facets: [筛选搜索结果](https://docs.modrinth.com/docs/tutorials/api_search)
+        :param facets: [筛选搜索结果](https://docs.modrinth.com/docs/tutorials/api_search)，可以是 Facets、{key: value} 或 facets 字符串
 
         用法: `resp = <ModrinthApi>.search(query, limit, offset, index, facets)`
         """
 
-        if type(facets) == dict:
-            facets_text = "["
-            for a, b in facets.items():
-                facets_text += '["{a}:{b}"],'.format(a=a, b=b)
-            facets = facets_text[:-1] + "]"
+        if isinstance(facets, dict):
+            facets = Facets.from_dict(facets)
+        if isinstance(facets, Facets):
+            facets = str(facets) if facets else None
 
         params = {
             "query": query,
@@ -0,0 +1,129 @@
+"""
+熔断器
+
+连续失败 (或过慢) 达到阈值后熔断，熔断期间直接拒绝请求；
+经过 reset_timeout 后进入半开状态，放行一个探测请求，成功则恢复，失败则继续熔断。
+"""
+
+import time
+from typing import Dict
+
+from ..log import logger
+from ..metrics import counter
+
+__all__ = ["CircuitBreaker", "CLOSED", "OPEN", "HALF_OPEN", "breakers"]
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+transitions = counter("breaker_transitions")
+rejections = counter("breaker_rejections")
+
+_registry: Dict[str, "CircuitBreaker"] = {}
+
+
+class CircuitBreaker:
+    """
+    单个上游的熔断器
+
+    Args:
+        name (str): 上游名称，同时用于指标统计
+
+        failure_threshold (int): 连续失败多少次后熔断
+
+        slow_call_duration (float): 超过这个秒数的调用也算作失败
+
+        reset_timeout (float): 熔断多少秒后进入半开状态
+    """
+
+    def __init__(
+        self,
+        name: str,
+        failure_threshold: int,
+        slow_call_duration: float,
+        reset_timeout: float,
+    ):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.slow_call_duration = slow_call_duration
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at = 0.0
+        self._state = CLOSED
+        self._probing = False
+        _registry[name] = self
+
+    @property
+    def state(self) -> str:
+        if self._state == OPEN and time.monotonic() - self.opened_at >= self.reset_timeout:
+            return HALF_OPEN
+        return self._state
+
+    def available(self) -> bool:
+        """
+        上游是否可能可用，熔断中返回 False，半开状态下返回 True 以便发起探测
+        """
+        return self.state != OPEN
+
+    def allow(self) -> bool:
+        """
+        是否放行一次调用，半开状态下同时只放行一个探测请求
+        """
+        state = self.state
+        if state == CLOSED:
+            return True
+        if state == HALF_OPEN and not self._probing:
+            self._probing = True
+            self._transition(HALF_OPEN)
+            return True
+        rejections.inc(self.name)
+        return False
+
+    def retry_after(self) -> float:
+        """
+        距离允许探测还剩的秒数
+        """
+        if self._state == CLOSED:
+            return 0.0
+        return max(0.0, self.opened_at + self.reset_timeout - time.monotonic())
+
+    def record(self, success: bool, duration: float = 0.0) -> None:
+        """
+        记录一次调用的结果
+        """
+        if success and duration > self.slow_call_duration:
+            success = False
+        if success:
+            self.failures = 0
+            self._probing = False
+            if self._state != CLOSED:
+                self._transition(CLOSED)
+            return
+        self.failures += 1
+        if self._state == HALF_OPEN or self.failures >= self.failure_threshold:
+            self._probing = False
+            self.opened_at = time.monotonic()
+            if self._state != OPEN:
+                self._transition(OPEN)
+
+    def _transition(self, state: str) -> None:
+        if self._state == state:
+            return
+        logger.warning(f"{self.name} 熔断器 {self._state} -> {state}")
+        self._state = state
+        transitions.inc(f"{self.name}:{state}")
+
+    def snapshot(self) -> dict:
+        return {
+            "state": self.state,
+            "failures": self.failures,
+            "retry_after": round(self.retry_after(), 3),
+        }
+
+
+def breakers() -> Dict[str, CircuitBreaker]:
+    """
+    已创建的全部熔断器
+    """
+    return dict(_registry)
@@ -0,0 +1,160 @@
+"""
+进程内的 LRU 缓存
+"""
+
+import time
+from collections import OrderedDict
+from typing import Any, Hashable, Optional, Tuple
+
+from ..metrics import counter, gauge
+
+__all__ = ["LRUCache", "SearchCache"]
+
+hits = counter("cache_hits")
+misses = counter("cache_misses")
+evictions = counter("cache_evictions")
+cache_bytes = gauge("cache_bytes")
+cache_entries = gauge("cache_entries")
+
+search_hits = counter("search_cache_hits")
+search_misses = counter("search_cache_misses")
+search_hit_ratio = gauge("search_cache_hit_ratio")
+search_entries = gauge("search_cache_entries")
+search_evictions = counter("search_cache_evictions")
+
+
+class LRUCache:
+    """
+    按字节数限制大小、每个条目带 TTL 的 LRU 缓存
+
+    条目大小取 `len(value)`，一般缓存序列化后的 bytes。
+
+    Args:
+        name (str): 用于指标统计的名称
+
+        max_bytes (int): 缓存总大小上限
+
+        ttl (float): 条目默认存活秒数，也是单个条目 TTL 的上限
+    """
+
+    def __init__(self, name: str, max_bytes: int, ttl: float):
+        self.name = name
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.size = 0
+        self._data: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        item = self._data.get(key)
+        if item is None:
+            misses.inc(self.name)
+            return None
+        expire_at, value = item
+        if expire_at <= time.monotonic():
+            self._pop(key)
+            misses.inc(self.name)
+            return None
+        self._data.move_to_end(key)
+        hits.inc(self.name)
+        return value
+
+    def set(self, key: Hashable, value: Any, ttl: float = None) -> None:
+        """
+        写入缓存，`ttl` 不能超过默认 TTL，小于等于 0 则不缓存
+        """
+        self._pop(key)
+        ttl = self.ttl if ttl is None else min(ttl, self.ttl)
+        if ttl <= 0 or len(value) > self.max_bytes:
+            return
+        self._data[key] = (time.monotonic() + ttl, value)
+        self.size += len(value)
+        while self.size > self.max_bytes:
+            _, (_, evicted) = self._data.popitem(last=False)
+            self.size -= len(evicted)
+            evictions.inc(self.name)
+        self._update_gauges()
+
+    def delete(self, key: Hashable) -> None:
+        self._pop(key)
+
+    def clear(self) -> None:
+        self._data.clear()
+        self.size = 0
+        self._update_gauges()
+
+    def _pop(self, key: Hashable) -> None:
+        item = self._data.pop(key, None)
+        if item is not None:
+            self.size -= len(item[1])
+            self._update_gauges()
+
+    def _update_gauges(self) -> None:
+        cache_bytes.set(self.size, self.name)
+        cache_entries.set(len(self._data), self.name)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._data
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+class SearchCache:
+    """
+    按条目数限制大小、带 TTL 的搜索结果缓存
+
+    key 需要是规范化后的查询参数，命中率按 `label` (一般是排序字段) 分别统计，
+    用于调整 TTL。
+
+    Args:
+        name (str): 用于指标统计的名称
+
+        max_entries (int): 最多缓存的查询数
+
+        ttl (float): 条目存活秒数
+    """
+
+    def __init__(self, name: str, max_entries: int, ttl: float):
+        self.name = name
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._data: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+
+    def get(self, key: Hashable, label: str = "") -> Optional[Any]:
+        item = self._data.get(key)
+        if item is not None and item[0] <= time.monotonic():
+            del self._data[key]
+            search_entries.set(len(self._data), self.name)
+            item = None
+        if item is None:
+            self._record(label, hit=False)
+            return None
+        self._data.move_to_end(key)
+        self._record(label, hit=True)
+        return item[1]
+
+    def set(self, key: Hashable, value: Any) -> None:
+        if self.ttl <= 0 or self.max_entries <= 0:
+            return
+        self._data.pop(key, None)
+        self._data[key] = (time.monotonic() + self.ttl, value)
+        while len(self._data) > self.max_entries:
+            self._data.popitem(last=False)
+            search_evictions.inc(self.name)
+        search_entries.set(len(self._data), self.name)
+
+    def delete(self, key: Hashable) -> None:
+        if self._data.pop(key, None) is not None:
+            search_entries.set(len(self._data), self.name)
+
+    def _record(self, label: str, hit: bool) -> None:
+        label = f"{self.name}:{label}"
+        (search_hits if hit else search_misses).inc(label)
+        total = search_hits.get(label) + search_misses.get(label)
+        search_hit_ratio.set(round(search_hits.get(label) / total, 4), label)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._data
+
+    def __len__(self) -> int:
+        return len(self._data)
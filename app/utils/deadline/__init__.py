@@ -0,0 +1,40 @@
+"""
+请求时间预算
+
+由 DeadlineMiddleware 在收到请求时设置截止时间，同一请求内发起的上游请求和重试共享这个预算。
+"""
+
+import time
+from contextvars import ContextVar, Token
+from typing import Optional
+
+__all__ = ["request_deadline", "set_deadline", "remaining", "clear"]
+
+# time.monotonic() 表示的截止时间，None 为不限制
+request_deadline: ContextVar[Optional[float]] = ContextVar(
+    "request_deadline", default=None
+)
+
+
+def set_deadline(seconds: float) -> Token:
+    """
+    设置从现在起 `seconds` 秒的截止时间，返回用于 reset 的 Token
+    """
+    return request_deadline.set(time.monotonic() + seconds)
+
+
+def remaining() -> Optional[float]:
+    """
+    剩余的秒数，没有截止时间时返回 None
+    """
+    deadline = request_deadline.get()
+    if deadline is None:
+        return None
+    return deadline - time.monotonic()
+
+
+def clear() -> None:
+    """
+    清除当前上下文的截止时间，用于不属于任何请求的后台任务
+    """
+    request_deadline.set(None)
@@ -0,0 +1,180 @@
+"""
+进程内的文件指纹索引
+"""
+
+from array import array
+from bisect import bisect_left
+from datetime import datetime, timedelta
+from typing import AsyncIterable, Dict, Iterable, NamedTuple, Optional, Tuple
+
+from ..metrics import gauge
+
+__all__ = ["FingerprintEntry", "FingerprintIndex"]
+
+index_entries = gauge("fingerprint_index_entries")
+index_bytes = gauge("fingerprint_index_bytes")
+
+EPOCH = datetime(1970, 1, 1)
+
+
+class FingerprintEntry(NamedTuple):
+    """
+    与 FingerprintInfo 字段一致，可以直接替代查询结果使用
+    """
+
+    fingerprint: int
+    modId: Optional[int]
+    fileId: Optional[int]
+    exist: bool
+    sync_at: Optional[datetime]
+
+
+def _timestamp(sync_at: Optional[datetime]) -> float:
+    return 0.0 if sync_at is None else (sync_at - EPOCH).total_seconds()
+
+
+class FingerprintIndex:
+    """
+    指纹 -> (modId, fileId) 的只读快照加增量写入
+
+    快照按指纹排序存放在 4 个定长 array 中，用二分查找，每条约 32 字节。
+    未匹配的指纹 modId 和 fileId 记为 0，sync_at 为 0 表示没有同步时间。
+    新写入的条目先放进 `_pending`，积累到一定数量后线性合并回快照。
+
+    Args:
+        name (str): 用于指标统计的名称
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        # load() 开始后接受写入，完成后才用于查询
+        self.enabled = False
+        self.loaded = False
+        self._fingerprints = array("q")
+        self._mod_ids = array("q")
+        self._file_ids = array("q")
+        self._sync_at = array("d")
+        self._pending: Dict[int, Tuple[int, int, float]] = {}
+
+    def __len__(self) -> int:
+        return len(self._fingerprints) + len(self._pending)
+
+    def __contains__(self, fingerprint: int) -> bool:
+        return self.get(fingerprint) is not None
+
+    async def load(
+        self,
+        entries: AsyncIterable[
+            Tuple[int, Optional[int], Optional[int], Optional[datetime]]
+        ],
+    ) -> None:
+        """
+        从 (fingerprint, modId, fileId, sync_at) 构建快照，期间 add() 的条目不会丢失
+        """
+        self.enabled = True
+        fingerprints, mod_ids, file_ids, sync_at = (
+            array("q"),
+            array("q"),
+            array("q"),
+            array("d"),
+        )
+        async for fingerprint, mod_id, file_id, synced in entries:
+            fingerprints.append(fingerprint)
+            mod_ids.append(mod_id or 0)
+            file_ids.append(file_id or 0)
+            sync_at.append(_timestamp(synced))
+
+        order = sorted(range(len(fingerprints)), key=fingerprints.__getitem__)
+        self._fingerprints = array("q", (fingerprints[i] for i in order))
+        self._mod_ids = array("q", (mod_ids[i] for i in order))
+        self._file_ids = array("q", (file_ids[i] for i in order))
+        self._sync_at = array("d", (sync_at[i] for i in order))
+        self._compact()
+        self.loaded = True
+
+    def add(
+        self,
+        fingerprint: int,
+        mod_id: Optional[int],
+        file_id: Optional[int],
+        sync_at: Optional[datetime] = None,
+    ) -> None:
+        """
+        写入或覆盖一个指纹，mod_id 为 None 表示未匹配
+        """
+        if not self.enabled:
+            return
+        self._pending[fingerprint] = (mod_id or 0, file_id or 0, _timestamp(sync_at))
+        # load() 完成前快照会被整体替换，写入都留在 _pending 中，由 load() 最后合并
+        if self.loaded and len(self._pending) >= max(1024, len(self._fingerprints) // 16):
+            self._compact()
+
+    def get(self, fingerprint: int) -> Optional[FingerprintEntry]:
+        item = self._pending.get(fingerprint)
+        if item is None:
+            i = bisect_left(self._fingerprints, fingerprint)
+            if i == len(self._fingerprints) or self._fingerprints[i] != fingerprint:
+                return None
+            item = (self._mod_ids[i], self._file_ids[i], self._sync_at[i])
+        mod_id, file_id, sync_at = item
+        exist = mod_id != 0
+        return FingerprintEntry(
+            fingerprint=fingerprint,
+            modId=mod_id if exist else None,
+            fileId=file_id if exist else None,
+            exist=exist,
+            sync_at=EPOCH + timedelta(seconds=sync_at) if sync_at else None,
+        )
+
+    def lookup(self, fingerprints: Iterable[int]) -> Dict[int, FingerprintEntry]:
+        """
+        批量查询，结果中只包含索引里存在的指纹
+        """
+        result = {}
+        for fingerprint in fingerprints:
+            entry = self.get(fingerprint)
+            if entry is not None:
+                result[fingerprint] = entry
+        return result
+
+    def _compact(self) -> None:
+        """
+        把 `_pending` 按序合并进快照
+        """
+        if self._pending:
+            old = self._fingerprints
+            fingerprints, mod_ids, file_ids, sync_at = (
+                array("q"),
+                array("q"),
+                array("q"),
+                array("d"),
+            )
+            start = 0
+            for fingerprint, (mod_id, file_id, synced) in sorted(self._pending.items()):
+                i = bisect_left(old, fingerprint, start)
+                fingerprints.extend(old[start:i])
+                mod_ids.extend(self._mod_ids[start:i])
+                file_ids.extend(self._file_ids[start:i])
+                sync_at.extend(self._sync_at[start:i])
+                fingerprints.append(fingerprint)
+                mod_ids.append(mod_id)
+                file_ids.append(file_id)
+                sync_at.append(synced)
+                start = i + 1 if i < len(old) and old[i] == fingerprint else i
+            fingerprints.extend(old[start:])
+            mod_ids.extend(self._mod_ids[start:])
+            file_ids.extend(self._file_ids[start:])
+            sync_at.extend(self._sync_at[start:])
+            self._fingerprints = fingerprints
+            self._mod_ids = mod_ids
+            self._file_ids = file_ids
+            self._sync_at = sync_at
+            self._pending.clear()
+        index_entries.set(len(self._fingerprints), self.name)
+        index_bytes.set(
+            sum(
+                a.buffer_info()[1] * a.itemsize
+                for a in (self._fingerprints, self._mod_ids, self._file_ids, self._sync_at)
+            ),
+            self.name,
+        )
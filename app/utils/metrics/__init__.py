@@ -0,0 +1,83 @@
+"""
+进程内的简单指标统计
+"""
+
+from collections import defaultdict
+from typing import Callable, Dict, Hashable, Union
+
+__all__ = ["Counter", "Gauge", "counter", "gauge", "collect"]
+
+
+class Counter:
+    """
+    按标签累加的计数器
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self.values: Dict[Hashable, int] = defaultdict(int)
+
+    def inc(self, label: Hashable = "", n: int = 1) -> None:
+        self.values[label] += n
+
+    def get(self, label: Hashable = "") -> int:
+        return self.values.get(label, 0)
+
+    def snapshot(self) -> Dict[str, int]:
+        return {str(k): v for k, v in self.values.items()}
+
+
+class Gauge:
+    """
+    按标签记录当前值的仪表，可以直接设置值，也可以在采集时调用函数取值
+    """
+
+    def __init__(self, name: str, func: Callable[[], Union[int, float, dict]] = None):
+        self.name = name
+        self.func = func
+        self.values: Dict[Hashable, Union[int, float]] = {}
+
+    def set(self, value: Union[int, float], label: Hashable = "") -> None:
+        self.values[label] = value
+
+    def snapshot(self) -> Union[int, float, dict]:
+        if self.func is not None:
+            return self.func()
+        return {str(k): v for k, v in self.values.items()}
+
+
+__registry: Dict[str, Union[Counter, Gauge]] = {}
+
+
+def counter(name: str) -> Counter:
+    """
+    获取或创建一个计数器
+    """
+    metric = __registry.get(name)
+    if metric is None:
+        metric = __registry[name] = Counter(name)
+    return metric
+
+
+def gauge(name: str, func: Callable[[], Union[int, float, dict]] = None) -> Gauge:
+    """
+    获取或创建一个仪表
+
+    Args:
+        name (str): 指标名
+
+        func (Callable, optional): 采集时调用的取值函数
+    """
+    metric = __registry.get(name)
+    if metric is None:
+        metric = __registry[name] = Gauge(name, func)
+    elif func is not None:
+        metric.func = func
+    return metric
+
+
+def collect() -> Dict[str, Union[int, float, dict]]:
+    """
+    采集全部指标
+    """
+    return {name: metric.snapshot() for name, metric in __registry.items()}
@@ -25,9 +25,9 @@ class CurseForgeCli(Api):
                     raw_url: str = None):
             url = MCIMConfig.curseforge_api + prefix if raw_url is None else raw_url
             if method == "GET":
-                super().__init__(url=url, method=method, data=data, params=params, headers=headers)
+                super().__init__(url=url, method=method, data=data, params=params, headers=headers, upstream="curseforge")
             elif method == "POST":
-                super().__init__(url=url, method=method, data=data, params=params, headers=headers, json_body=True)
+                super().__init__(url=url, method=method, data=data, params=params, headers=headers, json_body=True, upstream="curseforge")
 
     @property
     async def result(self, raw: bool = False, **kwargs) -> Union[int, str, dict]:
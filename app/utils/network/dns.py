@@ -0,0 +1,89 @@
+"""
+带 DNS 缓存的 httpcore 网络后端
+"""
+
+import asyncio
+import socket
+import time
+import typing
+from typing import Dict, List, Optional, Tuple
+
+import httpcore
+from httpcore import AsyncNetworkBackend, AsyncNetworkStream
+from httpcore._backends.auto import AutoBackend
+
+from ..metrics import counter
+
+dns_lookups = counter("dns_lookups")
+
+
+class CachingDNSBackend(AsyncNetworkBackend):
+    """
+    解析结果缓存 `ttl` 秒，依次尝试解析出的地址，全部连接失败时清除缓存
+
+    TLS 的 SNI 由 httpcore 按请求的域名设置，直接连 IP 不影响证书校验。
+
+    Args:
+        ttl (float): 解析结果缓存秒数
+
+        backend (AsyncNetworkBackend, optional): 实际建立连接的后端
+    """
+
+    def __init__(self, ttl: float, backend: Optional[AsyncNetworkBackend] = None):
+        self.ttl = ttl
+        self._backend = backend or AutoBackend()
+        self._cache: Dict[Tuple[str, int], Tuple[float, List[str]]] = {}
+
+    async def _resolve(self, host: str, port: int) -> List[str]:
+        key = (host, port)
+        item = self._cache.get(key)
+        if item is not None and item[0] > time.monotonic():
+            dns_lookups.inc("hit")
+            return item[1]
+        dns_lookups.inc("miss")
+        infos = await asyncio.get_running_loop().getaddrinfo(
+            host, port, type=socket.SOCK_STREAM
+        )
+        addresses = list(dict.fromkeys(info[4][0] for info in infos))
+        self._cache[key] = (time.monotonic() + self.ttl, addresses)
+        return addresses
+
+    async def connect_tcp(
+        self,
+        host: str,
+        port: int,
+        timeout: Optional[float] = None,
+        local_address: Optional[str] = None,
+        socket_options: typing.Optional[typing.Iterable] = None,
+    ) -> AsyncNetworkStream:
+        try:
+            addresses = await self._resolve(host, port)
+        except OSError as e:
+            raise httpcore.ConnectError(str(e)) from e
+        error = httpcore.ConnectError(f"no address for {host}")
+        for address in addresses:
+            try:
+                return await self._backend.connect_tcp(
+                    address,
+                    port,
+                    timeout=timeout,
+                    local_address=local_address,
+                    socket_options=socket_options,
+                )
+            except (httpcore.ConnectError, httpcore.ConnectTimeout) as e:
+                error = e
+        self._cache.pop((host, port), None)
+        raise error
+
+    async def connect_unix_socket(
+        self,
+        path: str,
+        timeout: Optional[float] = None,
+        socket_options: typing.Optional[typing.Iterable] = None,
+    ) -> AsyncNetworkStream:
+        return await self._backend.connect_unix_socket(
+            path, timeout=timeout, socket_options=socket_options
+        )
+
+    async def sleep(self, seconds: float) -> None:
+        await self._backend.sleep(seconds)
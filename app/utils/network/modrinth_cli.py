@@ -55,9 +55,9 @@ class ModrinthCli(Api):
             params = process_params(params)
             data = process_data(data)
             if method == "GET":
-                super().__init__(url=url, method=method, data=data, params=params, headers=headers)
+                super().__init__(url=url, method=method, data=data, params=params, headers=headers, upstream="modrinth")
             elif method == "POST":
-                super().__init__(url=url, method=method, data=data, params=params, headers=headers, json_body=True)
+                super().__init__(url=url, method=method, data=data, params=params, headers=headers, json_body=True, upstream="modrinth")
 
     @property
     async def result(self, raw: bool = False, **kwargs) -> Union[int, str, dict]:
@@ -3,37 +3,164 @@
 """
 
 import json
+import time
 import atexit
+import hashlib
+import random
 import asyncio
 import httpx
 from dataclasses import field, dataclass
-from typing import Any, Dict, Union, Coroutine
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Dict, FrozenSet, Optional, Tuple, Type, Union, Coroutine
 
+from .. import deadline
 from ..log import logger
-from ...exceptions import ApiException, NetworkException, ResponseException
+from ..metrics import counter, gauge
+from ..serializer import dumps, loads
+from ..breaker import CircuitBreaker
+from ..ratelimit import MongoBucketBackend, RateLimiter
+from .dns import CachingDNSBackend
+from ...exceptions import (
+    ApiException,
+    CircuitOpenException,
+    DeadlineExceededException,
+    NetworkException,
+    RateLimitedException,
+)
 from ...config import MCIMConfig
+from ...config.mcim import UpstreamConfigModel
 
 mcim_config = MCIMConfig.load()
 
+try:
+    import h2  # noqa
+
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
 
 __httpx_session_pool = {}
+__rate_limiters: Dict[str, Optional[RateLimiter]] = {}
+__breakers: Dict[str, CircuitBreaker] = {}
 PROXY: str = mcim_config.proxies
 
+
+def _pool_connections() -> dict:
+    """
+    各上游连接池当前的连接数
+
+    连接池是 httpx 的私有属性，取不到时不上报该上游
+    """
+    connections = {}
+    for (_, upstream), session in __httpx_session_pool.items():
+        pool = getattr(getattr(session, "_transport", None), "_pool", None)
+        if pool is None or not hasattr(pool, "connections"):
+            continue
+        connections[upstream] = connections.get(upstream, 0) + len(pool.connections)
+    return connections
+
+
+# 连接池占用情况: 进行中的请求数、连接数，以及超过 max_connections 需要排队的请求数
+# 启用 HTTP/2 时一个连接可以同时承载多个请求，这里的排队只表示进行中的请求数超过了
+# max_connections，实际可能复用已有连接而没有等待
+upstream_in_flight = gauge("upstream_in_flight")
+upstream_connections = gauge("upstream_connections", _pool_connections)
+upstream_queued = counter("upstream_queued")
+upstream_pool_timeouts = counter("upstream_pool_timeouts")
+
 HEADERS = {
     "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/116.0.0.0 Safari/537.36 Edg/116.0.1938.54",
 }
 
-TIMEOUT = 5
-RETRY_TIMES = 3
 REQUEST_LOG = True
 
+upstream_retries = counter("upstream_retries")
+
+
+def _parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """
+    解析 Retry-After，支持秒数和 HTTP 日期两种格式
+    """
+    if not value:
+        return None
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    try:
+        date = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max((date - datetime.now(timezone.utc)).total_seconds(), 0.0)
+
+
+@dataclass
+class RetryPolicy:
+    """
+    上游请求的重试策略
+
+    Args:
+        max_attempts (int): 最多尝试次数，负数则一直重试直到成功或超出时间预算
+
+        base_delay (float): 退避的基础秒数，第 n 次重试前等待 [0, base_delay * 2^n] 内的随机值
+
+        max_delay (float): 单次退避的上限
+
+        max_retry_after (float): 服从 Retry-After 时最多等待的秒数
+
+        exceptions (tuple): 可以重试的异常
+
+        statuses (frozenset): 可以重试的状态码
+    """
+
+    max_attempts: int = 3
+    base_delay: float = 0.2
+    max_delay: float = 5
+    max_retry_after: float = 60
+    exceptions: Tuple[Type[BaseException], ...] = (
+        # json 解析错误 说明数据获取有误 再给次机会
+        json.JSONDecodeError,
+        httpx.TimeoutException,
+        httpx.NetworkError,
+        httpx.RemoteProtocolError,
+        # 没有超出时间预算的超时，按网络超时处理
+        asyncio.TimeoutError,
+    )
+    statuses: FrozenSet[int] = frozenset({408, 429, 500, 502, 503, 504})
+
+    def retryable(self, e: BaseException) -> bool:
+        if isinstance(e, NetworkException):
+            return e.status in self.statuses
+        return isinstance(e, self.exceptions)
+
+    def delay(self, attempt: int, e: BaseException) -> float:
+        """
+        第 `attempt` 次重试前等待的秒数，优先服从 Retry-After
+        """
+        if isinstance(e, NetworkException) and e.retry_after is not None:
+            return min(e.retry_after, self.max_retry_after)
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2**attempt))
+
+
+DEFAULT_RETRY_POLICY = RetryPolicy(
+    max_attempts=mcim_config.retry_max_attempts,
+    base_delay=mcim_config.retry_base_delay,
+    max_delay=mcim_config.retry_max_delay,
+)
 
-def retry(times: int = 3):
+
+def retry(policy: RetryPolicy = DEFAULT_RETRY_POLICY):
     """
     重试装饰器
 
+    按 `policy` 重试可重试的异常和状态码，其余异常直接抛出。
+    当前请求设置了时间预算时，单次尝试和退避等待都不会超出预算，超出时抛出 DeadlineExceededException；
+    预算未用完时的超时按网络超时重试。
+
     Args:
-        times (int): 最大重试次数 默认 3 次 负数则一直重试直到成功
+        policy (RetryPolicy): 重试策略
 
     Returns:
         Any: 原函数调用结果
@@ -41,18 +168,35 @@ def retry(times: int = 3):
 
     def wrapper(func: Coroutine):
         async def inner(*args, **kwargs):
-            nonlocal times
-            loop = times
-            while loop != 0:
-                if loop != times and REQUEST_LOG:
-                    logger.info("第 %d 次重试", times - loop)
-                loop -= 1
+            attempt = 0
+            while True:
+                left = deadline.remaining()
+                if left is not None and left <= 0:
+                    raise DeadlineExceededException()
                 try:
-                    return await func(*args, **kwargs)
-                except json.decoder.JSONDecodeError:
-                    # json 解析错误 说明数据获取有误 再给次机会
-                    continue
-            raise ApiException("重试达到最大次数")
+                    if left is None:
+                        return await func(*args, **kwargs)
+                    return await asyncio.wait_for(func(*args, **kwargs), left)
+                except Exception as e:
+                    if isinstance(e, asyncio.TimeoutError):
+                        left = deadline.remaining()
+                        if left is not None and left <= 0:
+                            raise DeadlineExceededException() from None
+                    if not policy.retryable(e):
+                        raise
+                    attempt += 1
+                    if attempt == policy.max_attempts:
+                        raise ApiException(f"重试达到最大次数: {e}") from e
+                    delay = policy.delay(attempt, e)
+                    left = deadline.remaining()
+                    if left is not None and delay >= left:
+                        raise DeadlineExceededException() from e
+                    upstream_retries.inc(
+                        e.status if isinstance(e, NetworkException) else type(e).__name__
+                    )
+                    if REQUEST_LOG:
+                        logger.info(f"{delay:.2f}s 后第 {attempt} 次重试: {e!r}")
+                    await asyncio.sleep(delay)
 
         return inner
 
@@ -72,6 +216,8 @@ class Api:
         data (dict, optional): 请求载荷. Defaults to {}.
 
         params (dict, optional): 请求参数. Defaults to {}.
+
+        upstream (str, optional): 上游名称，决定使用的连接池. Defaults to "default".
     """
 
     url: str
@@ -80,6 +226,7 @@ class Api:
     data: dict = field(default_factory=dict)
     params: dict = field(default_factory=dict)
     headers: dict = field(default_factory=dict)
+    upstream: str = "default"
 
     def __post_init__(self) -> None:
         self.method = self.method.upper()
@@ -102,14 +249,12 @@ class Api:
             "data": self.data,
             "params": self.params,
             "headers": HEADERS.copy() if len(self.headers) == 0 else self.headers,
-            "timeout": TIMEOUT,
-            
         }
         config.update(kwargs)
 
         if self.json_body:
             config["headers"]["Content-Type"] = "application/json"
-            config["data"] = json.dumps(config["data"])
+            config["content"] = dumps(config.pop("data"))
 
         return config
 
@@ -122,11 +267,25 @@ class Api:
         处理接口的响应数据
         """
         if raw:
-            return resp.text()
-        data = resp.json()
+            return resp.text
+        data = loads(resp.content)
         return data
 
-    @retry(times=RETRY_TIMES)
+    async def _acquire_rate_limit(self, headers: dict) -> None:
+        """
+        从所属上游的令牌桶取一个令牌，不同 API key 分别限流
+
+        排队时间不会超过当前请求剩余的时间预算，取不到时抛出 RateLimitedException。
+        """
+        limiter = get_rate_limiter(self.upstream)
+        if limiter is None:
+            return
+        api_key = headers.get("x-api-key", "")
+        key = hashlib.sha1(api_key.encode()).hexdigest()[:12] if api_key else ""
+        if not await limiter.acquire(key, max_wait=deadline.remaining()):
+            raise RateLimitedException(self.upstream, retry_after=1 / limiter.rate)
+
+    @retry()
     async def request(self, raw: bool = False, **kwargs) -> Union[int, str, dict]:
         """
         向接口发送请求。
@@ -137,47 +296,145 @@ class Api:
         config = await self._prepare_request(**kwargs)
         session: httpx.AsyncClient
 
-        session = get_session()
-        resp = await session.request(**config)
+        await self._acquire_rate_limit(config["headers"])
+        breaker = get_breaker(self.upstream)
+        if not breaker.allow():
+            raise CircuitOpenException(self.upstream, retry_after=breaker.retry_after())
+        session = get_session(self.upstream)
+        in_flight = upstream_in_flight.values.get(self.upstream, 0) + 1
+        upstream_in_flight.set(in_flight, self.upstream)
+        if in_flight > _upstream_config(self.upstream).max_connections:
+            upstream_queued.inc(self.upstream)
+        start = time.monotonic()
+        # 只有超时、连接错误、429 和 5xx 算作上游故障，404 等说明上游正常
+        healthy = False
+        try:
+            resp = await session.request(**config)
+            healthy = resp.status_code < 500 and resp.status_code != 429
+        except httpx.PoolTimeout:
+            upstream_pool_timeouts.inc(self.upstream)
+            raise
+        finally:
+            upstream_in_flight.set(
+                upstream_in_flight.values[self.upstream] - 1, self.upstream
+            )
+            breaker.record(healthy, time.monotonic() - start)
         try:
             resp.raise_for_status()
         except httpx.HTTPStatusError as e:
-            raise NetworkException(resp.status_code, str(e) + f" {resp.url}")
+            raise NetworkException(
+                resp.status_code,
+                str(e) + f" {resp.url}",
+                retry_after=_parse_retry_after(resp.headers.get("Retry-After")),
+            )
         data = await self._process_response(resp, raw=raw)
         return data
 
 
-def get_session() -> httpx.AsyncClient:
+def _upstream_config(upstream: str) -> UpstreamConfigModel:
+    return mcim_config.upstreams.get(upstream) or UpstreamConfigModel()
+
+
+def _new_session(upstream: str) -> httpx.AsyncClient:
     """
-    获取当前模块的 httpx.AsyncClient 对象，用于自定义请求
+    按上游配置创建 httpx.AsyncClient
+    """
+    config = _upstream_config(upstream)
+    if config.http2 and not HTTP2_AVAILABLE:
+        logger.warning(f"h2 is not installed, {upstream} falls back to HTTP/1.1")
+    transport = httpx.AsyncHTTPTransport(
+        http2=config.http2 and HTTP2_AVAILABLE,
+        limits=httpx.Limits(
+            max_connections=config.max_connections,
+            max_keepalive_connections=config.max_keepalive_connections,
+            keepalive_expiry=config.keepalive_expiry,
+        ),
+        proxy=PROXY or None,
+    )
+    # httpx 没有暴露 network_backend 参数，直接替换连接池的后端
+    if mcim_config.dns_cache_ttl > 0 and hasattr(transport._pool, "_network_backend"):
+        transport._pool._network_backend = CachingDNSBackend(mcim_config.dns_cache_ttl)
+    session = httpx.AsyncClient(
+        transport=transport,
+        timeout=httpx.Timeout(
+            connect=config.connect_timeout,
+            read=config.read_timeout,
+            write=config.write_timeout,
+            pool=config.pool_timeout,
+        ),
+    )
+    return session
+
+
+def get_rate_limiter(upstream: str) -> Optional[RateLimiter]:
+    """
+    获取上游的限流器，未配置 rate_limit 时返回 None
+    """
+    if upstream not in __rate_limiters:
+        config = _upstream_config(upstream)
+        limiter = None
+        if config.rate_limit > 0:
+            backend = None
+            if mcim_config.rate_limit_backend == "mongo":
+                from app.database.mongodb import get_async_mongodb_collection
+
+                backend = MongoBucketBackend(get_async_mongodb_collection("rate_limits"))
+            limiter = RateLimiter(
+                upstream,
+                rate=config.rate_limit,
+                capacity=config.rate_limit_burst,
+                max_wait=config.rate_limit_wait,
+                backend=backend,
+            )
+        __rate_limiters[upstream] = limiter
+    return __rate_limiters[upstream]
+
+
+def get_breaker(upstream: str) -> CircuitBreaker:
+    """
+    获取上游的熔断器
+    """
+    breaker = __breakers.get(upstream)
+    if breaker is None:
+        config = _upstream_config(upstream)
+        breaker = __breakers[upstream] = CircuitBreaker(
+            upstream,
+            failure_threshold=config.breaker_failure_threshold,
+            slow_call_duration=config.breaker_slow_call,
+            reset_timeout=config.breaker_reset_timeout,
+        )
+    return breaker
+
+
+def get_session(upstream: str = "default") -> httpx.AsyncClient:
+    """
+    获取当前事件循环中指定上游的 httpx.AsyncClient 对象，用于自定义请求
+
+    Args:
+        upstream (str, optional): 上游名称. Defaults to "default".
 
     Returns:
         httpx.AsyncClient
     """
-    global __httpx_session_pool, last_proxy
+    global __httpx_session_pool
     loop = asyncio.get_event_loop()
-    session = __httpx_session_pool.get(loop, None)
+    session = __httpx_session_pool.get((loop, upstream), None)
     if session is None:
-        if PROXY != "":
-            proxies = {"all://": PROXY}
-            session = httpx.AsyncClient(proxies=proxies)  # type: ignore
-        else:
-            last_proxy = ""
-            session = httpx.AsyncClient()
-        __httpx_session_pool[loop] = session
-
+        session = __httpx_session_pool[(loop, upstream)] = _new_session(upstream)
     return session
 
 
-def set_session(session: httpx.AsyncClient) -> None:
+def set_session(session: httpx.AsyncClient, upstream: str = "default") -> None:
     """
     用户手动设置 Session
 
     Args:
         session (httpx.AsyncClient):  httpx.AsyncClient 实例。
+
+        upstream (str, optional): 上游名称. Defaults to "default".
     """
     loop = asyncio.get_event_loop()
-    __httpx_session_pool[loop] = session
+    __httpx_session_pool[(loop, upstream)] = session
 
 
 @atexit.register
@@ -191,9 +448,9 @@ def __clean() -> None:
         return
 
     async def __clean_task():
-        s1 = __httpx_session_pool.get(loop, None)
-        if s1 is not None:
-            await s1.aclose()
+        for (session_loop, _), session in list(__httpx_session_pool.items()):
+            if session_loop is loop:
+                await session.aclose()
 
     if loop.is_closed():
         loop.run_until_complete(__clean_task())
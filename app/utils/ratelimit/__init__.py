@@ -0,0 +1,154 @@
+"""
+令牌桶限流
+
+本地后端只限制当前进程；Mongo 后端把桶存放在一个集合里，多个 worker 共享同一份配额。
+"""
+
+import asyncio
+import time
+from typing import Dict, Optional, Tuple
+
+from pymongo import ReturnDocument
+
+from ..metrics import counter
+
+__all__ = ["LocalBucketBackend", "MongoBucketBackend", "RateLimiter"]
+
+granted = counter("ratelimit_granted")
+waited = counter("ratelimit_waited")
+rejected = counter("ratelimit_rejected")
+
+
+class LocalBucketBackend:
+    """
+    进程内的令牌桶
+    """
+
+    def __init__(self):
+        self._buckets: Dict[str, Tuple[float, float]] = {}
+
+    async def take(self, key: str, rate: float, capacity: float) -> float:
+        """
+        尝试取一个令牌，成功返回 0，否则返回还需等待的秒数
+        """
+        now = time.monotonic()
+        tokens, updated_at = self._buckets.get(key, (capacity, now))
+        tokens = min(capacity, tokens + (now - updated_at) * rate)
+        if tokens >= 1:
+            self._buckets[key] = (tokens - 1, now)
+            return 0.0
+        self._buckets[key] = (tokens, now)
+        return (1 - tokens) / rate
+
+
+class MongoBucketBackend:
+    """
+    存放在 Mongo 集合中的令牌桶，每次取令牌是一次原子的 findOneAndUpdate
+
+    Args:
+        collection: Motor 集合，每个桶一个文档，_id 为桶的 key
+    """
+
+    def __init__(self, collection):
+        self.collection = collection
+
+    async def take(self, key: str, rate: float, capacity: float) -> float:
+        now = time.time()
+        refilled = {
+            "$min": [
+                capacity,
+                {
+                    "$add": [
+                        {"$ifNull": ["$tokens", capacity]},
+                        {
+                            "$multiply": [
+                                {"$max": [0, {"$subtract": [now, {"$ifNull": ["$updated_at", now]}]}]},
+                                rate,
+                            ]
+                        },
+                    ]
+                },
+            ]
+        }
+        doc = await self.collection.find_one_and_update(
+            {"_id": key},
+            [
+                {"$set": {"refilled": refilled}},
+                {
+                    "$set": {
+                        "granted": {"$gte": ["$refilled", 1]},
+                        "tokens": {
+                            "$cond": [
+                                {"$gte": ["$refilled", 1]},
+                                {"$subtract": ["$refilled", 1]},
+                                "$refilled",
+                            ]
+                        },
+                        "updated_at": now,
+                    }
+                },
+                {"$project": {"refilled": 0}},
+            ],
+            upsert=True,
+            return_document=ReturnDocument.AFTER,
+        )
+        if doc["granted"]:
+            return 0.0
+        return (1 - doc["tokens"]) / rate
+
+
+class RateLimiter:
+    """
+    令牌桶限流器
+
+    Args:
+        name (str): 用于指标统计的名称
+
+        rate (float): 每秒补充的令牌数
+
+        capacity (float): 桶容量，即允许的突发请求数
+
+        max_wait (float): 排队等待令牌的最长秒数，超过则立即失败
+
+        backend: 令牌桶后端，默认为进程内
+    """
+
+    def __init__(
+        self,
+        name: str,
+        rate: float,
+        capacity: float,
+        max_wait: float,
+        backend: Optional[object] = None,
+    ):
+        self.name = name
+        self.rate = rate
+        self.capacity = capacity
+        self.max_wait = max_wait
+        self.backend = backend or LocalBucketBackend()
+
+    async def acquire(self, key: str = "", max_wait: Optional[float] = None) -> bool:
+        """
+        取一个令牌，必要时排队等待
+
+        Args:
+            key (str): 桶的 key，同一限流器下不同 key 互不影响
+
+            max_wait (float, optional): 本次最多等待的秒数，不能超过限流器的 max_wait
+
+        Returns:
+            bool: 是否在等待时间内取到令牌
+        """
+        budget = self.max_wait if max_wait is None else min(max_wait, self.max_wait)
+        bucket = f"{self.name}:{key}"
+        start = time.monotonic()
+        while True:
+            wait = await self.backend.take(bucket, self.rate, self.capacity)
+            if wait <= 0:
+                granted.inc(self.name)
+                return True
+            if time.monotonic() - start + wait > budget:
+                rejected.inc(self.name)
+                return False
+            waited.inc(self.name)
+            await asyncio.sleep(wait)
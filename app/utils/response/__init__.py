@@ -0,0 +1,146 @@
+"""
+响应相关的工具
+"""
+
+import hashlib
+from typing import Any, AsyncIterator, Mapping
+
+from fastapi import Request
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+
+from ..serializer import dumps, loads
+
+__all__ = [
+    "FastJSONResponse",
+    "PreparedJSON",
+    "PreparedJSONResponse",
+    "StreamingJSONArrayResponse",
+    "TrustableResponse",
+]
+
+
+def _trustable_headers(trustable: bool, headers: Mapping[str, str] = None) -> dict:
+    headers = dict(headers) if headers else {}
+    headers["Trustable"] = "true" if trustable else "false"
+    return headers
+
+
+class FastJSONResponse(JSONResponse):
+    """
+    使用 `app.utils.serializer` 序列化的 JSON 响应
+    """
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+class TrustableResponse(FastJSONResponse):
+    """
+    带 `Trustable` 头的 JSON 响应
+
+    `Trustable` 为 `false` 时表示返回的是已过期的缓存数据，后台正在刷新。
+    """
+
+    def __init__(
+        self,
+        content: Any,
+        trustable: bool = True,
+        headers: Mapping[str, str] = None,
+        **kwargs,
+    ):
+        super().__init__(
+            content=content, headers=_trustable_headers(trustable, headers), **kwargs
+        )
+
+
+class PreparedJSON:
+    """
+    预先序列化好的 JSON 响应体和它的强 ETag
+
+    可以直接放进缓存，命中时不再需要校验模型和重新序列化。
+    """
+
+    __slots__ = ("body", "etag")
+
+    def __init__(self, body: bytes):
+        self.body = body
+        self.etag = f'"{hashlib.blake2b(body, digest_size=16).hexdigest()}"'
+
+    @classmethod
+    def dump(cls, content: Any) -> "PreparedJSON":
+        return cls(dumps(content))
+
+    def loads(self) -> Any:
+        return loads(self.body)
+
+    def __len__(self) -> int:
+        return len(self.body)
+
+
+def _etag_match(if_none_match: str, etag: str) -> bool:
+    for tag in if_none_match.split(","):
+        tag = tag.strip()
+        if tag == "*" or tag.removeprefix("W/") == etag:
+            return True
+    return False
+
+
+class PreparedJSONResponse(Response):
+    """
+    直接返回 `PreparedJSON` 的响应，带 `ETag` 和 `Trustable` 头
+
+    传入 `request` 时会处理 `If-None-Match`，ETag 一致则返回 304。
+    """
+
+    media_type = "application/json"
+
+    def __init__(
+        self,
+        content: PreparedJSON,
+        trustable: bool = True,
+        request: Request = None,
+        headers: Mapping[str, str] = None,
+    ):
+        headers = _trustable_headers(trustable, headers)
+        headers["ETag"] = content.etag
+        if_none_match = request.headers.get("if-none-match") if request else None
+        if if_none_match and _etag_match(if_none_match, content.etag):
+            super().__init__(status_code=304, headers=headers)
+        else:
+            super().__init__(content=content.body, headers=headers)
+
+
+class StreamingJSONArrayResponse(StreamingResponse):
+    """
+    把异步迭代器逐个序列化，以 JSON 数组流式返回，带 `Trustable` 头
+
+    内存占用与数组长度无关，适合全量导出。
+    """
+
+    media_type = "application/json"
+    chunk_size = 64 * 1024
+
+    def __init__(
+        self,
+        content: AsyncIterator[Any],
+        trustable: bool = True,
+        headers: Mapping[str, str] = None,
+    ):
+        super().__init__(
+            content=self._iter_array(content),
+            headers=_trustable_headers(trustable, headers),
+        )
+
+    async def _iter_array(self, items: AsyncIterator[Any]) -> AsyncIterator[bytes]:
+        chunk = bytearray(b"[")
+        first = True
+        async for item in items:
+            if not first:
+                chunk += b","
+            first = False
+            chunk += dumps(item)
+            if len(chunk) >= self.chunk_size:
+                yield bytes(chunk)
+                chunk.clear()
+        chunk += b"]"
+        yield bytes(chunk)
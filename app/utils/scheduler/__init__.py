@@ -0,0 +1,331 @@
+"""
+按访问热度调度的后台刷新
+"""
+
+import asyncio
+import heapq
+import math
+import time
+from datetime import datetime
+from typing import Awaitable, Callable, Dict, Hashable, List, Optional, Tuple
+
+from ..log import logger
+from ..metrics import counter, gauge
+
+__all__ = ["RefreshScheduler", "TIERS"]
+
+refresh_items = counter("refresh_items")
+refresh_failures = counter("refresh_failures")
+refresh_queue_depth = gauge("refresh_queue_depth")
+refresh_lag = gauge("refresh_lag_seconds")
+refresh_tracked = gauge("refresh_tracked")
+
+EPOCH = datetime(1970, 1, 1)
+
+# (层级, 最低热度, 刷新间隔相对 base_interval 的倍数)，热度为半衰期内的近似访问次数
+TIERS = (
+    ("hot", 50.0, 0.25),
+    ("warm", 5.0, 1.0),
+    ("cold", 0.0, 4.0),
+)
+
+# 刷新函数: 一批 key -> {key: 用于判断是否变化的值，如修改时间}
+Refresher = Callable[[List[Hashable]], Awaitable[Dict[Hashable, Optional[str]]]]
+
+
+def _timestamp(sync_at: datetime) -> float:
+    return (sync_at - EPOCH).total_seconds()
+
+
+class _Item:
+    __slots__ = (
+        "score",
+        "touched_at",
+        "synced_at",
+        "due",
+        "version",
+        "changed_at",
+        "change_interval",
+        "queued",
+        "tier",
+    )
+
+    def __init__(self, now: float):
+        self.score = 0.0
+        self.touched_at = now
+        self.synced_at: Optional[float] = None
+        self.due: Optional[float] = None
+        self.version: Optional[str] = None
+        self.changed_at: Optional[float] = None
+        # 观察到的平均变化间隔 (EWMA)，没有观察到变化前为 None
+        self.change_interval: Optional[float] = None
+        self.queued = False
+        # 安排下次刷新时所在的层级
+        self.tier: Optional[str] = None
+
+
+class RefreshScheduler:
+    """
+    按热度和变化频率为每个条目计算下次刷新时间，到期后分批交给有界的 worker 池刷新
+
+    - 热度: 每次访问 +1，按 `half_life` 指数衰减，决定条目所在的层级 (TIERS)
+    - 变化频率: 刷新时比较 refresher 返回的值，估计平均变化间隔，经常变化的缩短间隔
+    - 热度衰减到 `min_score` 以下的条目不再主动刷新，回到访问时按 sync_interval 刷新
+
+    未 start() 时 touch() 不记录，interval() 返回 base_interval。
+
+    Args:
+        name (str): 用于指标统计的名称
+
+        refreshers (Dict[str, Refresher]): 每种条目的批量刷新函数
+
+        base_interval (float): 基准刷新间隔，一般为 sync_interval
+
+        min_interval (float): 刷新间隔下限
+
+        max_interval (float): 刷新间隔上限
+
+        half_life (float): 热度半衰期秒数
+
+        workers (int): 并发刷新的批数
+
+        batch_size (int): 每批刷新的条目数
+
+        max_items (int): 最多跟踪的条目数，超出时丢弃热度最低的
+
+        min_score (float): 低于这个热度的条目不再主动刷新
+
+        prune_interval (float): 检查是否超出 max_items 的间隔秒数
+    """
+
+    def __init__(
+        self,
+        name: str,
+        refreshers: Dict[str, Refresher],
+        base_interval: float,
+        min_interval: float,
+        max_interval: float,
+        half_life: float,
+        workers: int = 4,
+        batch_size: int = 50,
+        max_items: int = 100000,
+        min_score: float = 0.5,
+        prune_interval: float = 60,
+    ):
+        self.name = name
+        self.refreshers = refreshers
+        self.base_interval = base_interval
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.half_life = half_life
+        self.workers = workers
+        self.batch_size = batch_size
+        self.max_items = max_items
+        self.min_score = min_score
+        self.prune_interval = prune_interval
+        self.enabled = False
+        self._items: Dict[Tuple[str, Hashable], _Item] = {}
+        self._heap: List[Tuple[float, str, Hashable]] = []
+        self._queue: Optional[asyncio.Queue] = None
+        self._tasks: List[asyncio.Task] = []
+        # 每个层级已到期、等待或正在刷新的条目数，按条目安排刷新时的层级计数
+        self._queued: Dict[str, int] = {tier[0]: 0 for tier in TIERS}
+
+    def _decayed(self, item: _Item, now: float) -> float:
+        return item.score * math.exp(-(now - item.touched_at) * math.log(2) / self.half_life)
+
+    def touch(self, kind: str, key: Hashable, sync_at: Optional[datetime] = None) -> None:
+        """
+        记录一次访问，sync_at 为数据当前的同步时间，已知时据此安排下次刷新
+        """
+        if not self.enabled:
+            return
+        now = time.time()
+        item = self._items.get((kind, key))
+        if item is None:
+            item = self._items[(kind, key)] = _Item(now)
+        item.score = self._decayed(item, now) + 1
+        item.touched_at = now
+        if item.queued:
+            return
+        if sync_at is not None and (
+            item.synced_at is None or _timestamp(sync_at) > item.synced_at
+        ):
+            # 数据在别处被刷新过，按新的同步时间重新安排
+            item.synced_at = _timestamp(sync_at)
+            self._schedule(kind, key, item)
+        elif item.synced_at is not None and self._tier(item.score)[0] != item.tier:
+            # 热度跨过了层级，按新层级的间隔重新安排
+            self._schedule(kind, key, item)
+
+    def tier(self, kind: str, key: Hashable) -> str:
+        item = self._items.get((kind, key))
+        score = self._decayed(item, time.time()) if item is not None else 0.0
+        return self._tier(score)[0]
+
+    def _tier(self, score: float) -> Tuple[str, float, float]:
+        for tier in TIERS:
+            if score >= tier[1]:
+                return tier
+        return TIERS[-1]
+
+    def interval(self, kind: str, key: Hashable) -> float:
+        """
+        条目的刷新间隔: 层级倍数 x 变化频率系数，限制在 [min_interval, max_interval]
+        """
+        item = self._items.get((kind, key)) if self.enabled else None
+        if item is None:
+            return self.base_interval
+        _, _, factor = self._tier(self._decayed(item, time.time()))
+        if item.change_interval is not None:
+            # 变化越频繁间隔越短，系数限制在 0.5 ~ 2
+            factor *= min(max(item.change_interval / self.base_interval, 0.5), 2.0)
+        return min(max(self.base_interval * factor, self.min_interval), self.max_interval)
+
+    def _schedule(self, kind: str, key: Hashable, item: _Item) -> None:
+        item.tier = self._tier(self._decayed(item, time.time()))[0]
+        item.due = item.synced_at + self.interval(kind, key)
+        heapq.heappush(self._heap, (item.due, kind, key))
+
+    def start(self) -> None:
+        """
+        启动调度和 worker，需要在事件循环中调用
+        """
+        self.enabled = True
+        # 队列有界，worker 忙不过来时调度等待，不会无限积压
+        self._queue = asyncio.Queue(maxsize=self.workers * 2)
+        self._tasks = [asyncio.create_task(self._dispatch())] + [
+            asyncio.create_task(self._work()) for _ in range(self.workers)
+        ]
+
+    def stop(self) -> None:
+        self.enabled = False
+        for task in self._tasks:
+            task.cancel()
+        self._tasks = []
+        # 队列中未刷新的条目放回堆中，重新 start() 后照常调度
+        for (kind, key), item in self._items.items():
+            if item.queued:
+                item.queued = False
+                heapq.heappush(self._heap, (item.due, kind, key))
+        self._queued = {tier[0]: 0 for tier in TIERS}
+
+    def _pop_due(self, now: float) -> Dict[str, List[Hashable]]:
+        due: Dict[str, List[Hashable]] = {}
+        while self._heap and self._heap[0][0] <= now:
+            at, kind, key = heapq.heappop(self._heap)
+            item = self._items.get((kind, key))
+            # 堆中可能有已重新安排或已丢弃的旧条目
+            if item is None or item.queued or item.due != at:
+                continue
+            if self._decayed(item, now) < self.min_score:
+                del self._items[(kind, key)]
+                continue
+            item.queued = True
+            self._queued[item.tier] += 1
+            due.setdefault(kind, []).append(key)
+        return due
+
+    async def _dispatch(self) -> None:
+        pruned_at = time.time()
+        while True:
+            now = time.time()
+            for kind, keys in self._pop_due(now).items():
+                for i in range(0, len(keys), self.batch_size):
+                    await self._queue.put((kind, keys[i : i + self.batch_size]))
+            if now - pruned_at >= self.prune_interval:
+                self._prune(now)
+                pruned_at = now
+            self._report()
+            await asyncio.sleep(1)
+
+    async def _work(self) -> None:
+        while True:
+            kind, keys = await self._queue.get()
+            try:
+                await self._refresh(kind, keys)
+            finally:
+                self._queue.task_done()
+
+    async def _refresh(self, kind: str, keys: List[Hashable]) -> None:
+        now = time.time()
+        lags: Dict[str, float] = {}
+        for key in keys:
+            item = self._items.get((kind, key))
+            if item is not None:
+                tier = self._tier(self._decayed(item, now))[0]
+                lags[tier] = max(lags.get(tier, 0.0), now - item.due)
+        for tier, lag in lags.items():
+            refresh_lag.set(round(lag, 3), f"{self.name}:{tier}")
+
+        try:
+            versions = await self.refreshers[kind](keys)
+        except Exception as e:
+            refresh_failures.inc(f"{self.name}:{kind}", len(keys))
+            logger.warning(f"{self.name} 刷新 {kind} {keys[0]}.. 共 {len(keys)} 个失败: {e!r}")
+            versions = None
+
+        now = time.time()
+        for key in keys:
+            item = self._items.get((kind, key))
+            if item is None:
+                continue
+            item.queued = False
+            self._queued[item.tier] -= 1
+            if versions is None:
+                # 失败时按最短间隔重试
+                item.due = now + self.min_interval
+                heapq.heappush(self._heap, (item.due, kind, key))
+                continue
+            if key not in versions:
+                # 上游已没有这个条目
+                del self._items[(kind, key)]
+                continue
+            self._observe(item, versions[key], now)
+            item.synced_at = now
+            self._schedule(kind, key, item)
+        if versions is not None:
+            refresh_items.inc(f"{self.name}:{kind}", len(versions))
+
+    def _observe(self, item: _Item, version: Optional[str], now: float) -> None:
+        """
+        记录刷新结果，值变化时更新平均变化间隔
+        """
+        if item.version is not None and version != item.version:
+            since = item.changed_at if item.changed_at is not None else item.synced_at
+            if since is not None:
+                elapsed = now - since
+                item.change_interval = (
+                    elapsed
+                    if item.change_interval is None
+                    else 0.7 * item.change_interval + 0.3 * elapsed
+                )
+            item.changed_at = now
+        item.version = version
+
+    def _prune(self, now: float) -> None:
+        """
+        超出 max_items 时丢弃热度最低的条目，回到 max_items 以内
+
+        两次检查之间新增的条目可能暂时超出 max_items。
+        """
+        excess = len(self._items) - self.max_items
+        if excess <= 0:
+            return
+        drop = heapq.nsmallest(
+            excess,
+            (key for key, item in self._items.items() if not item.queued),
+            key=lambda key: self._decayed(self._items[key], now),
+        )
+        for key in drop:
+            del self._items[key]
+        self._heap = [entry for entry in self._heap if (entry[1], entry[2]) in self._items]
+        heapq.heapify(self._heap)
+
+    def _report(self) -> None:
+        """
+        每个层级等待刷新 (已到期或已排队) 的条目数，计数在出入队时维护，不遍历条目
+        """
+        for tier, n in self._queued.items():
+            refresh_queue_depth.set(n, f"{self.name}:{tier}")
+        refresh_tracked.set(len(self._items), self.name)
@@ -0,0 +1,395 @@
+"""
+进程内的 Mod 搜索索引
+"""
+
+import heapq
+import re
+import time
+from bisect import bisect_left, insort
+from typing import (
+    AsyncIterable,
+    Callable,
+    Dict,
+    Iterable,
+    List,
+    NamedTuple,
+    Optional,
+    Set,
+    Tuple,
+)
+
+from ..metrics import gauge
+
+__all__ = ["SearchQuery", "SearchIndex", "SEARCH_FIELDS", "SORTABLE_FIELDS"]
+
+index_entries = gauge("search_index_entries")
+index_tokens = gauge("search_index_tokens")
+
+# 建索引需要的 ModInfo 字段，加载时作为投影使用
+SEARCH_FIELDS = {
+    "modId",
+    "gameId",
+    "classId",
+    "name",
+    "slug",
+    "summary",
+    "authors",
+    "categories",
+    "primaryCategoryId",
+    "latestFilesIndexes",
+    "isFeatured",
+    "downloadCount",
+    "gamePopularityRank",
+    "thumbsUpCount",
+    "dateModified",
+    "dateReleased",
+}
+
+# 英文数字按词切分，中日韩文字按单字切分
+_TOKEN = re.compile(r"[0-9a-z]+|[\u3040-\u30ff\u3400-\u9fff\uac00-\ud7af]")
+_VERSION = re.compile(r"^\d+(?:\.\d+)*$")
+
+
+def tokenize(text: Optional[str]) -> List[str]:
+    return _TOKEN.findall(text.lower()) if text else []
+
+
+def _version_key(version: str) -> Tuple[int, ...]:
+    return tuple(int(i) for i in version.split("."))
+
+
+class SearchQuery(NamedTuple):
+    """
+    搜索的筛选条件，不含排序和分页，同一组条件的结果数用于估计本地覆盖率
+    """
+
+    gameId: int = 432
+    classId: Optional[int] = None
+    categoryId: Optional[int] = None
+    gameVersion: Optional[str] = None
+    gameVersionTypeId: Optional[int] = None
+    modLoaderType: Optional[int] = None
+    slug: Optional[str] = None
+    searchFilter: Optional[str] = None
+
+    def canonical(self) -> "SearchQuery":
+        """
+        去掉不影响结果的差异: 搜索词只保留切分后的词，加载器 0 (Any) 视为不限
+        """
+        return self._replace(
+            searchFilter=" ".join(tokenize(self.searchFilter)) or None,
+            modLoaderType=self.modLoaderType or None,
+            slug=self.slug or None,
+            gameVersion=self.gameVersion or None,
+        )
+
+
+class _Entry:
+    __slots__ = (
+        "mod_id",
+        "game_id",
+        "class_id",
+        "slug",
+        "categories",
+        "game_versions",
+        "version_types",
+        "loaders",
+        "tokens",
+        "sort_keys",
+    )
+
+
+def _sort_keys(mod: dict) -> tuple:
+    """
+    按 SearchFilter.SortField 的顺序计算排序值，None 表示没有这个值，始终排在最后
+    """
+    authors = mod.get("authors") or []
+    categories = {c["id"]: c.get("name") for c in mod.get("categories") or []}
+    versions = [
+        _version_key(i["gameVersion"])
+        for i in mod.get("latestFilesIndexes") or []
+        if i.get("gameVersion") and _VERSION.match(i["gameVersion"])
+    ]
+    rank = mod.get("gamePopularityRank")
+    featured = int(bool(mod.get("isFeatured")))
+    popularity = -rank if rank is not None else None
+    return (
+        None,
+        (featured, popularity if popularity is not None else float("-inf")),  # FEATURED
+        popularity,  # POPULARITY，排名越小越热门
+        mod.get("dateModified"),  # LASTUPDATED
+        (mod.get("name") or "").lower() or None,  # NAME
+        (authors[0]["name"].lower() if authors else None),  # AUTHOR
+        mod.get("downloadCount"),  # TOTALDOWNLOADS
+        (categories.get(mod.get("primaryCategoryId")) or "").lower() or None,  # CATEGORY
+        max(versions) if versions else None,  # GAMEVERSION
+        None,  # EARLYACCESS，缓存中没有这个信息
+        (featured, mod.get("dateReleased") or ""),  # FEATUREDRELEASED
+        mod.get("dateReleased"),  # RELEASEDDATE
+        mod.get("thumbsUpCount"),  # RATING
+    )
+
+
+# 本地可以排序的 SortField
+SORTABLE_FIELDS = {1, 2, 3, 4, 5, 6, 7, 8, 10, 11, 12}
+
+
+class SearchIndex:
+    """
+    ModInfo 的倒排索引
+
+    name / slug / summary / 作者名切分成词，每个词对应包含它的 modId 集合，
+    查询词按前缀匹配，多个查询词取交集；其余筛选条件和排序在候选集上逐条判断。
+
+    同时记录上游对同一组筛选条件返回的 totalCount，本地命中数与之相比
+    达到 `coverage` 才认为本地结果可信。
+
+    Args:
+        name (str): 用于指标统计的名称
+
+        coverage (float): 本地命中数至少达到上游结果数的比例
+
+        total_ttl (float): 上游结果数的有效秒数
+
+        max_totals (int): 最多记录的筛选条件数
+    """
+
+    def __init__(
+        self,
+        name: str,
+        coverage: float = 0.9,
+        total_ttl: float = 60 * 60 * 2,
+        max_totals: int = 10000,
+    ):
+        self.name = name
+        self.coverage = coverage
+        self.total_ttl = total_ttl
+        self.max_totals = max_totals
+        # load() 开始后接受写入，完成后才用于查询
+        self.enabled = False
+        self.loaded = False
+        self._entries: Dict[int, _Entry] = {}
+        self._postings: Dict[str, Set[int]] = {}
+        # 所有出现过的词，有序，用于前缀查找；删除的词只从 _postings 中移除
+        self._tokens: List[str] = []
+        self._slugs: Dict[str, int] = {}
+        self._totals: Dict[SearchQuery, Tuple[int, float]] = {}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    async def load(self, mods: AsyncIterable[dict]) -> None:
+        """
+        从包含 SEARCH_FIELDS 的 dict 构建索引，期间 add() 的条目不会丢失
+        """
+        self.enabled = True
+        async for mod in mods:
+            # 已经由 add() 写入的是更新的数据
+            if mod["modId"] not in self._entries:
+                self._add(mod, sort_tokens=False)
+        self._tokens = sorted(self._postings)
+        self.loaded = True
+        self._report()
+
+    def add(self, mod: dict) -> None:
+        """
+        写入或覆盖一个 Mod，`mod` 需要包含 SEARCH_FIELDS
+        """
+        if not self.enabled:
+            return
+        self._add(mod, sort_tokens=self.loaded)
+        self._report()
+
+    def remove(self, mod_id: int) -> None:
+        entry = self._entries.pop(mod_id, None)
+        if entry is None:
+            return
+        for token in entry.tokens:
+            ids = self._postings.get(token)
+            if ids is not None:
+                ids.discard(mod_id)
+                if not ids:
+                    del self._postings[token]
+        if self._slugs.get(entry.slug) == mod_id:
+            del self._slugs[entry.slug]
+
+    def _add(self, mod: dict, sort_tokens: bool) -> None:
+        mod_id = mod["modId"]
+        self.remove(mod_id)
+        entry = _Entry()
+        entry.mod_id = mod_id
+        entry.game_id = mod.get("gameId")
+        entry.class_id = mod.get("classId")
+        entry.slug = mod.get("slug")
+        entry.categories = frozenset(
+            [c["id"] for c in mod.get("categories") or []]
+            + ([mod["primaryCategoryId"]] if mod.get("primaryCategoryId") else [])
+        )
+        indexes = mod.get("latestFilesIndexes") or []
+        entry.game_versions = frozenset(i.get("gameVersion") for i in indexes)
+        entry.version_types = frozenset(i.get("gameVersionTypeId") for i in indexes)
+        entry.loaders = frozenset(i.get("modLoader") for i in indexes)
+        entry.tokens = frozenset(
+            tokenize(mod.get("name"))
+            + tokenize(mod.get("slug"))
+            + tokenize(mod.get("summary"))
+            + [t for a in mod.get("authors") or [] for t in tokenize(a.get("name"))]
+        )
+        entry.sort_keys = _sort_keys(mod)
+
+        self._entries[mod_id] = entry
+        if entry.slug:
+            self._slugs[entry.slug] = mod_id
+        for token in entry.tokens:
+            ids = self._postings.get(token)
+            if ids is None:
+                ids = self._postings[token] = set()
+                if sort_tokens:
+                    i = bisect_left(self._tokens, token)
+                    if i == len(self._tokens) or self._tokens[i] != token:
+                        insort(self._tokens, token, lo=i)
+            ids.add(mod_id)
+
+    def _prefix(self, prefix: str) -> Set[int]:
+        """
+        以 prefix 开头的词对应的全部 modId
+        """
+        result = set()
+        i = bisect_left(self._tokens, prefix)
+        while i < len(self._tokens) and self._tokens[i].startswith(prefix):
+            result.update(self._postings.get(self._tokens[i], ()))
+            i += 1
+        return result
+
+    def _candidates(self, query: SearchQuery) -> Iterable[_Entry]:
+        if query.slug:
+            mod_id = self._slugs.get(query.slug)
+            return [self._entries[mod_id]] if mod_id is not None else []
+        tokens = tokenize(query.searchFilter)
+        if not tokens:
+            return self._entries.values()
+        ids: Optional[Set[int]] = None
+        # 先算最长的词，前缀越长匹配的集合通常越小
+        for token in sorted(set(tokens), key=len, reverse=True):
+            matched = self._prefix(token)
+            ids = matched if ids is None else ids & matched
+            if not ids:
+                return []
+        return [self._entries[i] for i in ids]
+
+    def _filter(self, query: SearchQuery) -> Callable[[_Entry], bool]:
+        def match(entry: _Entry) -> bool:
+            return (
+                (query.gameId is None or entry.game_id == query.gameId)
+                and (query.classId is None or entry.class_id == query.classId)
+                and (query.categoryId is None or query.categoryId in entry.categories)
+                and (query.gameVersion is None or query.gameVersion in entry.game_versions)
+                and (
+                    query.gameVersionTypeId is None
+                    or query.gameVersionTypeId in entry.version_types
+                )
+                and (not query.modLoaderType or query.modLoaderType in entry.loaders)
+            )
+
+        return match
+
+    def _matches(self, query: SearchQuery) -> List[_Entry]:
+        match = self._filter(query)
+        return [entry for entry in self._candidates(query) if match(entry)]
+
+    @staticmethod
+    def _order(
+        entries: List[_Entry],
+        sort_field: int,
+        sort_order: str,
+        limit: Optional[int] = None,
+    ) -> List[int]:
+        """
+        按 sort_field 排序，没有排序值的排在最后，排序值相同时 modId 升序
+
+        给出 limit 时只取前 limit 个，不对全部条目排序。
+        """
+        if sort_order == "asc":
+
+            def key(entry: _Entry):
+                value = entry.sort_keys[sort_field]
+                return (value is None, value, entry.mod_id)
+
+            ordered = (
+                sorted(entries, key=key)
+                if limit is None
+                else heapq.nsmallest(limit, entries, key=key)
+            )
+        else:
+
+            def key(entry: _Entry):
+                value = entry.sort_keys[sort_field]
+                return (value is not None, value, -entry.mod_id)
+
+            ordered = (
+                sorted(entries, key=key, reverse=True)
+                if limit is None
+                else heapq.nlargest(limit, entries, key=key)
+            )
+        return [entry.mod_id for entry in ordered]
+
+    def search(
+        self, query: SearchQuery, sort_field: int = 2, sort_order: str = "desc"
+    ) -> List[int]:
+        """
+        返回符合条件的全部 modId，按 sort_field 排序，没有排序值的排在最后
+
+        sort_field 需要在 SORTABLE_FIELDS 中。
+        """
+        return self._order(self._matches(query), sort_field, sort_order)
+
+    def page(
+        self,
+        query: SearchQuery,
+        sort_field: int,
+        sort_order: str,
+        index: int,
+        page_size: int,
+    ) -> Tuple[List[int], int]:
+        """
+        返回 (排序后第 index 条起的 page_size 个 modId, 符合条件的总数)
+
+        只对前 index + page_size 个条目部分排序。
+        """
+        entries = self._matches(query)
+        ordered = self._order(entries, sort_field, sort_order, limit=index + page_size)
+        return ordered[index:], len(entries)
+
+    def record_total(self, query: SearchQuery, total: int) -> None:
+        """
+        记录上游对这组筛选条件返回的 totalCount
+        """
+        query = query.canonical()
+        self._totals.pop(query, None)
+        self._totals[query] = (total, time.monotonic() + self.total_ttl)
+        while len(self._totals) > self.max_totals:
+            del self._totals[next(iter(self._totals))]
+
+    def total(self, query: SearchQuery) -> Optional[int]:
+        """
+        上游对这组筛选条件返回的 totalCount，没有记录或已过期时返回 None
+        """
+        item = self._totals.get(query.canonical())
+        if item is None or item[1] < time.monotonic():
+            return None
+        return item[0]
+
+    def covers(self, query: SearchQuery, matched: int) -> bool:
+        """
+        本地命中 `matched` 条时是否足以代替上游
+
+        按 slug 查询时本地命中即可；其余查询需要上游记录过结果数，且未过期。
+        """
+        if query.slug:
+            return matched > 0
+        total = self.total(query)
+        return total is not None and matched >= total * self.coverage
+
+    def _report(self) -> None:
+        index_entries.set(len(self._entries), self.name)
+        index_tokens.set(len(self._postings), self.name)
@@ -0,0 +1,56 @@
+"""
+JSON 序列化
+
+优先使用 orjson，其次 msgspec，都没有安装时使用标准库 json。
+
+`loads` 解析失败时统一抛出 `json.JSONDecodeError`。
+"""
+
+import json
+from typing import Any, Union
+
+__all__ = ["dumps", "loads", "BACKEND"]
+
+
+def _json_dumps(obj: Any) -> bytes:
+    return json.dumps(
+        obj, ensure_ascii=False, allow_nan=False, separators=(",", ":")
+    ).encode("utf-8")
+
+
+def _json_loads(data: Union[bytes, str]) -> Any:
+    return json.loads(data)
+
+
+try:
+    import orjson
+
+    BACKEND = "orjson"
+
+    def dumps(obj: Any) -> bytes:
+        return orjson.dumps(obj)
+
+    # orjson.JSONDecodeError 是 json.JSONDecodeError 的子类
+    loads = orjson.loads
+
+except ImportError:
+    try:
+        import msgspec
+
+        BACKEND = "msgspec"
+        _encoder = msgspec.json.Encoder()
+        _decoder = msgspec.json.Decoder()
+
+        def dumps(obj: Any) -> bytes:
+            return _encoder.encode(obj)
+
+        def loads(data: Union[bytes, str]) -> Any:
+            try:
+                return _decoder.decode(data)
+            except msgspec.DecodeError as e:
+                raise json.JSONDecodeError(str(e), str(data[:64]), 0) from e
+
+    except ImportError:
+        BACKEND = "json"
+        dumps = _json_dumps
+        loads = _json_loads
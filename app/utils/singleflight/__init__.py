@@ -0,0 +1,88 @@
+"""
+请求合并 (single-flight)
+
+同一个 key 同时只会有一个上游请求在执行，其余并发调用等待并共享它的结果。
+"""
+
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable
+
+from .. import deadline
+from ..log import logger
+from ..metrics import counter
+
+__all__ = ["SingleFlight"]
+
+originated = counter("singleflight_originated")
+joined = counter("singleflight_joined")
+
+
+class SingleFlight:
+    """
+    按 key 合并并发的异步调用
+
+    Args:
+        name (str): 用于指标统计的名称
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self._calls: Dict[Hashable, asyncio.Future] = {}
+
+    def _start(self, key: Hashable, func: Callable[[], Awaitable[Any]]) -> asyncio.Future:
+        originated.inc(self.name)
+        task = asyncio.ensure_future(func())
+        self._calls[key] = task
+
+        def _done(fut: asyncio.Future):
+            if self._calls.get(key) is fut:
+                del self._calls[key]
+            # 避免没有等待者时出现 "exception was never retrieved"
+            if not fut.cancelled():
+                fut.exception()
+
+        task.add_done_callback(_done)
+        return task
+
+    async def do(self, key: Hashable, func: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        执行 `func`，如果同一个 key 已经有调用在执行，则等待它的结果
+
+        单个调用者被取消不会影响其他等待者。
+        """
+        task = self._calls.get(key)
+        if task is None:
+            task = self._start(key, func)
+        else:
+            joined.inc(self.name)
+        return await asyncio.shield(task)
+
+    def spawn(self, key: Hashable, func: Callable[[], Awaitable[Any]]) -> asyncio.Future:
+        """
+        在后台执行 `func` 而不等待结果，同一个 key 已经有调用在执行时不会重复发起
+
+        用于后台刷新过期数据，异常只记录日志。
+        """
+        task = self._calls.get(key)
+        if task is not None:
+            return task
+
+        async def detached():
+            # 后台任务不受发起它的请求的时间预算限制
+            deadline.clear()
+            return await func()
+
+        task = self._start(key, detached)
+
+        def _log(fut: asyncio.Future):
+            if not fut.cancelled() and fut.exception() is not None:
+                logger.warning(f"{self.name} {key} 后台刷新失败: {fut.exception()!r}")
+
+        task.add_done_callback(_log)
+        return task
+
+    def in_flight(self, key: Hashable) -> bool:
+        return key in self._calls
+
+    def __len__(self) -> int:
+        return len(self._calls)
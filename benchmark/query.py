@@ -0,0 +1,83 @@
+"""
+服务层查询耗时
+
+向本地 MongoDB 写入生成的 Mod 和文件，然后对 `app.database.indexes.SERVICE_QUERIES` 中的每个查询计时并打印执行计划。
+
+需要本地 MongoDB，使用 config/mongodb.json 中的配置，会清空 files、mods 和 fingerprints 集合，请勿在生产库上运行。
+
+用法:
+
+    python -m benchmark.query [--mods 2000] [--files 50] [--repeat 200]
+"""
+
+import argparse
+import asyncio
+import time
+
+from benchmark.serializer import _fake_file, _fake_mod
+
+
+async def seed(n_mods: int, n_files: int):
+    from app.models.database.curseforge import ModInfo, FileInfo, FingerprintInfo
+    from app.service.curseforge import (
+        _alias_fileid,
+        _alias_modid,
+        _save_many_FileInfo,
+        _save_many_ModInfo,
+    )
+
+    for document in (ModInfo, FileInfo, FingerprintInfo):
+        await document.get_motor_collection().delete_many({})
+
+    # 包含 SERVICE_QUERIES 中用到的 modId
+    modids = [238222, 348521] + list(range(10000, 10000 + n_mods - 2))
+    for start in range(0, len(modids), 100):
+        batch = modids[start : start + 100]
+        await _save_many_ModInfo([_alias_modid(_fake_mod(modid)) for modid in batch])
+        await _save_many_FileInfo(
+            [
+                _alias_fileid(_fake_file(modid * 1000 + i, modid))
+                for modid in batch
+                for i in range(n_files)
+            ]
+        )
+        await FingerprintInfo.insert_many(
+            [
+                FingerprintInfo(fingerprint=modid * 1000 + i, modId=modid, fileId=modid * 1000 + i)
+                for modid in batch
+                for i in range(n_files)
+            ]
+        )
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--mods", type=int, default=2000)
+    parser.add_argument("--files", type=int, default=50)
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    from app.database.mongodb import start_async_mongodb, close_async_mongodb
+    from app.database.indexes import SERVICE_QUERIES, explain
+
+    await start_async_mongodb()
+    print(f"写入 {args.mods} 个 Mod，每个 {args.files} 个文件")
+    await seed(args.mods, args.files)
+
+    for query in SERVICE_QUERIES:
+        collection = query.document.get_motor_collection()
+        start = time.perf_counter()
+        for _ in range(args.repeat):
+            cursor = collection.find(query.filter)
+            if query.sort:
+                cursor = cursor.sort(query.sort)
+            await cursor.to_list(length=None)
+        elapsed = (time.perf_counter() - start) / args.repeat
+        stages = ",".join(sorted(await explain(query)))
+        print(f"{query.name:<42} {elapsed * 1000:>8.3f} ms  {stages}")
+
+    await close_async_mongodb()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,113 @@
+"""
+保存 Mod 的数据库往返次数和耗时对比
+
+对比逐个文件 find + delete + insert 的旧写法和 bulk_write upsert 的批量写法，各保存 50 个 Mod。
+
+需要本地 MongoDB，使用 config/mongodb.json 中的配置，会清空 files 和 mods 集合，请勿在生产库上运行。
+
+用法:
+
+    python -m benchmark.save [--mods 50] [--files 8]
+"""
+
+import argparse
+import asyncio
+import time
+
+from pymongo import monitoring
+
+from benchmark.serializer import _fake_mod
+
+
+class CommandCounter(monitoring.CommandListener):
+    def __init__(self):
+        self.count = 0
+
+    def started(self, event):
+        self.count += 1
+
+    def succeeded(self, event):
+        pass
+
+    def failed(self, event):
+        pass
+
+
+command_counter = CommandCounter()
+# 必须在创建 client 之前注册
+monitoring.register(command_counter)
+
+
+async def legacy_save_mod(mod: dict):
+    """
+    旧的写法: 每个文件 find_one + delete + insert，然后 Mod 同样处理
+    """
+    from app.models.database.curseforge import ModInfo, FileInfo
+
+    latestFiles = []
+    for file in mod["latestFiles"]:
+        find_result = await FileInfo.find_one(FileInfo.fileId == file["fileId"])
+        if find_result:
+            await find_result.delete()
+        latestFiles.append(await FileInfo(**file).insert())
+    find_result = await ModInfo.find_one(ModInfo.modId == mod["modId"])
+    mod_model = ModInfo(**mod)
+    mod_model.latestFiles = latestFiles
+    if find_result:
+        await find_result.delete()
+    return await mod_model.insert()
+
+
+def make_mods(n_mods: int, n_files: int) -> list:
+    from app.service.curseforge import _alias_modid
+
+    mods = []
+    for modid in range(10000, 10000 + n_mods):
+        mod = _fake_mod(modid)
+        mod["latestFiles"] = mod["latestFiles"][:n_files]
+        mods.append(_alias_modid(mod))
+    return mods
+
+
+async def run(name: str, func, n_mods: int, n_files: int):
+    mods = make_mods(n_mods, n_files)
+    command_counter.count = 0
+    start = time.perf_counter()
+    await func(mods)
+    elapsed = time.perf_counter() - start
+    print(f"{name:<12} {command_counter.count:>6} 次往返  {elapsed * 1000:>9.1f} ms")
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--mods", type=int, default=50)
+    parser.add_argument("--files", type=int, default=8)
+    args = parser.parse_args()
+
+    from app.database.mongodb import start_async_mongodb, close_async_mongodb
+    from app.models.database.curseforge import ModInfo, FileInfo
+    from app.service.curseforge import _save_many_ModInfo
+
+    await start_async_mongodb()
+
+    async def legacy(mods):
+        for mod in mods:
+            await legacy_save_mod(mod)
+
+    print(f"保存 {args.mods} 个 Mod，每个 {args.files} 个文件")
+    for state in ("新数据", "已存在"):
+        if state == "新数据":
+            await FileInfo.get_motor_collection().delete_many({})
+            await ModInfo.get_motor_collection().delete_many({})
+        print(f"[{state}]")
+        await run("逐个保存", legacy, args.mods, args.files)
+        if state == "新数据":
+            await FileInfo.get_motor_collection().delete_many({})
+            await ModInfo.get_motor_collection().delete_many({})
+        await run("批量保存", _save_many_ModInfo, args.mods, args.files)
+
+    await close_async_mongodb()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
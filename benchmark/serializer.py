@@ -0,0 +1,201 @@
+"""
+JSON 序列化后端的吞吐对比
+
+对 CurseForge `/mods` 和 `/fingerprints` 的响应做 decode + encode，比较标准库 json、orjson 和 msgspec。
+
+用法:
+
+    python -m benchmark.serializer --record   # 用配置中的 API Key 录制响应到 benchmark/data
+    python -m benchmark.serializer            # 使用录制的响应，没有录制时使用生成的数据
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import time
+from typing import Callable, Dict, Tuple
+
+DATA_PATH = os.path.join(os.path.dirname(__file__), "data")
+
+# 一些热门 Mod 和它们的文件指纹
+MODIDS = [238222, 348521, 306612, 394468, 447673, 32274, 223794, 60089, 250398, 268560]
+FINGERPRINTS = [1667027305, 320753275, 3379185637, 2516573219, 1390485596]
+
+
+async def record():
+    from app.sync.curseforge import CurseForgeApi
+
+    os.makedirs(DATA_PATH, exist_ok=True)
+    payloads = {
+        "mods": await CurseForgeApi.get_mods(MODIDS),
+        "fingerprints": await CurseForgeApi.get_fingerprints(FINGERPRINTS),
+    }
+    for name, payload in payloads.items():
+        with open(os.path.join(DATA_PATH, f"{name}.json"), "w", encoding="utf-8") as fd:
+            json.dump(payload, fd, ensure_ascii=False)
+
+
+def _fake_file(fileid: int, modid: int) -> dict:
+    return {
+        "id": fileid,
+        "gameId": 432,
+        "modId": modid,
+        "isAvailable": True,
+        "displayName": f"example-mod-{fileid}.jar",
+        "fileName": f"example-mod-{fileid}.jar",
+        "releaseType": 1,
+        "fileStatus": 4,
+        "hashes": [
+            {"value": "7647a59c2b37c673948b0a35961eabac3a5eda96", "algo": 1},
+            {"value": "9e107d9d372bb6826bd81d3542a419d6", "algo": 2},
+        ],
+        "fileDate": "2024-01-20T05:34:09.887Z",
+        "fileLength": 1234567,
+        "downloadCount": 987654,
+        "downloadUrl": f"https://edge.forgecdn.net/files/{fileid // 1000}/{fileid % 1000}/example-mod-{fileid}.jar",
+        "gameVersions": ["1.20.1", "Fabric", "Forge", "Client", "Server"],
+        "sortableGameVersions": [
+            {
+                "gameVersionName": "1.20.1",
+                "gameVersionPadded": "0000000001.0000000020.0000000001",
+                "gameVersion": "1.20.1",
+                "gameVersionReleaseDate": "2023-06-12T00:00:00Z",
+                "gameVersionTypeId": 75125,
+            }
+        ],
+        "dependencies": [{"modId": 306612, "relationType": 3}],
+        "fileFingerprint": 1667027305 + fileid,
+        "modules": [{"name": "META-INF", "fingerprint": 3172815030}],
+    }
+
+
+def _fake_mod(modid: int) -> dict:
+    return {
+        "id": modid,
+        "gameId": 432,
+        "name": f"Example Mod {modid}",
+        "slug": f"example-mod-{modid}",
+        "links": {
+            "websiteUrl": f"https://www.curseforge.com/minecraft/mc-mods/example-mod-{modid}",
+            "wikiUrl": "",
+            "issuesUrl": "",
+            "sourceUrl": "",
+        },
+        "summary": "An example mod used for serializer benchmarks " * 2,
+        "status": 4,
+        "downloadCount": 123456789,
+        "isFeatured": False,
+        "primaryCategoryId": 423,
+        "categories": [{"id": 423, "gameId": 432, "name": "Map and Information", "slug": "map-information"}],
+        "classId": 6,
+        "authors": [{"id": 1, "name": "someone", "url": "https://www.curseforge.com/members/someone"}],
+        "logo": {
+            "id": modid,
+            "modId": modid,
+            "title": "logo.png",
+            "description": "",
+            "thumbnailUrl": "https://media.forgecdn.net/avatars/thumbnails/0/0/256/256/logo.png",
+            "url": "https://media.forgecdn.net/avatars/0/0/logo.png",
+        },
+        "screenshots": [],
+        "latestFiles": [_fake_file(modid * 100 + i, modid) for i in range(8)],
+        "latestFilesIndexes": [
+            {"gameVersion": "1.20.1", "fileId": modid * 100 + i, "filename": "x.jar", "releaseType": 1, "gameVersionTypeId": 75125, "modLoader": 4}
+            for i in range(60)
+        ],
+        "dateCreated": "2016-01-01T00:00:00Z",
+        "dateModified": "2024-01-20T05:34:09.887Z",
+        "dateReleased": "2024-01-20T05:34:09.887Z",
+        "gamePopularityRank": 1,
+        "thumbsUpCount": 0,
+    }
+
+
+def load_payloads() -> Dict[str, bytes]:
+    payloads = {}
+    for name in ("mods", "fingerprints"):
+        path = os.path.join(DATA_PATH, f"{name}.json")
+        if os.path.exists(path):
+            with open(path, "rb") as fd:
+                payloads[name] = fd.read()
+    if not payloads:
+        print("未找到录制数据，使用生成的数据")
+        mods = {"data": [_fake_mod(modid) for modid in MODIDS]}
+        fingerprints = {
+            "data": {
+                "isCacheBuilt": True,
+                "exactMatches": [
+                    {"id": mod["id"], "file": mod["latestFiles"][0], "latestFiles": mod["latestFiles"]}
+                    for mod in mods["data"]
+                ],
+                "exactFingerprints": [mod["latestFiles"][0]["fileFingerprint"] for mod in mods["data"]],
+                "partialMatches": [],
+                "partialMatchFingerprints": {},
+                "installedFingerprints": FINGERPRINTS,
+                "unmatchedFingerprints": [],
+            }
+        }
+        payloads["mods"] = json.dumps(mods).encode()
+        payloads["fingerprints"] = json.dumps(fingerprints).encode()
+    return payloads
+
+
+def backends() -> Dict[str, Tuple[Callable, Callable]]:
+    result = {
+        "json": (
+            json.loads,
+            lambda obj: json.dumps(obj, ensure_ascii=False, separators=(",", ":")).encode(),
+        )
+    }
+    try:
+        import orjson
+
+        result["orjson"] = (orjson.loads, orjson.dumps)
+    except ImportError:
+        pass
+    try:
+        import msgspec
+
+        result["msgspec"] = (msgspec.json.decode, msgspec.json.encode)
+    except ImportError:
+        pass
+    return result
+
+
+def bench(payload: bytes, loads: Callable, dumps: Callable, seconds: float) -> float:
+    """
+    返回每秒完成的 decode + encode 次数
+    """
+    count = 0
+    start = time.perf_counter()
+    while (elapsed := time.perf_counter() - start) < seconds:
+        for _ in range(10):
+            dumps(loads(payload))
+        count += 10
+    return count / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--record", action="store_true", help="录制 CurseForge 响应")
+    parser.add_argument("--seconds", type=float, default=2.0, help="每项测试时长")
+    args = parser.parse_args()
+
+    if args.record:
+        asyncio.run(record())
+
+    from app.utils.serializer import BACKEND
+
+    print(f"当前使用的后端: {BACKEND}")
+    for name, payload in load_payloads().items():
+        print(f"{name} ({len(payload) / 1024:.1f} KiB)")
+        baseline = None
+        for backend, (loads, dumps) in backends().items():
+            ops = bench(payload, loads, dumps, args.seconds)
+            baseline = baseline or ops
+            print(f"  {backend:<8} {ops:>10.1f} ops/s  {ops * len(payload) / 1024 / 1024:>8.1f} MiB/s  x{ops / baseline:.2f}")
+
+
+if __name__ == "__main__":
+    main()
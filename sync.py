@@ -101,7 +101,7 @@ class CurseforgeCache:
                     log(f"Get mod: {modid} Status: {e.status}",
                         logging=logging.error)
                     if e.status == 403:
-                        time.sleep(60 * 20)
+                        await asyncio.sleep(60 * 20)
                         log("=================OQS limit====================", logging=logging.warning, to_qq=True)
                 except asyncio.TimeoutError:
                     log(f"Get mod: {modid} Timeout", logging=logging.error)
@@ -128,7 +128,7 @@ class CurseforgeCache:
                     log(f"Get game: {gameid} Status: {e.status}",
                         logging=logging.error)
                     if e.status == 403:
-                        time.sleep(60 * 20)
+                        await asyncio.sleep(60 * 20)
                         log("=================OQS limit====================", logging=logging.warning, to_qq=True)
                 except asyncio.TimeoutError:
                     log(f"Get game: {gameid} Timeout", logging=logging.error)
@@ -169,7 +169,7 @@ class CurseforgeCache:
                 await asyncio.gather(*tasks)
                 log(f"Finish {modid}/{end_modid} curseforge mods", to_qq=True)
                 tasks.clear()
-                time.sleep(60 * 10)
+                await asyncio.sleep(60 * 10)
         log("Finish ALL MODS", to_qq=True)
         log("Finish sync Curseforge", to_qq=True)
 
@@ -0,0 +1,169 @@
+"""
+测试配置
+
+app 在导入时从工作目录的 ./config/ 读取配置，不存在时写入默认配置，
+因此测试切换到临时目录运行，使用默认配置，日志也写在临时目录中。
+数据库使用 mongomock_motor，不需要 MongoDB。
+"""
+
+import asyncio
+import json
+import os
+import sys
+import tempfile
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+WORKDIR = tempfile.mkdtemp(prefix="mcim-test-")
+os.makedirs(os.path.join(WORKDIR, "config"))
+# 默认的 proxies 为 None，写入后无法再次读取，显式给出空字符串
+with open(os.path.join(WORKDIR, "config", "mcim.json"), "w") as fd:
+    json.dump({"proxies": ""}, fd)
+os.chdir(WORKDIR)
+
+
+async def _init_db() -> None:
+    from beanie import init_beanie
+    from mongomock_motor import AsyncMongoMockClient
+
+    import app.database.mongodb as mongodb
+    from app.models.database.curseforge import (
+        FileInfo,
+        FingerprintInfo,
+        ModFilesSyncInfo,
+        ModInfo,
+    )
+    from app.models.database.modrinth import (
+        ProjectInfo,
+        ProjectVersionsSyncInfo,
+        UnmatchedHashInfo,
+        VersionInfo,
+    )
+
+    client = AsyncMongoMockClient()
+    mongodb.dbcli = client
+    await init_beanie(
+        database=client["test"],
+        document_models=[
+            ModInfo,
+            FileInfo,
+            ModFilesSyncInfo,
+            FingerprintInfo,
+            ProjectInfo,
+            VersionInfo,
+            ProjectVersionsSyncInfo,
+            UnmatchedHashInfo,
+        ],
+    )
+
+
+@pytest.fixture
+def run():
+    """
+    在新的事件循环中运行 `main()`，`db=True` 时先初始化内存数据库
+    """
+
+    def run(main, db: bool = False):
+        async def wrapper():
+            if db:
+                await _init_db()
+            return await main()
+
+        return asyncio.run(wrapper())
+
+    return run
+
+
+def curseforge_file(fileid: int, modid: int, **fields) -> dict:
+    """
+    上游格式的 CurseForge 文件
+
+    上游总会返回这些字段；FileInfo 中部分字段声明为非 Optional，存成 null 后无法再读出。
+    """
+    return {
+        "id": fileid,
+        "gameId": 432,
+        "modId": modid,
+        "displayName": f"file-{fileid}",
+        "fileName": f"file-{fileid}.jar",
+        "releaseType": 1,
+        "fileStatus": 4,
+        "hashes": [{"value": f"{fileid:040x}", "algo": 1}],
+        "fileDate": "2024-01-01T00:00:00Z",
+        "fileLength": 1024,
+        "downloadCount": 0,
+        "downloadUrl": f"https://edge.forgecdn.net/files/{fileid}.jar",
+        "gameVersions": ["1.20.1", "Fabric"],
+        "sortableGameVersions": [],
+        "dependencies": [],
+        "fileFingerprint": fileid,
+        **fields,
+    }
+
+
+def curseforge_mod(modid: int, **fields) -> dict:
+    """
+    上游格式的 CurseForge Mod，带一个 latestFiles
+    """
+    return {
+        "id": modid,
+        "gameId": 432,
+        "classId": 6,
+        "name": f"mod-{modid}",
+        "slug": f"mod-{modid}",
+        "summary": "",
+        "latestFiles": [curseforge_file(modid * 10, modid)],
+        "latestFilesIndexes": [],
+        "dateModified": "2024-01-01T00:00:00Z",
+        **fields,
+    }
+
+
+class FakeApi:
+    """
+    替换服务层的 `api`，记录每次调用的 (方法名, 位置参数, 关键字参数)
+
+    方法由测试通过 `on(name, handler)` 提供，handler 可以是普通函数或协程函数。
+    """
+
+    def __init__(self):
+        self.calls = []
+
+    def on(self, name: str, handler) -> "FakeApi":
+        async def method(*args, **kwargs):
+            self.calls.append((name, args, kwargs))
+            result = handler(*args, **kwargs)
+            if asyncio.iscoroutine(result):
+                result = await result
+            return result
+
+        setattr(self, name, method)
+        return self
+
+    def called(self, name: str) -> list:
+        """
+        对 `name` 的每次调用的第一个参数
+        """
+        return [
+            args[0] if args else next(iter(kwargs.values()), None)
+            for method, args, kwargs in self.calls
+            if method == name
+        ]
+
+
+@pytest.fixture(name="curseforge_file")
+def curseforge_file_fixture():
+    return curseforge_file
+
+
+@pytest.fixture(name="curseforge_mod")
+def curseforge_mod_fixture():
+    return curseforge_mod
+
+
+@pytest.fixture
+def fake_api():
+    return FakeApi()
@@ -0,0 +1,138 @@
+"""
+熔断器状态机: 达到阈值熔断、熔断期间拒绝、半开探测成功恢复或失败继续熔断
+"""
+
+import pytest
+
+from app.utils import breaker
+from app.utils.breaker import CLOSED, HALF_OPEN, OPEN, CircuitBreaker
+from app.utils.metrics import counter
+
+
+class FakeClock:
+    """
+    代替 breaker 模块中的 time，只有手动 advance 时才前进
+    """
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self) -> float:
+        return self.now
+
+    def advance(self, seconds: float) -> None:
+        self.now += seconds
+
+
+@pytest.fixture
+def clock(monkeypatch) -> FakeClock:
+    clock = FakeClock()
+    monkeypatch.setattr(breaker, "time", clock)
+    return clock
+
+
+def _breaker(name: str) -> CircuitBreaker:
+    return CircuitBreaker(
+        name, failure_threshold=3, slow_call_duration=1, reset_timeout=10
+    )
+
+
+def _open(cb: CircuitBreaker) -> None:
+    for _ in range(cb.failure_threshold):
+        cb.record(False)
+
+
+def test_opens_after_consecutive_failures(clock):
+    cb = _breaker("breaker-threshold")
+
+    cb.record(False)
+    cb.record(False)
+    assert cb.state == CLOSED
+    assert cb.allow()
+    cb.record(False)
+
+    assert cb.state == OPEN
+    assert counter("breaker_transitions").values["breaker-threshold:open"] == 1
+
+
+def test_success_resets_failure_count(clock):
+    cb = _breaker("breaker-reset-count")
+
+    cb.record(False)
+    cb.record(False)
+    cb.record(True)
+    cb.record(False)
+    cb.record(False)
+
+    assert cb.state == CLOSED
+    assert cb.failures == 2
+
+
+def test_slow_call_counts_as_failure(clock):
+    cb = _breaker("breaker-slow")
+
+    for _ in range(3):
+        cb.record(True, duration=2)
+
+    assert cb.state == OPEN
+
+
+def test_open_breaker_rejects_calls(clock):
+    cb = _breaker("breaker-reject")
+    _open(cb)
+    clock.advance(4)
+
+    assert not cb.available()
+    assert not cb.allow()
+    assert not cb.allow()
+    assert cb.retry_after() == pytest.approx(6)
+    assert counter("breaker_rejections").values["breaker-reject"] == 2
+
+
+def test_half_open_allows_a_single_probe(clock):
+    cb = _breaker("breaker-probe")
+    _open(cb)
+    clock.advance(10)
+
+    assert cb.state == HALF_OPEN
+    assert cb.available()
+    assert cb.allow()
+    # 探测进行中，其余请求仍被拒绝
+    assert not cb.allow()
+
+
+def test_successful_probe_closes(clock):
+    cb = _breaker("breaker-probe-ok")
+    _open(cb)
+    clock.advance(10)
+
+    assert cb.allow()
+    cb.record(True)
+
+    assert cb.state == CLOSED
+    assert cb.failures == 0
+    assert cb.retry_after() == 0
+    assert cb.allow() and cb.allow()
+
+
+def test_failed_probe_reopens(clock):
+    cb = _breaker("breaker-probe-fail")
+    _open(cb)
+    clock.advance(10)
+
+    assert cb.allow()
+    clock.advance(1)
+    cb.record(False)
+
+    assert cb.state == OPEN
+    # 重新计时
+    assert cb.retry_after() == pytest.approx(10)
+    clock.advance(10)
+    assert cb.allow()
+
+
+def test_registry_tracks_breakers(clock):
+    cb = _breaker("breaker-registry")
+
+    assert breaker.breakers()["breaker-registry"] is cb
+    assert cb.snapshot() == {"state": CLOSED, "failures": 0, "retry_after": 0.0}
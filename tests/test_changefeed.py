@@ -0,0 +1,37 @@
+"""
+变更同步的后台循环: 出错后继续下一轮，取消时退出
+"""
+
+import asyncio
+
+import pytest
+
+from app.exceptions import ApiException
+from app.sync.changefeed import CurseForgeChangeFeed
+
+
+def test_run_forever_survives_errors_and_stops_on_cancel(run):
+    feed = CurseForgeChangeFeed()
+    errors = [ApiException("upstream"), KeyError("data"), RuntimeError("bulk_write")]
+    runs = []
+
+    async def run_once():
+        runs.append(len(runs))
+        if errors:
+            raise errors.pop(0)
+        return 0
+
+    feed.run_once = run_once
+
+    async def main():
+        task = asyncio.create_task(feed.run_forever(0.01))
+        while len(runs) < 5:
+            await asyncio.sleep(0.01)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    run(main)
+
+    assert not errors
+    assert len(runs) >= 5
@@ -0,0 +1,113 @@
+"""
+同步 Mod 全部文件: 第一页之后的页并发拉取，按 fileId 去重，不多请求空页
+"""
+
+import asyncio
+
+import httpx
+
+from app.models.database.curseforge import FileInfo, ModFilesSyncInfo
+from app.service import curseforge
+from app.utils.network.network import set_session
+
+MODID = 238222
+PAGE_SIZE = 50
+
+
+class FakeCurseForge:
+    """
+    按 index / pageSize 分页返回 /mods/{id}/files，记录请求的页和并发数
+
+    `shift` 模拟分页期间发布了新文件: 从第二页起整体后移一位，与上一页重复一个文件。
+    """
+
+    def __init__(self, make_file, total: int, shift: int = 0):
+        self.make_file = make_file
+        self.total = total
+        self.shift = shift
+        self.indexes = []
+        self.first_done = False
+        self.started_before_first_done = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def handler(self, request: httpx.Request) -> httpx.Response:
+        assert request.url.path.endswith(f"/mods/{MODID}/files")
+        index = int(request.url.params.get("index", 0))
+        page_size = int(request.url.params["pageSize"])
+        self.indexes.append(index)
+        if index > 0 and not self.first_done:
+            self.started_before_first_done += 1
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(0.05)
+        finally:
+            self.in_flight -= 1
+        if index == 0:
+            self.first_done = True
+        start = index - self.shift if index > 0 else index
+        ids = list(range(start + 1, min(start + page_size, self.total) + 1))
+        return httpx.Response(
+            200,
+            json={
+                "data": [self.make_file(i, MODID) for i in ids],
+                "pagination": {
+                    "index": index,
+                    "pageSize": page_size,
+                    "resultCount": len(ids),
+                    "totalCount": self.total,
+                },
+            },
+        )
+
+
+def _sync(run, fake: FakeCurseForge):
+    async def main():
+        set_session(
+            httpx.AsyncClient(transport=httpx.MockTransport(fake.handler)),
+            "curseforge",
+        )
+        files = await curseforge._sync_mod_files(MODID)
+        saved = await FileInfo.find({"modId": MODID}).count()
+        sync_info = await ModFilesSyncInfo.find_one({"modId": MODID})
+        return files, saved, sync_info
+
+    return run(main, db=True)
+
+
+def test_pages_after_first_are_fetched_concurrently(run, curseforge_file):
+    fake = FakeCurseForge(curseforge_file, total=4 * PAGE_SIZE + 10)
+    files, saved, sync_info = _sync(run, fake)
+
+    assert fake.indexes[0] == 0
+    assert fake.started_before_first_done == 0
+    assert sorted(fake.indexes) == [0, 50, 100, 150, 200]
+    assert fake.max_in_flight > 1
+    assert len(files) == saved == 4 * PAGE_SIZE + 10
+    assert sync_info is not None
+
+
+def test_files_are_deduplicated_by_file_id(run, curseforge_file):
+    fake = FakeCurseForge(curseforge_file, total=3 * PAGE_SIZE, shift=1)
+    files, saved, _ = _sync(run, fake)
+
+    fileids = [file["fileId"] for file in files]
+    assert len(fileids) == len(set(fileids))
+    # 第二、三页各与上一页重复一个文件，最后一个文件被挤到了不存在的第四页
+    assert len(fileids) == saved == 3 * PAGE_SIZE - 1
+
+
+def test_no_empty_page_when_total_is_multiple_of_page_size(run, curseforge_file):
+    fake = FakeCurseForge(curseforge_file, total=3 * PAGE_SIZE)
+    files, _, _ = _sync(run, fake)
+
+    assert sorted(fake.indexes) == [0, 50, 100]
+    assert len(files) == 3 * PAGE_SIZE
+
+
+def test_single_page_makes_one_request(run, curseforge_file):
+    fake = FakeCurseForge(curseforge_file, total=PAGE_SIZE)
+    _sync(run, fake)
+
+    assert fake.indexes == [0]
@@ -0,0 +1,88 @@
+"""
+指纹内存索引: 加载期间的写入、合并覆盖旧条目、未匹配的指纹
+"""
+
+import asyncio
+from datetime import datetime
+
+from app.utils.fingerprint import FingerprintIndex
+
+SYNC_AT = datetime(2024, 1, 1, 12, 0, 0, 500000)
+
+
+def _load(index: FingerprintIndex, rows: list, during=None) -> None:
+    """
+    加载 rows，每产出一条后调用一次 during(i)，模拟加载期间并发的写入
+    """
+
+    async def entries():
+        for i, row in enumerate(rows):
+            yield row
+            if during is not None:
+                during(i)
+            await asyncio.sleep(0)
+
+    asyncio.run(index.load(entries()))
+
+
+def test_adds_during_load_are_kept():
+    index = FingerprintIndex("test")
+    rows = [(fingerprint, 1, fingerprint, SYNC_AT) for fingerprint in range(0, 4000, 2)]
+
+    # 加载期间写入 2000 个新指纹，超过快照为空时的合并阈值
+    def during(i):
+        index.add(100001 + i, 2, i, SYNC_AT)
+
+    _load(index, rows, during)
+
+    assert index.loaded
+    assert len(index) == 4000
+    assert all(100001 + i in index for i in range(2000))
+    assert all(fingerprint in index for fingerprint in range(0, 4000, 2))
+
+
+def test_add_during_load_overrides_snapshot_row():
+    index = FingerprintIndex("test")
+    rows = [(7, 1, 10, SYNC_AT), (9, 1, 11, SYNC_AT)]
+
+    _load(index, rows, lambda i: index.add(7, 2, 20, SYNC_AT) if i == 1 else None)
+
+    assert index.get(7).modId == 2
+    assert index.get(7).fileId == 20
+
+
+def test_compaction_replaces_stale_snapshot_entry():
+    index = FingerprintIndex("test")
+    _load(index, [(fingerprint, 1, fingerprint, SYNC_AT) for fingerprint in range(10)])
+
+    index.add(5, 3, 50, SYNC_AT)
+    index._compact()
+
+    assert not index._pending
+    assert list(index._fingerprints) == list(range(10))
+    entry = index.get(5)
+    assert (entry.modId, entry.fileId, entry.sync_at) == (3, 50, SYNC_AT)
+
+
+def test_lookup_reports_unmatched_entries():
+    index = FingerprintIndex("test")
+    _load(index, [(1, 5, 50, SYNC_AT), (2, None, None, SYNC_AT), (3, None, None, None)])
+    index.add(4, None, None, SYNC_AT)
+
+    found = index.lookup([1, 2, 3, 4, 99])
+
+    assert sorted(found) == [1, 2, 3, 4]
+    assert found[1].exist and found[1].modId == 5
+    for fingerprint in (2, 3, 4):
+        assert not found[fingerprint].exist
+        assert found[fingerprint].modId is None and found[fingerprint].fileId is None
+    assert found[2].sync_at == SYNC_AT
+    assert found[3].sync_at is None
+
+
+def test_adds_before_load_are_ignored():
+    index = FingerprintIndex("test")
+
+    index.add(1, 1, 1, SYNC_AT)
+
+    assert 1 not in index
@@ -0,0 +1,97 @@
+"""
+Mod 文件的游标分页: 游标编解码、翻页到最后一页、无效游标
+"""
+
+from base64 import urlsafe_b64encode
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app import APP
+from app.models.database.curseforge import FileInfo, ModFilesSyncInfo
+from app.service import curseforge
+
+MODID = 238222
+
+
+def _walk(run, files: list, page_size: int) -> list:
+    """
+    从第一页开始按 nextCursor 翻页，返回每一页的 (fileId 列表, nextCursor)
+    """
+
+    async def main():
+        await curseforge._save_many_FileInfo([curseforge._alias_fileid(f) for f in files])
+        # 已同步过全部文件，不请求上游
+        await ModFilesSyncInfo(modId=MODID).insert()
+        pages = []
+        cursor = None
+        while True:
+            page, trustable = await curseforge.get_mod_files_page(
+                MODID, page_size=page_size, cursor=cursor
+            )
+            assert trustable
+            cursor = page["pagination"]["nextCursor"]
+            pages.append(([file["fileId"] for file in page["data"]], cursor))
+            if cursor is None:
+                return pages
+
+    return run(main, db=True)
+
+
+def _files(curseforge_file, dates: dict) -> list:
+    return [
+        curseforge_file(fileid, MODID, fileDate=f"2024-01-{day:02d}T00:00:00Z")
+        for fileid, day in dates.items()
+    ]
+
+
+def test_cursor_round_trip():
+    file = FileInfo.model_construct(fileDate="2024-01-02T00:00:00Z", fileId=42)
+
+    cursor = curseforge._encode_cursor(file)
+
+    assert curseforge._decode_cursor(cursor) == ("2024-01-02T00:00:00Z", 42)
+
+
+def test_pages_follow_date_then_file_id_until_last_page(run, curseforge_file):
+    # 文件 3 和 4 发布时间相同，跨页时按 fileId 倒序，不重复也不遗漏
+    files = _files(curseforge_file, {1: 1, 2: 2, 3: 3, 4: 3, 5: 5})
+
+    pages = _walk(run, files, page_size=2)
+
+    assert [ids for ids, _ in pages] == [[5, 4], [3, 2], [1]]
+    assert pages[-1][1] is None
+
+
+def test_full_last_page_has_no_next_cursor(run, curseforge_file):
+    files = _files(curseforge_file, {1: 1, 2: 2, 3: 3, 4: 4})
+
+    pages = _walk(run, files, page_size=2)
+
+    assert [ids for ids, _ in pages] == [[4, 3], [2, 1]]
+    assert pages[-1][1] is None
+
+
+@pytest.mark.parametrize(
+    "cursor",
+    [
+        "not base64!",
+        urlsafe_b64encode(b"no separator").decode(),
+        urlsafe_b64encode(b"2024-01-01T00:00:00Z|abc").decode(),
+        urlsafe_b64encode(b"\xff\xfe|1").decode(),
+    ],
+)
+def test_invalid_cursor_is_rejected(cursor):
+    with pytest.raises(ValueError):
+        curseforge._decode_cursor(cursor)
+
+
+def test_invalid_cursor_returns_400():
+    # 游标在访问数据库前校验，不需要初始化数据库
+    client = TestClient(APP)
+
+    resp = client.get(
+        f"/v1/curseforge/mod/{MODID}/files", params={"pageSize": 2, "cursor": "tampered"}
+    )
+
+    assert resp.status_code == 400
@@ -0,0 +1,116 @@
+"""
+按 hash 查询最新版本: 本地没有的 hash 只请求一次 /version_files/update
+"""
+
+import asyncio
+
+import pytest
+
+from app.models.database.modrinth import ProjectVersionsSyncInfo
+from app.service import modrinth
+
+
+def _version(version_id: str, project_id: str, sha1: str, date: str) -> dict:
+    return {
+        "id": version_id,
+        "project_id": project_id,
+        "date_published": date,
+        "loaders": ["fabric"],
+        "game_versions": ["1.20.1"],
+        "files": [
+            {
+                "hashes": {"sha1": sha1, "sha512": sha1 * 4},
+                "url": f"https://cdn.modrinth.com/{version_id}.jar",
+                "filename": f"{version_id}.jar",
+                "primary": True,
+            }
+        ],
+    }
+
+
+def _fake_modrinth(fake_api, versions: list):
+    def latest(hashes, algorithm, loaders=None, game_versions=None):
+        result = {}
+        for value in hashes:
+            for version in versions:
+                if version["files"][0]["hashes"]["sha1"] == value:
+                    result[value] = max(
+                        (v for v in versions if v["project_id"] == version["project_id"]),
+                        key=lambda v: v["date_published"],
+                    )
+        return result
+
+    return (
+        fake_api.on("get_version_from_hashes", lambda hashes, algorithm: {})
+        .on("get_latest_version_from_hashes", latest)
+        .on(
+            "get_project_versions",
+            lambda project_id=None, slug=None: [
+                v for v in versions if v["project_id"] == project_id
+            ],
+        )
+    )
+
+
+OLD = _version("AAAAAAAA", "P1111111", "a" * 40, "2024-01-01T00:00:00Z")
+NEW = _version("BBBBBBBB", "P1111111", "b" * 40, "2024-02-01T00:00:00Z")
+OTHER = _version("CCCCCCCC", "P2222222", "c" * 40, "2024-01-01T00:00:00Z")
+
+
+def _latest(run, hashes: list, local: list = (), synced: list = ()):
+    async def main():
+        await modrinth._save_many_VersionInfo([dict(v) for v in local])
+        for project_id in synced:
+            await ProjectVersionsSyncInfo(project_id=project_id).insert()
+        result = await modrinth.get_latest_versions_from_hashes(hashes, "sha1")
+        # 等待后台同步
+        await asyncio.sleep(0.05)
+        return result
+
+    return run(main, db=True)
+
+
+@pytest.fixture
+def fake(fake_api, monkeypatch):
+    def fake(versions: list):
+        monkeypatch.setattr(modrinth, "api", _fake_modrinth(fake_api, versions))
+        return fake_api
+
+    return fake
+
+
+def test_unknown_hash_makes_one_upstream_request(run, fake):
+    api = fake([OLD, NEW])
+
+    result, trustable = _latest(run, ["a" * 40])
+
+    assert [call[0] for call in api.calls] == ["get_latest_version_from_hashes"]
+    assert api.called("get_latest_version_from_hashes") == [["a" * 40]]
+    assert result["a" * 40]["id"] == NEW["id"]
+    assert trustable
+
+
+def test_synced_project_is_resolved_locally(run, fake):
+    api = fake([OLD, NEW])
+
+    result, trustable = _latest(
+        run, ["a" * 40], local=[OLD, NEW], synced=[OLD["project_id"]]
+    )
+
+    assert api.calls == []
+    assert result["a" * 40]["id"] == NEW["id"]
+    assert trustable
+
+
+def test_known_and_unknown_hashes_share_one_request(run, fake):
+    api = fake([OLD, NEW, OTHER])
+
+    result, _ = _latest(run, ["a" * 40, "c" * 40, "d" * 40], local=[OLD])
+
+    assert [sorted(hashes) for hashes in api.called("get_latest_version_from_hashes")] == [
+        ["a" * 40, "c" * 40, "d" * 40]
+    ]
+    assert api.called("get_version_from_hashes") == []
+    # 只有本地已知的 Project 在后台同步全部版本
+    assert api.called("get_project_versions") == [OLD["project_id"]]
+    assert list(result) == ["a" * 40, "c" * 40]
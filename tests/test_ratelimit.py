@@ -0,0 +1,146 @@
+"""
+令牌桶限流: 突发容量、按速率补充、取不到令牌时带 Retry-After 拒绝，本地和 Mongo 两种后端
+"""
+
+import time
+
+import httpx
+import pytest
+from mongomock_motor import AsyncMongoMockClient
+
+from app.exceptions import RateLimitedException
+from app.utils import ratelimit
+from app.utils.metrics import counter
+from app.utils.network import network
+from app.utils.network.network import Api, set_session
+from app.utils.ratelimit import LocalBucketBackend, MongoBucketBackend, RateLimiter
+
+
+class FakeClock:
+    """
+    代替 ratelimit 模块中的 time，只有手动 advance 时才前进
+    """
+
+    def __init__(self):
+        self.now = 1_700_000_000.0
+
+    def monotonic(self) -> float:
+        return self.now
+
+    def time(self) -> float:
+        return self.now
+
+    def advance(self, seconds: float) -> None:
+        self.now += seconds
+
+
+@pytest.fixture
+def clock(monkeypatch) -> FakeClock:
+    clock = FakeClock()
+    monkeypatch.setattr(ratelimit, "time", clock)
+    return clock
+
+
+@pytest.fixture(params=["local", "mongo"])
+def backend(request):
+    if request.param == "local":
+        return LocalBucketBackend()
+    return MongoBucketBackend(AsyncMongoMockClient()["mcim"]["rate_limits"])
+
+
+def _take(run, backend, times: int, rate: float = 2, capacity: float = 3) -> list:
+    async def main():
+        return [await backend.take("bucket", rate, capacity) for _ in range(times)]
+
+    return run(main)
+
+
+def test_burst_up_to_capacity(run, clock, backend):
+    waits = _take(run, backend, 4)
+
+    assert waits[:3] == [0, 0, 0]
+    # 每秒补充 2 个，还需半秒
+    assert waits[3] == pytest.approx(0.5)
+
+
+def test_tokens_refill_at_rate(run, clock, backend):
+    _take(run, backend, 3)
+
+    clock.advance(0.25)
+    assert _take(run, backend, 1) == [pytest.approx(0.25)]
+    clock.advance(0.25)
+    assert _take(run, backend, 2) == [0, pytest.approx(0.5)]
+
+
+def test_refill_is_capped_at_capacity(run, clock, backend):
+    _take(run, backend, 3)
+
+    clock.advance(3600)
+    waits = _take(run, backend, 4)
+
+    assert waits[:3] == [0, 0, 0]
+    assert waits[3] > 0
+
+
+def test_mongo_bucket_is_shared_between_backends(run, clock):
+    collection = AsyncMongoMockClient()["mcim"]["rate_limits"]
+
+    _take(run, MongoBucketBackend(collection), 3)
+    waits = _take(run, MongoBucketBackend(collection), 1)
+
+    assert waits == [pytest.approx(0.5)]
+
+
+def test_acquire_waits_within_max_wait(run):
+    limiter = RateLimiter("test-wait", rate=20, capacity=1, max_wait=1)
+    waited = counter("ratelimit_waited")
+
+    async def main():
+        return [await limiter.acquire(), await limiter.acquire()]
+
+    start = time.monotonic()
+    assert run(main) == [True, True]
+    assert time.monotonic() - start >= 0.04
+    assert waited.values["test-wait"] >= 1
+
+
+def test_acquire_rejects_beyond_max_wait(run):
+    limiter = RateLimiter("test-reject", rate=1, capacity=1, max_wait=0.1)
+    rejected = counter("ratelimit_rejected")
+
+    async def main():
+        return [
+            await limiter.acquire(),
+            await limiter.acquire("other"),
+            await limiter.acquire(),
+        ]
+
+    # 不同 key 分别限流
+    assert run(main) == [True, True, False]
+    assert rejected.values["test-reject"] == 1
+
+
+def test_rejected_request_carries_retry_after(run, monkeypatch):
+    limiter = RateLimiter("test-upstream", rate=2, capacity=1, max_wait=0.1)
+    monkeypatch.setattr(network, "get_rate_limiter", lambda upstream: limiter)
+    requests = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        requests.append(request)
+        return httpx.Response(200, json={"data": 1})
+
+    async def main():
+        set_session(
+            httpx.AsyncClient(transport=httpx.MockTransport(handler)), "ratelimit-test"
+        )
+        api = Api(
+            url="https://upstream.test/v1/mods", method="GET", upstream="ratelimit-test"
+        )
+        assert await api.request() == {"data": 1}
+        await api.request()
+
+    with pytest.raises(RateLimitedException) as e:
+        run(main)
+    assert e.value.retry_after == pytest.approx(0.5)
+    # 被限流的请求不会发到上游
+    assert len(requests) == 1
@@ -0,0 +1,123 @@
+"""
+上游请求重试: 对可重试的状态码退避重试，服从 Retry-After，不超出请求的时间预算
+"""
+
+import time
+
+import httpx
+import pytest
+
+from app.exceptions import ApiException, DeadlineExceededException, NetworkException
+from app.utils import deadline
+from app.utils.network.network import DEFAULT_RETRY_POLICY, Api, set_session
+
+
+class FakeUpstream:
+    """
+    按顺序返回预设的响应，之后一直返回最后一个，预设的是异常时抛出
+    """
+
+    def __init__(self, *responses: httpx.Response):
+        self.responses = list(responses)
+        self.requests = []
+
+    def handler(self, request: httpx.Request) -> httpx.Response:
+        self.requests.append(time.monotonic())
+        response = self.responses[min(len(self.requests), len(self.responses)) - 1]
+        if isinstance(response, Exception):
+            raise response
+        return response
+
+
+def _request(run, upstream: str, fake: FakeUpstream, budget: float = None):
+    """
+    每个测试使用不同的上游名称，熔断器等状态互不影响
+    """
+
+    async def main():
+        set_session(
+            httpx.AsyncClient(transport=httpx.MockTransport(fake.handler)), upstream
+        )
+        if budget is not None:
+            deadline.set_deadline(budget)
+        api = Api(url="https://upstream.test/v1/mods", method="GET", upstream=upstream)
+        return await api.request()
+
+    return run(main)
+
+
+def test_503_recovers_on_retry(run):
+    fake = FakeUpstream(httpx.Response(503), httpx.Response(200, json={"data": 1}))
+
+    assert _request(run, "retry-503", fake) == {"data": 1}
+    assert len(fake.requests) == 2
+
+
+def test_429_honours_retry_after(run):
+    fake = FakeUpstream(
+        httpx.Response(429, headers={"Retry-After": "0.3"}),
+        httpx.Response(200, json={"data": 1}),
+    )
+
+    assert _request(run, "retry-429", fake) == {"data": 1}
+    assert len(fake.requests) == 2
+    assert fake.requests[1] - fake.requests[0] >= 0.3
+
+
+def test_404_is_not_retried(run):
+    fake = FakeUpstream(httpx.Response(404))
+
+    with pytest.raises(NetworkException) as e:
+        _request(run, "retry-404", fake)
+    assert e.value.status == 404
+    assert len(fake.requests) == 1
+
+
+def test_retries_stop_at_max_attempts(run):
+    fake = FakeUpstream(httpx.Response(502))
+
+    start = time.monotonic()
+    with pytest.raises(ApiException, match="重试达到最大次数"):
+        _request(run, "retry-exhausted", fake)
+    assert len(fake.requests) == DEFAULT_RETRY_POLICY.max_attempts
+    # 每次退避不超过 base_delay * 2^n
+    limit = sum(
+        DEFAULT_RETRY_POLICY.base_delay * 2**attempt
+        for attempt in range(1, DEFAULT_RETRY_POLICY.max_attempts)
+    )
+    assert time.monotonic() - start < limit + 0.5
+
+
+def test_exhausted_deadline_stops_retries_early(run):
+    # Retry-After 超出剩余预算，不再等待，直接失败
+    fake = FakeUpstream(httpx.Response(503, headers={"Retry-After": "5"}))
+
+    start = time.monotonic()
+    with pytest.raises(ApiException) as e:
+        _request(run, "retry-deadline", fake, budget=1)
+    assert isinstance(e.value, DeadlineExceededException)
+    assert len(fake.requests) == 1
+    assert time.monotonic() - start < 1
+
+
+def test_expired_deadline_makes_no_request(run):
+    fake = FakeUpstream(httpx.Response(200, json={}))
+
+    with pytest.raises(DeadlineExceededException):
+        _request(run, "retry-expired", fake, budget=0)
+    assert fake.requests == []
+
+
+def test_timeout_within_deadline_is_retried(run):
+    # 超时不是因为时间预算用完，按网络超时重试
+    fake = FakeUpstream(TimeoutError(), httpx.Response(200, json={"data": 1}))
+
+    assert _request(run, "retry-timeout", fake, budget=5) == {"data": 1}
+    assert len(fake.requests) == 2
+
+
+def test_timeout_without_deadline_is_retried(run):
+    fake = FakeUpstream(TimeoutError(), httpx.Response(200, json={"data": 1}))
+
+    assert _request(run, "retry-timeout-no-deadline", fake) == {"data": 1}
+    assert len(fake.requests) == 2
@@ -0,0 +1,102 @@
+"""
+按热度调度的后台刷新: 层级和间隔、到期刷新、队列计数、超出上限时的丢弃
+"""
+
+import asyncio
+import time
+from datetime import datetime, timedelta
+
+from app.utils.metrics import gauge
+from app.utils.scheduler import RefreshScheduler
+
+
+def _scheduler(refresher=None, **kwargs) -> RefreshScheduler:
+    async def noop(keys):
+        return {key: None for key in keys}
+
+    options = dict(base_interval=100, min_interval=10, max_interval=1000, half_life=3600)
+    options.update(kwargs)
+    return RefreshScheduler("test", {"mod": refresher or noop}, **options)
+
+
+def test_disabled_scheduler_uses_base_interval():
+    scheduler = _scheduler()
+
+    scheduler.touch("mod", 1, datetime.utcnow())
+    assert scheduler.interval("mod", 1) == 100
+    assert not scheduler._items
+
+
+def test_popularity_picks_tier_and_interval():
+    scheduler = _scheduler()
+    scheduler.enabled = True
+
+    for _ in range(60):
+        scheduler.touch("mod", 1, datetime.utcnow())
+    scheduler.touch("mod", 2, datetime.utcnow())
+
+    assert scheduler.tier("mod", 1) == "hot"
+    assert scheduler.tier("mod", 2) == "cold"
+    assert scheduler.interval("mod", 1) == 25
+    assert scheduler.interval("mod", 2) == 400
+
+
+def test_due_items_are_refreshed_and_counted(run):
+    refreshed = []
+    versions = {1: "v1"}
+
+    async def refresher(keys):
+        refreshed.append(sorted(keys))
+        return {key: versions[key] for key in keys if key in versions}
+
+    scheduler = _scheduler(refresher)
+    depth = gauge("refresh_queue_depth")
+
+    async def main():
+        scheduler.start()
+        try:
+            old = datetime.utcnow() - timedelta(seconds=1000)
+            scheduler.touch("mod", 1, old)
+            # 上游已经没有的条目刷新后不再跟踪
+            scheduler.touch("mod", 2, old)
+            await asyncio.sleep(0.1)
+        finally:
+            scheduler.stop()
+
+    run(main)
+
+    assert refreshed == [[1, 2]]
+    assert list(scheduler._items) == [("mod", 1)]
+    assert scheduler._items[("mod", 1)].version == "v1"
+    assert scheduler._queued == {"hot": 0, "warm": 0, "cold": 0}
+    scheduler._report()
+    assert depth.values["test:cold"] == 0
+
+
+def test_queued_items_are_counted_per_tier():
+    scheduler = _scheduler()
+    scheduler.enabled = True
+    old = datetime.utcnow() - timedelta(seconds=1000)
+    scheduler.touch("mod", 1, old)
+    scheduler.touch("mod", 2, old)
+
+    due = scheduler._pop_due(time.time() + 1)
+
+    assert sorted(due["mod"]) == [1, 2]
+    assert scheduler._queued["cold"] == 2
+    scheduler.stop()
+    assert scheduler._queued["cold"] == 0
+    assert not any(item.queued for item in scheduler._items.values())
+
+
+def test_prune_drops_least_popular_down_to_max_items():
+    scheduler = _scheduler(max_items=3)
+    scheduler.enabled = True
+    for key in range(1, 6):
+        for _ in range(key):
+            scheduler.touch("mod", key, datetime.utcnow())
+
+    scheduler._prune(time.time())
+
+    assert sorted(key for _, key in scheduler._items) == [3, 4, 5]
+    assert all((kind, key) in scheduler._items for _, kind, key in scheduler._heap)
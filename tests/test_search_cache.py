@@ -0,0 +1,123 @@
+"""
+搜索结果缓存: 规范化后相同的查询共用缓存，条目按 TTL 和条目数淘汰
+"""
+
+from app.service import curseforge, modrinth
+from app.sync.modrinth import Facets
+from app.utils import cache
+from app.utils.cache import SearchCache
+from app.utils.metrics import counter, gauge
+from app.utils.search import SearchQuery
+
+
+def _curseforge_search(mods):
+    """
+    每次返回新的 Mod dict，保存时会原地改写 id 字段
+    """
+
+    def search(**kwargs):
+        return {
+            "data": mods(),
+            "pagination": {
+                "index": kwargs["index"],
+                "pageSize": kwargs["pagesize"],
+                "resultCount": 2,
+                "totalCount": 2,
+            },
+        }
+
+    return search
+
+
+def _modrinth_search(**kwargs):
+    return {
+        "hits": [],
+        "offset": kwargs["offset"],
+        "limit": kwargs["limit"],
+        "total_hits": 0,
+    }
+
+
+def test_entries_expire_and_evict(monkeypatch):
+    now = 1000.0
+    monkeypatch.setattr(cache.time, "monotonic", lambda: now)
+    search_cache = SearchCache("test", max_entries=2, ttl=10)
+
+    search_cache.set("a", 1)
+    search_cache.set("b", 2)
+    assert search_cache.get("a") == 1
+    # "a" 刚被访问过，淘汰最久未用的 "b"
+    search_cache.set("c", 3)
+    assert "b" not in search_cache
+    assert search_cache.get("a") == 1
+    now += 11
+    assert search_cache.get("a") is None
+    assert len(search_cache) == 1
+
+
+def test_entries_and_evictions_are_reported(monkeypatch):
+    now = 1000.0
+    monkeypatch.setattr(cache.time, "monotonic", lambda: now)
+    search_cache = SearchCache("test-metrics", max_entries=2, ttl=10)
+    entries = gauge("search_cache_entries")
+    evictions = counter("search_cache_evictions")
+
+    for key in "abc":
+        search_cache.set(key, key)
+    assert entries.values["test-metrics"] == 2
+    assert evictions.get("test-metrics") == 1
+    # 与热点缓存的淘汰计数分开
+    assert counter("cache_evictions").get("test-metrics") == 0
+    search_cache.delete("b")
+    assert entries.values["test-metrics"] == 1
+    now += 11
+    assert search_cache.get("c") is None
+    assert entries.values["test-metrics"] == 0
+
+
+def test_equivalent_curseforge_queries_share_cache(
+    run, monkeypatch, fake_api, curseforge_mod
+):
+    fake = fake_api.on(
+        "search", _curseforge_search(lambda: [curseforge_mod(1), curseforge_mod(2)])
+    )
+    monkeypatch.setattr(curseforge, "api", fake)
+    monkeypatch.setattr(
+        curseforge, "search_cache", SearchCache("test-curseforge", max_entries=10, ttl=60)
+    )
+
+    async def main():
+        first, _ = await curseforge.search_mods(SearchQuery(searchFilter="Sodium"))
+        again, _ = await curseforge.search_mods(
+            SearchQuery(searchFilter="  sodium ", modLoaderType=0, gameVersion="")
+        )
+        other, _ = await curseforge.search_mods(SearchQuery(searchFilter="sodium extra"))
+        return first, again, other
+
+    first, again, _ = run(main, db=True)
+
+    assert len(fake.calls) == 2
+    assert first.body == again.body
+
+
+def test_equivalent_modrinth_queries_share_cache(run, monkeypatch, fake_api):
+    fake = fake_api.on("search", _modrinth_search)
+    monkeypatch.setattr(modrinth, "api", fake)
+    monkeypatch.setattr(
+        modrinth, "search_cache", SearchCache("test-modrinth", max_entries=10, ttl=60)
+    )
+
+    async def main():
+        await modrinth.search_projects(
+            query="sodium",
+            facets=Facets.parse('[["categories:Fabric"],["versions:1.20.1"]]'),
+        )
+        await modrinth.search_projects(
+            query=" sodium ",
+            facets=Facets.parse('[["versions=1.20.1"],["categories:fabric"]]'),
+        )
+        await modrinth.search_projects(query="sodium")
+
+    run(main)
+
+    assert len(fake.calls) == 2
@@ -0,0 +1,154 @@
+"""
+本地搜索索引: 前缀匹配取交集、排序、覆盖率判断
+"""
+
+import asyncio
+
+from app.service import curseforge
+from app.utils import search
+from app.utils.search import SearchIndex, SearchQuery
+
+
+def _mod(modid: int, name: str, downloads=None, author: str = "author", **kwargs) -> dict:
+    return {
+        "modId": modid,
+        "gameId": 432,
+        "classId": 6,
+        "name": name,
+        "slug": name.lower().replace(" ", "-"),
+        "summary": "",
+        "authors": [{"name": author}],
+        "downloadCount": downloads,
+        **kwargs,
+    }
+
+
+MODS = [
+    _mod(1, "Sodium", downloads=300, author="jellysquid3"),
+    _mod(2, "Sodium Extra", downloads=100, author="FlashyReese"),
+    _mod(3, "Reese's Sodium Options", author="FlashyReese"),
+    _mod(4, "Iris Shaders", downloads=300, author="coderbot"),
+    _mod(5, "Indium", downloads=50, author="comp500"),
+]
+
+
+def _index(mods=MODS, **kwargs) -> SearchIndex:
+    index = SearchIndex("test", **kwargs)
+
+    async def rows():
+        for mod in mods:
+            yield mod
+
+    asyncio.run(index.load(rows()))
+    return index
+
+
+def test_query_tokens_match_prefixes_and_intersect():
+    index = _index()
+
+    assert sorted(index.search(SearchQuery(searchFilter="sod"))) == [1, 2, 3]
+    assert index.search(SearchQuery(searchFilter="sod ext")) == [2]
+    assert index.search(SearchQuery(searchFilter="flashy opt")) == [3]
+    assert index.search(SearchQuery(searchFilter="sodium iris")) == []
+
+
+def test_slug_query_matches_exactly():
+    index = _index()
+
+    assert index.search(SearchQuery(slug="sodium")) == [1]
+    assert index.search(SearchQuery(slug="sod")) == []
+
+
+def test_missing_sort_keys_are_ordered_last():
+    index = _index()
+    downloads = 6  # TOTALDOWNLOADS
+
+    # 排序值相同时按 modId 升序，没有排序值的始终排在最后
+    assert index.search(SearchQuery(), downloads, "desc") == [1, 4, 2, 5, 3]
+    assert index.search(SearchQuery(), downloads, "asc") == [5, 2, 1, 4, 3]
+
+
+def test_added_and_removed_mods_are_searchable():
+    index = _index()
+
+    index.add(_mod(6, "Sodium Shadowy Path Blocks", downloads=1))
+    assert sorted(index.search(SearchQuery(searchFilter="sodium"))) == [1, 2, 3, 6]
+    index.remove(2)
+    assert sorted(index.search(SearchQuery(searchFilter="sodium"))) == [1, 3, 6]
+    assert index.search(SearchQuery(slug="sodium-extra")) == []
+
+
+def test_covers_requires_recorded_total():
+    index = _index(coverage=0.9)
+    query = SearchQuery(searchFilter="sodium")
+
+    assert not index.covers(query, 3)
+    index.record_total(query, 10)
+    assert index.covers(query, 9)
+    assert not index.covers(query, 8)
+    # 规范化后相同的查询共用上游结果数
+    assert index.covers(SearchQuery(searchFilter="  SODIUM ", modLoaderType=0), 9)
+
+
+def test_covers_expires_with_total_ttl(monkeypatch):
+    index = _index(total_ttl=60)
+    query = SearchQuery(searchFilter="sodium")
+    now = 1000.0
+    monkeypatch.setattr(search.time, "monotonic", lambda: now)
+
+    index.record_total(query, 3)
+    assert index.covers(query, 3)
+    now += 61
+    assert not index.covers(query, 3)
+
+
+def test_slug_query_covers_when_found():
+    index = _index()
+
+    assert index.covers(SearchQuery(slug="sodium"), 1)
+    assert not index.covers(SearchQuery(slug="missing"), 0)
+
+
+def test_page_matches_full_sort():
+    index = _index()
+
+    for sort_field in (2, 4, 6):
+        for sort_order in ("asc", "desc"):
+            ordered = index.search(SearchQuery(), sort_field, sort_order)
+            for start in range(len(MODS) + 1):
+                assert index.page(SearchQuery(), sort_field, sort_order, start, 2) == (
+                    ordered[start : start + 2],
+                    len(MODS),
+                )
+
+
+def test_local_search_skips_index_without_total(monkeypatch):
+    index = _index()
+    monkeypatch.setattr(curseforge, "search_index", index)
+
+    def unexpected(*args, **kwargs):
+        raise AssertionError("没有上游结果数时不应在索引中查找")
+
+    monkeypatch.setattr(index, "search", unexpected)
+    monkeypatch.setattr(index, "page", unexpected)
+    query = SearchQuery(searchFilter="sodium")
+
+    assert curseforge._search_local(query, 6, "desc", 0, 2) is None
+
+
+def test_local_search_pages_covered_query(monkeypatch):
+    index = _index()
+    monkeypatch.setattr(curseforge, "search_index", index)
+    query = SearchQuery(searchFilter="sodium")
+    index.record_total(query, 3)
+
+    page, pagination = curseforge._search_local(query, 6, "desc", 1, 1)
+
+    assert page == [2]
+    assert pagination["totalCount"] == 3
+    assert pagination["resultCount"] == 1
+    # 熔断时不需要上游结果数
+    iris = SearchQuery(searchFilter="iris")
+    assert curseforge._search_local(iris, 6, "desc", 0, 2) is None
+    page, _ = curseforge._search_local(iris, 6, "desc", 0, 2, degraded=True)
+    assert page == [4]